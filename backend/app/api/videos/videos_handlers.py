@@ -75,6 +75,8 @@ async def handle_get_video_status(task_id: str) -> VideoStatusResponse:
                 status="processing",
                 progress=info.get("progress", 0.0),
                 message=info.get("message", "処理中..."),
+                stage=info.get("stage"),
+                eta_seconds=info.get("eta_seconds"),
             )
         elif task_result.state == "SUCCESS":
             result = task_result.result or {}
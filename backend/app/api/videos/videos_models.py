@@ -47,6 +47,8 @@ class VideoStatusResponse(BaseModel):
     status: str
     progress: float = Field(default=0.0, ge=0.0, le=1.0)
     message: Optional[str] = None
+    stage: Optional[str] = Field(default=None, description="処理中のステージ")
+    eta_seconds: Optional[float] = Field(default=None, description="ステージ完了までの推定秒数")
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
@@ -42,6 +42,8 @@ async def websocket_progress(websocket: WebSocket, task_id: str):
                     "status": "processing",
                     "progress": info.get("progress", 0.0),
                     "message": info.get("message", "処理中..."),
+                    "stage": info.get("stage"),
+                    "eta_seconds": info.get("eta_seconds"),
                 }
             elif task.state == "SUCCESS":
                 result = task.result or {}
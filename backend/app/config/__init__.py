@@ -5,7 +5,25 @@
 """
 
 # アプリケーション基本設定
-from .app import AppConfig, SubtitleConfig, Paths, APP_CONFIG, SUBTITLE_CONFIG
+from .app import (
+    AppConfig,
+    SubtitleConfig,
+    RenderConfig,
+    EncoderProfile,
+    ENCODER_PROFILES,
+    WorkspaceConfig,
+    VoicevoxConfig,
+    TTSCacheConfig,
+    BGMCacheConfig,
+    Paths,
+    APP_CONFIG,
+    SUBTITLE_CONFIG,
+    RENDER_CONFIG,
+    WORKSPACE_CONFIG,
+    VOICEVOX_CONFIG,
+    TTS_CACHE_CONFIG,
+    BGM_CACHE_CONFIG,
+)
 
 # キャラクター + 表情設定
 from .content_config.characters import (
@@ -32,6 +50,12 @@ __all__ = [
     "ExpressionConfig",
     "BackgroundConfig",
     "SubtitleConfig",
+    "RenderConfig",
+    "EncoderProfile",
+    "WorkspaceConfig",
+    "VoicevoxConfig",
+    "TTSCacheConfig",
+    "BGMCacheConfig",
     "UIConfig",
     # データクラス
     "Characters",
@@ -42,5 +66,11 @@ __all__ = [
     # インスタンス
     "APP_CONFIG",
     "SUBTITLE_CONFIG",
+    "RENDER_CONFIG",
+    "ENCODER_PROFILES",
+    "WORKSPACE_CONFIG",
+    "VOICEVOX_CONFIG",
+    "TTS_CACHE_CONFIG",
+    "BGM_CACHE_CONFIG",
     "UI_CONFIG",
 ]
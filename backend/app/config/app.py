@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
 import os
 from pathlib import Path
@@ -15,7 +15,8 @@ class AppConfig:
     page_icon: str = "📕"
     layout: str = "wide"
 
-    fps: int = 10
+    # VIDEO_FRAME_RATE_MODE=vfr の場合は最大フレームレート（口パクの時間分解能）
+    fps: int = int(os.getenv("VIDEO_FPS", "10"))
     resolution: Tuple[int, int] = (1280, 720)
 
     default_speed: float = 1.0
@@ -40,6 +41,158 @@ class SubtitleConfig:
     margin_bottom: int = 50
     max_chars_per_line: int = 25
     border_radius: int = 18
+    panel_cache_size: int = 64  # 描画済み字幕パネルのキャッシュ上限（件数）
+
+
+@dataclass
+class EncoderProfile:
+    """エンコードプロファイル（libx264）"""
+
+    preset: str
+    crf: int
+
+
+ENCODER_PROFILES: Dict[str, EncoderProfile] = {
+    "fast": EncoderProfile(preset="ultrafast", crf=23),
+    "balanced": EncoderProfile(preset="veryfast", crf=21),
+    "quality": EncoderProfile(preset="medium", crf=18),
+}
+
+
+@dataclass
+class RenderConfig:
+    """動画レンダリング・エンコード設定"""
+
+    # "ffmpeg_pipe": 生フレームをffmpegへ直接パイプ（単一エンコード）
+    # "opencv": cv2.VideoWriterで一時ファイルを書き出し後に再エンコード
+    encoder_backend: str = os.getenv("VIDEO_ENCODER_BACKEND", "ffmpeg_pipe")
+    encoder_profile: str = os.getenv("VIDEO_ENCODER_PROFILE", "fast")
+    audio_sample_rate: int = 44100
+    # "cfr": 全フレームを固定フレームレートで書き出す
+    # "vfr": 見た目が変わったフレームだけを表示時間付きで書き出す（可変フレームレート）
+    frame_rate_mode: str = os.getenv("VIDEO_FRAME_RATE_MODE", "cfr")
+    # フレーム範囲を分割して並列描画するプロセス数（1: 並列化しない、0: CPUコア数）
+    render_workers: int = int(os.getenv("VIDEO_RENDER_WORKERS", "1"))
+    # 音声合成と並行して、合成・解析が済んだ先頭の行から映像を描画するか
+    # （ffmpeg_pipe で並列描画しない場合のみ。音声は最後に多重化する）
+    stream_render: bool = os.getenv("VIDEO_STREAM_RENDER", "true").lower() in ("1", "true", "yes")
+    # 背景＋静止キャラクターの合成済みレイヤーのキャッシュ上限（件数）
+    layer_cache_size: int = 16
+    # 合成済みフレームのキャッシュ上限（MB、0で無効）
+    frame_cache_mb: int = int(os.getenv("VIDEO_FRAME_CACHE_MB", "256"))
+    # ワーカープロセス内でタスク間で共有するデコード済み素材の上限（MB、0で共有しない）
+    context_max_mb: int = int(os.getenv("RENDER_CONTEXT_MAX_MB", "512"))
+    # キャラクタースプライトを描画サイズのアトラスにまとめ、プロセス間で mmap 共有するか
+    sprite_atlas: bool = os.getenv("VIDEO_SPRITE_ATLAS", "true").lower() in ("1", "true", "yes")
+    # 背景画像を描画サイズにリサイズした状態でディスクにキャッシュし、mmap で読み込むか
+    background_cache: bool = os.getenv("VIDEO_BACKGROUND_CACHE", "true").lower() in ("1", "true", "yes")
+    # ワーカープロセスの起動時にフォント・スプライト・背景を読み込んでおくか
+    context_preload: bool = os.getenv("RENDER_CONTEXT_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+    def get_render_workers(self) -> int:
+        """並列描画のプロセス数を取得"""
+        if self.render_workers <= 0:
+            return os.cpu_count() or 1
+        return self.render_workers
+
+    def get_encoder_profile(self) -> EncoderProfile:
+        """設定されたエンコードプロファイルを取得（不明な名前はfast）"""
+        return ENCODER_PROFILES.get(self.encoder_profile, ENCODER_PROFILES["fast"])
+
+
+@dataclass
+class WorkspaceConfig:
+    """ジョブごとの作業ディレクトリ設定"""
+
+    # "disk": temp/jobs 以下に作成
+    # "tmpfs": /dev/shm 以下に作成（容量が足りなければ disk にフォールバック）
+    backing: str = os.getenv("JOB_WORKSPACE_BACKING", "disk")
+    tmpfs_root: str = "/dev/shm/zundamon_jobs"
+    # 1ジョブあたりの作業ディレクトリの上限（MB、0で無制限）
+    quota_mb: int = int(os.getenv("JOB_WORKSPACE_QUOTA_MB", "2048"))
+    # 異常終了したジョブの作業ディレクトリを削除するまでの時間（秒）
+    stale_seconds: int = 24 * 60 * 60
+    # デコード済み音声をメモリに保持する上限（MB、超えた分は作業ディレクトリへ退避）
+    audio_store_max_mb: int = int(os.getenv("AUDIO_STORE_MAX_MB", "256"))
+
+
+@dataclass
+class VoicevoxConfig:
+    """VOICEVOX API クライアント設定"""
+
+    # カンマ区切りで複数のエンジンを指定できる（VOICEVOX_ENDPOINTS_FILE があればそちらを優先）
+    api_url: str = os.getenv("VOICEVOX_API_URL", "http://localhost:50021")
+    # 1行1URLのエンドポイント一覧ファイル（# 以降はコメント）
+    endpoints_file: str = os.getenv("VOICEVOX_ENDPOINTS_FILE", "")
+    # /speakers によるヘルスチェックの間隔（秒）
+    health_check_interval: float = float(
+        os.getenv("VOICEVOX_HEALTH_CHECK_INTERVAL", "10")
+    )
+    # 連続して何回失敗したエンドポイントを振り分け対象から外すか
+    eject_after_failures: int = 3
+    # ワーカープロセスごとの keep-alive 接続数の上限
+    pool_size: int = int(os.getenv("VOICEVOX_POOL_SIZE", "8"))
+    # 接続エラー・タイムアウト・5xx/429 の再試行回数
+    max_retries: int = int(os.getenv("VOICEVOX_MAX_RETRIES", "3"))
+    # 同時合成数（AIMDで min〜max の範囲を自動調整、同じワーカーのジョブ間で共有）
+    min_concurrency: int = 1
+    max_concurrency: int = int(os.getenv("VOICEVOX_MAX_CONCURRENCY", "8"))
+    initial_concurrency: int = 2
+    # 1文字あたりの合成時間が基準値の何倍を超えたら同時合成数を減らすか
+    latency_tolerance: float = 1.5
+    # /multi_synthesis でまとめて合成する1リクエストあたりの行数（0/1: 1行ずつ合成）
+    batch_size: int = int(os.getenv("VOICEVOX_BATCH_SIZE", "0"))
+    # 再試行の待ち時間（指数バックオフの基準・上限、秒。実際の待ち時間はジッターつき）
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    connect_timeout: float = 5.0
+    query_timeout: float = 30.0
+    synthesis_timeout: float = 60.0
+
+    def get_api_urls(self) -> List[str]:
+        """エンドポイントのURL一覧を取得"""
+        entries: List[str] = []
+        if self.endpoints_file and os.path.exists(self.endpoints_file):
+            with open(self.endpoints_file, encoding="utf-8") as f:
+                entries = [line.split("#", 1)[0] for line in f]
+        else:
+            entries = self.api_url.split(",")
+
+        urls = []
+        for entry in entries:
+            url = entry.strip().rstrip("/")
+            if url and url not in urls:
+                urls.append(url)
+        return urls or ["http://localhost:50021"]
+
+    def get_primary_url(self) -> str:
+        """先頭のエンドポイントのURLを取得"""
+        return self.get_api_urls()[0]
+
+
+@dataclass
+class TTSCacheConfig:
+    """合成済み音声（TTS）キャッシュ設定"""
+
+    # "disk": ローカル（または共有ボリューム）のディレクトリ
+    # "redis": Redis（複数ワーカーで共有）
+    # "none": キャッシュしない
+    backend: str = os.getenv("TTS_CACHE_BACKEND", "disk")
+    # キャッシュ全体の上限（MB）。超えた分は最終アクセスが古いものから削除
+    max_mb: int = int(os.getenv("TTS_CACHE_MAX_MB", "1024"))
+    # Celery のブローカー（DB 0）に最大 max_mb の音声を置かないよう、既定は別の DB
+    redis_url: str = os.getenv("TTS_CACHE_REDIS_URL", "redis://redis:6379/1")
+
+
+@dataclass
+class BGMCacheConfig:
+    """デコード済みBGM（PCM）のキャッシュ設定"""
+
+    # "disk": temp/bgm_cache に .npy で保存し、各プロセスは mmap で共有する
+    # "memory": プロセス内のメモリだけに保持する
+    backend: str = os.getenv("BGM_CACHE_BACKEND", "disk")
+    # ワーカープロセスの起動時に BGM_LIBRARY の全曲を読み込んでおくか
+    preload: bool = os.getenv("BGM_CACHE_PRELOAD", "true").lower() in ("1", "true", "yes")
 
 
 class Paths:
@@ -80,6 +233,31 @@ class Paths:
         """一時ファイルディレクトリを取得"""
         return os.path.join(Paths.get_project_root(), "temp")
 
+    @staticmethod
+    def get_jobs_dir() -> str:
+        """ジョブごとの作業ディレクトリの親ディレクトリを取得"""
+        return os.path.join(Paths.get_temp_dir(), "jobs")
+
+    @staticmethod
+    def get_tts_cache_dir() -> str:
+        """合成済み音声キャッシュのディレクトリを取得"""
+        return os.path.join(Paths.get_temp_dir(), "tts_cache")
+
+    @staticmethod
+    def get_bgm_cache_dir() -> str:
+        """デコード済みBGMキャッシュのディレクトリを取得"""
+        return os.path.join(Paths.get_temp_dir(), "bgm_cache")
+
+    @staticmethod
+    def get_sprite_atlas_dir() -> str:
+        """キャラクタースプライトのアトラスのディレクトリを取得"""
+        return os.path.join(Paths.get_temp_dir(), "sprite_atlas")
+
+    @staticmethod
+    def get_background_cache_dir() -> str:
+        """リサイズ済み背景画像キャッシュのディレクトリを取得"""
+        return os.path.join(Paths.get_temp_dir(), "background_cache")
+
     @staticmethod
     def get_outputs_dir() -> str:
         """出力ディレクトリを取得"""
@@ -105,6 +283,11 @@ class Paths:
 # グローバル設定インスタンス
 APP_CONFIG = AppConfig()
 SUBTITLE_CONFIG = SubtitleConfig()
+RENDER_CONFIG = RenderConfig()
+WORKSPACE_CONFIG = WorkspaceConfig()
+VOICEVOX_CONFIG = VoicevoxConfig()
+TTS_CACHE_CONFIG = TTSCacheConfig()
+BGM_CACHE_CONFIG = BGMCacheConfig()
 
 
 PROMPTS_DIR = Path("app/prompts")
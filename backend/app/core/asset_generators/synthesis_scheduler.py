@@ -0,0 +1,222 @@
+"""適応的な同時実行数での音声合成スケジューラ
+
+VOICEVOX エンジンはCPUで合成するため、同時リクエスト数を増やしすぎると
+1件あたりの待ち時間が伸びるだけでスループットは上がらない。
+同時実行数を AIMD（加算的増加・乗算的減少）で調整する:
+
+- 1文字あたりの合成時間が基準値の latency_tolerance 倍以内なら、上限を少しずつ増やす
+- 基準値を超えた場合（エンジン側で待ちが発生）は上限を 0.7 倍にする
+- 失敗した場合は上限を半分にする
+
+リミッターはエンジン（API URL）ごとにプロセス内で共有するため、同じワーカーで
+並行して動くジョブ同士も同じ上限の中で合成する。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import VOICEVOX_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 遅延が基準値を超えたとき・失敗したときの上限の縮小率
+LATENCY_DECREASE_FACTOR = 0.7
+ERROR_DECREASE_FACTOR = 0.5
+# 基準値を超えた観測値に基準値を追従させる割合（エンジンの負荷の変化に合わせる）
+BASELINE_DRIFT = 0.02
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD で上限を調整するスレッドセーフな同時実行数リミッター
+
+    実行枠の待機は VoicevoxEndpointPool が行う。
+    """
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        initial_limit: int = 2,
+        latency_tolerance: float = 1.5,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        # 1文字あたりの合成時間の基準値（秒）
+        self._baseline: Optional[float] = None
+
+        self.completed = 0
+        self.failures = 0
+        self.peak_in_flight = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_acquire(self) -> bool:
+        """空きがあれば実行枠を1つ確保する（待機しない）"""
+        with self._lock:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            return True
+
+    def release(
+        self,
+        elapsed: Optional[float] = None,
+        success: bool = True,
+        units: int = 1,
+    ) -> None:
+        """実行枠を返却し、観測した合成時間から上限を調整する
+
+        Args:
+            elapsed: 合成にかかった秒数（None の場合は上限を調整しない）
+            success: 合成に成功したか
+            units: リクエストの大きさ（文字数）。合成時間をこれで正規化する
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if elapsed is not None:
+                self._adjust(elapsed / max(1, units), success)
+
+    def _adjust(self, latency: float, success: bool) -> None:
+        previous = self.limit
+        self.completed += 1
+
+        if not success:
+            self.failures += 1
+            self._limit = max(self.min_limit, self._limit * ERROR_DECREASE_FACTOR)
+        elif self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        elif latency <= self._baseline * self.latency_tolerance:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+        else:
+            self._baseline += (latency - self._baseline) * BASELINE_DRIFT
+            self._limit = max(self.min_limit, self._limit * LATENCY_DECREASE_FACTOR)
+
+        if self.limit != previous:
+            logger.debug(f"Synthesis concurrency limit: {previous} -> {self.limit}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "completed": self.completed,
+                "failures": self.failures,
+                "baseline_ms_per_char": round(self._baseline * 1000, 2)
+                if self._baseline is not None
+                else None,
+            }
+
+
+class VoiceSynthesisScheduler:
+    """エンドポイントプールの実行枠に従って合成ジョブを並行実行する
+
+    各ジョブは同期関数としてスレッドで実行し（HTTPはプール済みの
+    VoicevoxClient を使用）、イベントループが実行枠の割り当てを行う。
+    """
+
+    def __init__(self, endpoint_pool):
+        self.endpoint_pool = endpoint_pool
+
+    def run(
+        self,
+        jobs: Sequence[Any],
+        worker: Callable[[Any, Any], Optional[Any]],
+        units: Callable[[Any], int] = lambda job: 1,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> List[Optional[Any]]:
+        """全ジョブを実行し、jobs と同じ順序で結果を返す
+
+        worker には (job, 割り当てられたエンドポイントの VoicevoxClient) が渡され、
+        None を返したジョブは失敗として扱う。失敗したジョブは別のエンドポイントで
+        再試行する（エンドポイント数まで）。
+        progress_callback には完了したジョブ数が渡される。
+        """
+        if not jobs:
+            return []
+        return asyncio.run(self._run_all(jobs, worker, units, progress_callback))
+
+    async def _run_all(self, jobs, worker, units, progress_callback):
+        loop = asyncio.get_running_loop()
+        results: List[Optional[Any]] = [None] * len(jobs)
+
+        with ThreadPoolExecutor(
+            max_workers=self.endpoint_pool.max_concurrency,
+            thread_name_prefix="voice-synth",
+        ) as executor:
+
+            async def run_job(index: int, job: Any) -> None:
+                tried = frozenset()
+                for _ in range(len(self.endpoint_pool.endpoints)):
+                    endpoint = await self.endpoint_pool.acquire(exclude=tried)
+                    started = time.perf_counter()
+                    success = False
+                    try:
+                        results[index] = await loop.run_in_executor(
+                            executor, worker, job, endpoint.client
+                        )
+                        success = results[index] is not None
+                    except Exception as e:
+                        logger.error(
+                            f"Voice synthesis job {index} raised exception: {e}"
+                        )
+                    finally:
+                        self.endpoint_pool.release(
+                            endpoint, time.perf_counter() - started, success, units(job)
+                        )
+                    if success:
+                        return
+                    tried |= {endpoint.url}
+
+            pending = [
+                asyncio.ensure_future(run_job(i, job)) for i, job in enumerate(jobs)
+            ]
+            for done, future in enumerate(asyncio.as_completed(pending), start=1):
+                await future
+                if progress_callback:
+                    progress_callback(done)
+
+        return results
+
+
+_limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+_limiters_pid: Optional[int] = None
+
+
+def get_synthesis_limiter(api_url: Optional[str] = None) -> AdaptiveConcurrencyLimiter:
+    """エンジンごとにプロセス内で共有するリミッターを取得"""
+    global _limiters_pid
+    api_url = (api_url or VOICEVOX_CONFIG.get_primary_url()).rstrip("/")
+    with _limiters_lock:
+        if _limiters_pid != os.getpid():
+            _limiters.clear()
+            _limiters_pid = os.getpid()
+        limiter = _limiters.get(api_url)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(
+                min_limit=VOICEVOX_CONFIG.min_concurrency,
+                max_limit=VOICEVOX_CONFIG.max_concurrency,
+                initial_limit=VOICEVOX_CONFIG.initial_concurrency,
+                latency_tolerance=VOICEVOX_CONFIG.latency_tolerance,
+            )
+            _limiters[api_url] = limiter
+        return limiter
@@ -0,0 +1,338 @@
+"""合成済み音声（TTS）キャッシュ
+
+同じ台本から動画を作り直す場合、ほとんどのセリフは前回と同じ音声になる。
+(話者ID, 読み上げテキスト, 話速, 音高, 抑揚, エンジンバージョン) のハッシュを
+キーに合成済みWAVを保存し、VOICEVOX での合成を省略する。
+
+話速・音高・抑揚は audio_query の結果に後から設定する値のため、audio_query の
+結果（アクセント句・モーラ）は (話者ID, テキスト, エンジンバージョン) をキーに別途
+保存する。表情ごとの声のパラメータだけを調整して作り直す場合も、音声合成は必要だが
+アクセント解析の往復は省略できる。
+
+口パク用の RMS エンベロープと音声長は WAV の内容のハッシュ（と解析fps・
+解析方法のバージョン）をキーに保存するため、キャッシュから取り出した音声は
+解析も省略できる。
+
+バックエンドはローカル（共有ボリューム可）のディスクと Redis から選択でき、
+どちらも合計サイズの上限を超えると最終アクセスが古いエントリから削除する。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config.app import Paths, TTS_CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 上限を超えたときに削除して残すサイズの割合（毎回の削除を避けるため少し多めに消す）
+EVICTION_TARGET_RATIO = 0.9
+# ディスクキャッシュの合計サイズを数え直す間隔（秒）。ディレクトリを共有する
+# 他プロセスの書き込み・削除は自プロセスの集計に含まれないため
+DISK_RESCAN_SECONDS = 60.0
+# 口パク解析（AudioProcessor）の計算方法のバージョン。解析結果が変わる変更を
+# したら上げる（古い方法で解析したエンベロープをキャッシュから返さない）
+# 2: ネイティブのサンプルレートで1回だけデコードし、音声長をサンプル数から求める
+# 3: フレーム分割（22.05kHz・1/100 秒単位の音声長）を従来の解析と揃える
+LIPSYNC_ANALYSIS_VERSION = 3
+
+
+class DiskCacheBackend:
+    """ディレクトリにエントリを1ファイルずつ保存するバックエンド
+
+    最終アクセス時刻は mtime で管理するため、複数プロセスで共有してよい。
+    合計サイズはプロセスごとに書き込みのたびに加算し、DISK_RESCAN_SECONDS ごと
+    と上限を超えたときにディレクトリを走査して数え直す。
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._bytes: Optional[int] = None
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key.replace(":", "_"))
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+
+        # 他プロセスが読み途中のファイルを壊さないよう rename で置き換える
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if (
+                self._bytes is None
+                or time.monotonic() - self._scanned_at >= DISK_RESCAN_SECONDS
+            ):
+                self._bytes = self._scan()[1]
+            else:
+                # 上書きした場合は置き換えたファイルの分を差し引く
+                self._bytes += len(data) - previous_size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, str]], int]:
+        self._scanned_at = time.monotonic()
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith(".tmp_") or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def _evict(self) -> None:
+        # 他プロセスの削除で実際には上限を下回っている場合は数え直すだけにする
+        entries, total = self._scan()
+        if total <= self.max_bytes:
+            self._bytes = total
+            return
+        entries.sort()
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        self._bytes = total
+        logger.info(f"TTS cache evicted {removed} entries ({total} bytes remain)")
+
+
+class RedisCacheBackend:
+    """Redis に保存するバックエンド（複数ワーカー・複数ホストで共有）
+
+    最終アクセス時刻をソート済みセットで管理し、合計サイズを超えたら古い順に削除する。
+    """
+
+    PREFIX = "tts_cache:"
+    LRU_KEY = "tts_cache:__lru__"
+    BYTES_KEY = "tts_cache:__bytes__"
+
+    def __init__(self, url: str, max_bytes: int):
+        import redis
+
+        self.max_bytes = max_bytes
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        name = self.PREFIX + key
+        pipe = self.client.pipeline()
+        pipe.get(name)
+        pipe.zadd(self.LRU_KEY, {name: time.time()}, xx=True)
+        data, _ = pipe.execute()
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        name = self.PREFIX + key
+        pipe = self.client.pipeline()
+        pipe.strlen(name)
+        pipe.set(name, data)
+        pipe.zadd(self.LRU_KEY, {name: time.time()})
+        previous_size, _, _ = pipe.execute()
+        total = self.client.incrby(self.BYTES_KEY, len(data) - previous_size)
+        if total > self.max_bytes:
+            self._evict(total)
+
+    def _evict(self, total: int) -> None:
+        target = self.max_bytes * EVICTION_TARGET_RATIO
+        while total > target:
+            oldest = self.client.zrange(self.LRU_KEY, 0, 99)
+            if not oldest:
+                break
+            pipe = self.client.pipeline()
+            for name in oldest:
+                pipe.strlen(name)
+            sizes = pipe.execute()
+
+            pipe = self.client.pipeline()
+            freed = 0
+            for name, size in zip(oldest, sizes):
+                pipe.delete(name)
+                pipe.zrem(self.LRU_KEY, name)
+                freed += size
+                if total - freed <= target:
+                    break
+            pipe.decrby(self.BYTES_KEY, freed)
+            total = pipe.execute()[-1]
+
+
+class TTSCache:
+    """合成済み音声と口パク解析結果のキャッシュ
+
+    バックエンドの障害はキャッシュミスとして扱い、音声生成は止めない。
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "voice_hits": 0,
+            "voice_misses": 0,
+            "query_hits": 0,
+            "query_misses": 0,
+            "lipsync_hits": 0,
+            "lipsync_misses": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def voice_key(
+        speaker_id: int,
+        text: str,
+        speed: float,
+        pitch: float,
+        intonation: float,
+        engine_version: str,
+    ) -> str:
+        """合成パラメータからキャッシュキーを作成"""
+        payload = json.dumps(
+            [speaker_id, text, speed, pitch, intonation, engine_version],
+            ensure_ascii=False,
+        )
+        return "voice:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def query_key(speaker_id: int, text: str, engine_version: str) -> str:
+        """audio_query のキャッシュキーを作成（話速などの韻律パラメータは含めない）"""
+        payload = json.dumps([speaker_id, text, engine_version], ensure_ascii=False)
+        return "query:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def lipsync_key(wav_data: bytes, fps: int) -> str:
+        """WAVの内容・解析fps・解析方法のバージョンからキャッシュキーを作成"""
+        return (
+            f"lipsync:v{LIPSYNC_ANALYSIS_VERSION}:"
+            f"{hashlib.sha256(wav_data).hexdigest()}:{fps}"
+        )
+
+    def get_voice(self, key: str) -> Optional[bytes]:
+        data = self._get(key)
+        self._count("voice", data is not None)
+        return data
+
+    def put_voice(self, key: str, wav_data: bytes) -> None:
+        self._put(key, wav_data)
+
+    def get_query(self, key: str) -> Optional[Dict]:
+        data = self._get(key)
+        self._count("query", data is not None)
+        if data is None:
+            return None
+        return json.loads(data)
+
+    def put_query(self, key: str, audio_query: Dict) -> None:
+        self._put(key, json.dumps(audio_query, ensure_ascii=False).encode("utf-8"))
+
+    def get_lipsync(
+        self, wav_data: bytes, fps: int
+    ) -> Optional[Tuple[List[float], float]]:
+        """口パク用の強度列と音声長を取得"""
+        data = self._get(self.lipsync_key(wav_data, fps))
+        self._count("lipsync", data is not None)
+        if data is None:
+            return None
+        entry = json.loads(data)
+        return entry["intensities"], entry["duration"]
+
+    def put_lipsync(
+        self, wav_data: bytes, fps: int, intensities: List[float], duration: float
+    ) -> None:
+        entry = {"intensities": intensities, "duration": duration}
+        self._put(self.lipsync_key(wav_data, fps), json.dumps(entry).encode("utf-8"))
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"TTS cache read failed: {e}")
+            return None
+
+    def _put(self, key: str, data: bytes) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.put(key, data)
+        except Exception as e:
+            logger.warning(f"TTS cache write failed: {e}")
+
+    def _count(self, kind: str, hit: bool) -> None:
+        with self._stats_lock:
+            self._stats[f"{kind}_{'hits' if hit else 'misses'}"] += 1
+
+
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """設定に従ってプロセス内で共有するキャッシュを取得"""
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache(_create_backend())
+        return _tts_cache
+
+
+def _create_backend():
+    max_bytes = TTS_CACHE_CONFIG.max_mb * 1024 * 1024
+    if TTS_CACHE_CONFIG.backend == "none" or max_bytes <= 0:
+        return None
+
+    try:
+        if TTS_CACHE_CONFIG.backend == "redis":
+            return RedisCacheBackend(TTS_CACHE_CONFIG.redis_url, max_bytes)
+        return DiskCacheBackend(Paths.get_tts_cache_dir(), max_bytes)
+    except Exception as e:
+        logger.warning(f"TTS cache disabled: {e}")
+        return None
@@ -1,19 +1,31 @@
-import requests
-import json
 import os
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, Optional, List, Tuple
-from app.config import Characters
+import threading
+from typing import Callable, Dict, Any, Optional, List, Tuple
+from app.config import Characters, VOICEVOX_CONFIG
+from app.core.asset_generators.synthesis_scheduler import VoiceSynthesisScheduler
+from app.core.asset_generators.tts_cache import get_tts_cache
+from app.core.asset_generators.voicevox_client import VoicevoxClient, VoicevoxError
+from app.core.asset_generators.voicevox_endpoints import get_endpoint_pool
+from app.utils.files import FileManager
 
 logger = logging.getLogger(__name__)
 
 
 class VoiceGenerator:
     def __init__(self, api_url: str = None):
-        self.api_url = api_url or os.getenv(
-            "VOICEVOX_API_URL", "http://localhost:50021"
+        # 複数エンジンへの振り分け（api_url 指定時はそのエンジンのみ）
+        self.endpoint_pool = get_endpoint_pool(
+            [api_url] if api_url else VOICEVOX_CONFIG.get_api_urls()
         )
+        self.api_url = self.endpoint_pool.primary.url
+        # keep-alive 接続をプロセス内で共有するクライアント（先頭のエンジン）
+        self.client = self.endpoint_pool.primary.client
+        # 合成済み音声のキャッシュ
+        self.tts_cache = get_tts_cache()
+        # 直近の generate_conversation_voices のキャッシュ命中数など（ジョブのメトリクス用）
+        self.synthesis_stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
         self.zundamon_speaker_id = 3
         self.metan_speaker_id = 2  # 四国めたん
 
@@ -25,60 +37,39 @@ class VoiceGenerator:
         }
 
     def check_health(self) -> bool:
-        """Check if VOICEVOX API is available"""
-        try:
-            response = requests.get(f"{self.api_url}/speakers", timeout=10)
-            return response.status_code == 200
-        except requests.exceptions.RequestException as e:
-            logger.error(f"VOICEVOX API health check failed: {e}")
-            return False
+        """Check if any VOICEVOX endpoint is available"""
+        return self.endpoint_pool.check_health()
 
     def generate_audio_query(
-        self, text: str, speaker_id: int = None
+        self,
+        text: str,
+        speaker_id: int = None,
+        client: Optional[VoicevoxClient] = None,
     ) -> Optional[Dict[str, Any]]:
         """Generate audio query from text"""
         speaker_id = speaker_id or self.zundamon_speaker_id
+        client = client or self.endpoint_pool.pick().client
 
         try:
-            params = {"text": text, "speaker": speaker_id}
-
-            response = requests.post(
-                f"{self.api_url}/audio_query", params=params, timeout=30
-            )
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                logger.error(f"Audio query generation failed: {response.status_code}")
-                return None
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Audio query request failed: {e}")
+            return client.audio_query(text, speaker_id)
+        except VoicevoxError as e:
+            logger.error(f"Audio query generation failed: {e}")
             return None
 
     def synthesize_audio(
-        self, audio_query: Dict[str, Any], speaker_id: int = None
+        self,
+        audio_query: Dict[str, Any],
+        speaker_id: int = None,
+        client: Optional[VoicevoxClient] = None,
     ) -> Optional[bytes]:
         """Synthesize audio from audio query"""
         speaker_id = speaker_id or self.zundamon_speaker_id
+        client = client or self.endpoint_pool.pick().client
 
         try:
-            response = requests.post(
-                f"{self.api_url}/synthesis",
-                headers={"Content-Type": "application/json"},
-                params={"speaker": speaker_id},
-                data=json.dumps(audio_query),
-                timeout=60,
-            )
-
-            if response.status_code == 200:
-                return response.content
-            else:
-                logger.error(f"Audio synthesis failed: {response.status_code}")
-                return None
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Audio synthesis request failed: {e}")
+            return client.synthesis(audio_query, speaker_id)
+        except VoicevoxError as e:
+            logger.error(f"Audio synthesis failed: {e}")
             return None
 
     def generate_voice(
@@ -95,25 +86,140 @@ class VoiceGenerator:
         # 話者IDを取得
         speaker_id = self.speakers.get(speaker, self.zundamon_speaker_id)
 
-        # Generate audio query
-        audio_query = self.generate_audio_query(text, speaker_id)
+        # 同じパラメータで合成済みの音声があれば合成を省略
+        audio_data = self._lookup_cached_voice(speaker_id, text, speed, pitch, intonation)
+        if audio_data is None:
+            audio_data = self._synthesize_voice(
+                text,
+                speaker_id,
+                speed,
+                pitch,
+                intonation,
+                client=self.endpoint_pool.pick().client,
+            )
+            if not audio_data:
+                return None
+
+        # Save to file
+        if not output_path:
+            # 並行実行されるタスク同士で上書きしないよう一意な名前にする
+            output_path = os.path.join(
+                "/app/temp", FileManager.generate_unique_filename("generated_voice", "wav")
+            )
+
+        return self._save_voice(audio_data, output_path, speaker)
+
+    def _lookup_cached_voice(
+        self,
+        speaker_id: int,
+        text: str,
+        speed: float,
+        pitch: float,
+        intonation: float,
+    ) -> Optional[bytes]:
+        """合成済み音声を取得（なければ None）
+
+        合成するエンジンはまだ決まっていないため、全エンジンで共通のバージョンで引く。
+        """
+        cache_key = self._voice_cache_key(speaker_id, text, speed, pitch, intonation)
+        return self.tts_cache.get_voice(cache_key) if cache_key else None
+
+    def _synthesize_voice(
+        self,
+        text: str,
+        speaker_id: int,
+        speed: float,
+        pitch: float,
+        intonation: float,
+        client: Optional[VoicevoxClient] = None,
+    ) -> Optional[bytes]:
+        """VOICEVOXで合成し、キャッシュに保存する
+
+        audio_query と synthesis は同じエンジンで行う。
+        """
+        client = client or self.endpoint_pool.pick().client
+
+        audio_query = self._build_audio_query(
+            text, speaker_id, speed, pitch, intonation, client
+        )
         if not audio_query:
             return None
 
-        # Apply voice parameters
-        audio_query["speedScale"] = speed
-        audio_query["pitchScale"] = pitch
-        audio_query["intonationScale"] = intonation
-
         # Synthesize audio
-        audio_data = self.synthesize_audio(audio_query, speaker_id)
+        audio_data = self.synthesize_audio(audio_query, speaker_id, client=client)
         if not audio_data:
             return None
 
-        # Save to file
-        if not output_path:
-            output_path = "/app/temp/generated_voice.wav"
+        self._cache_voice(audio_data, client, speaker_id, text, speed, pitch, intonation)
+        return audio_data
 
+    def _cache_voice(
+        self,
+        audio_data: bytes,
+        client: VoicevoxClient,
+        speaker_id: int,
+        text: str,
+        speed: float,
+        pitch: float,
+        intonation: float,
+    ) -> None:
+        """合成した音声を、合成したエンジンのバージョンのキーで保存する"""
+        cache_key = self._voice_cache_key(
+            speaker_id, text, speed, pitch, intonation, client=client
+        )
+        if cache_key:
+            self.tts_cache.put_voice(cache_key, audio_data)
+
+    def _build_audio_query(
+        self,
+        text: str,
+        speaker_id: int,
+        speed: float,
+        pitch: float,
+        intonation: float,
+        client: VoicevoxClient,
+    ) -> Optional[Dict[str, Any]]:
+        """声のパラメータを設定した音声合成用クエリを作成する"""
+        # Generate audio query（韻律パラメータ以外が同じならキャッシュを再利用）
+        audio_query = self._get_audio_query(text, speaker_id, client)
+        if not audio_query:
+            return None
+
+        # Apply voice parameters
+        audio_query["speedScale"] = speed
+        audio_query["pitchScale"] = pitch
+        audio_query["intonationScale"] = intonation
+        return audio_query
+
+    def _get_audio_query(
+        self, text: str, speaker_id: int, client: VoicevoxClient
+    ) -> Optional[Dict[str, Any]]:
+        """audio_query をキャッシュから取得し、なければエンジンで作成して保存する"""
+        query_key = None
+        if self.tts_cache.enabled:
+            engine_version = client.engine_version()
+            if engine_version is not None:
+                query_key = self.tts_cache.query_key(speaker_id, text, engine_version)
+
+        if query_key:
+            audio_query = self.tts_cache.get_query(query_key)
+            self._count("query_hits" if audio_query else "query_misses")
+            if audio_query:
+                return audio_query
+
+        audio_query = self.generate_audio_query(text, speaker_id, client=client)
+        if audio_query and query_key:
+            self.tts_cache.put_query(query_key, audio_query)
+        return audio_query
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self.synthesis_stats[name] = self.synthesis_stats.get(name, 0) + 1
+
+    def _save_voice(
+        self, audio_data: bytes, output_path: str, speaker: str
+    ) -> Optional[str]:
+        """音声データをファイルに保存する"""
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         try:
@@ -125,6 +231,32 @@ class VoiceGenerator:
             logger.error(f"Failed to save audio file: {e}")
             return None
 
+    def _voice_cache_key(
+        self,
+        speaker_id: int,
+        text: str,
+        speed: float,
+        pitch: float,
+        intonation: float,
+        client: Optional[VoicevoxClient] = None,
+    ) -> Optional[str]:
+        """合成済み音声のキャッシュキー（キャッシュ無効・バージョン不明の場合は None）
+
+        client を指定した場合はそのエンジンのバージョン、省略した場合は
+        全エンジンで一致するバージョン（一致しなければ None）を使う。
+        """
+        if not self.tts_cache.enabled:
+            return None
+        if client is not None:
+            engine_version = client.engine_version()
+        else:
+            engine_version = self.endpoint_pool.engine_version()
+        if engine_version is None:
+            return None
+        return self.tts_cache.voice_key(
+            speaker_id, text, speed, pitch, intonation, engine_version
+        )
+
     def _prepare_voice_task(
         self,
         i: int,
@@ -172,19 +304,77 @@ class VoiceGenerator:
         return (i, text, final_speed, final_pitch, final_intonation, audio_path, speaker)
 
     def _generate_voice_worker(
-        self, task: Tuple[int, str, float, float, float, str, str]
-    ) -> Tuple[int, Optional[str]]:
-        """並列実行用の音声生成ワーカー"""
+        self,
+        task: Tuple[int, str, float, float, float, str, str],
+        client: Optional[VoicevoxClient] = None,
+    ) -> Optional[str]:
+        """スケジューラから実行する音声合成ワーカー（キャッシュ未命中の行のみ）"""
         i, text, speed, pitch, intonation, audio_path, speaker = task
-        generated_path = self.generate_voice(
-            text=text,
-            speed=speed,
-            pitch=pitch,
-            intonation=intonation,
-            output_path=audio_path,
-            speaker=speaker,
+        speaker_id = self.speakers.get(speaker, self.zundamon_speaker_id)
+        audio_data = self._synthesize_voice(
+            text, speaker_id, speed, pitch, intonation, client=client
         )
-        return (i, generated_path)
+        if not audio_data:
+            return None
+        return self._save_voice(audio_data, audio_path, speaker)
+
+    def _generate_voice_batch_worker(
+        self,
+        batch: List[Tuple[int, str, float, float, float, str, str]],
+        client: VoicevoxClient,
+    ) -> Optional[List[Optional[str]]]:
+        """同じ話者の複数行を /multi_synthesis でまとめて合成するワーカー
+
+        まとめての合成に失敗した場合は1行ずつの合成に切り替える。
+        全行が失敗した場合は None を返す（スケジューラが別のエンジンで再試行する）。
+        """
+        if len(batch) == 1:
+            path = self._generate_voice_worker(batch[0], client=client)
+            return [path] if path else None
+
+        speaker_id = self.speakers.get(batch[0][6], self.zundamon_speaker_id)
+        paths: List[Optional[str]] = [None] * len(batch)
+
+        audio_queries = [
+            self._build_audio_query(text, speaker_id, speed, pitch, intonation, client)
+            for _, text, speed, pitch, intonation, _, _ in batch
+        ]
+        if all(audio_queries):
+            self._count("batch_requests")
+            try:
+                wavs = client.multi_synthesis(audio_queries, speaker_id)
+            except VoicevoxError as e:
+                logger.warning(f"Batch synthesis failed, falling back to per-line: {e}")
+                self._count("batch_fallbacks")
+                wavs = []
+            for k, (task, audio_data) in enumerate(zip(batch, wavs)):
+                self._cache_voice(audio_data, client, speaker_id, *task[1:5])
+                paths[k] = self._save_voice(audio_data, task[5], task[6])
+
+        for k, task in enumerate(batch):
+            if paths[k] is not None:
+                continue
+            if audio_queries[k] is None:
+                paths[k] = self._generate_voice_worker(task, client=client)
+                continue
+            # 作成済みのクエリはそのまま使って1行ずつ合成する
+            audio_data = self.synthesize_audio(audio_queries[k], speaker_id, client=client)
+            if audio_data:
+                self._cache_voice(audio_data, client, speaker_id, *task[1:5])
+                paths[k] = self._save_voice(audio_data, task[5], task[6])
+        return paths if any(paths) else None
+
+    @staticmethod
+    def _group_batches(pending: List, batch_size: int) -> List[List]:
+        """未合成の行を話者ごとに batch_size 行ずつまとめる（会話順を保つ）"""
+        by_speaker: Dict[str, List] = {}
+        for job in pending:
+            by_speaker.setdefault(job[6], []).append(job)
+        return [
+            jobs[start : start + batch_size]
+            for jobs in by_speaker.values()
+            for start in range(0, len(jobs), batch_size)
+        ]
 
     def generate_conversation_voices(
         self,
@@ -193,6 +383,8 @@ class VoiceGenerator:
         pitch: float = None,
         intonation: float = None,
         output_dir: str = None,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        on_voice_ready: Optional[Callable[[int, str], None]] = None,
     ) -> List[str]:
         """Generate voice files for conversation in parallel
 
@@ -200,9 +392,15 @@ class VoiceGenerator:
             conversations: List of conversation items with keys: 'speaker', 'text'
             speed, pitch, intonation: Global voice parameters (None = use character defaults)
             output_dir: Output directory for audio files
+            progress_callback: Called with the completed ratio (0.0-1.0) after each voice
+            on_voice_ready: Called with (conversation index, audio path) as soon as
+                each voice is written (from synthesis threads, in completion order)
 
         Returns:
             List of audio file paths in conversation order
+
+        Raises:
+            VoicevoxError: If any line could not be synthesized after retries
         """
         if not output_dir:
             output_dir = "/app/temp"
@@ -219,33 +417,94 @@ class VoiceGenerator:
         if not tasks:
             return []
 
-        # 並列で音声生成
-        results: Dict[int, Optional[str]] = {}
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {
-                executor.submit(self._generate_voice_worker, task): task[0]
-                for task in tasks
+        with self._stats_lock:
+            self.synthesis_stats = {
+                "lines": len(tasks),
+                "voice_hits": 0,
+                "query_hits": 0,
+                "query_misses": 0,
+                "batch_requests": 0,
+                "batch_fallbacks": 0,
             }
-            for future in as_completed(futures):
-                idx = futures[future]
-                try:
-                    i, generated_path = future.result()
-                    results[i] = generated_path
-                    if generated_path:
-                        logger.info(f"Generated conversation voice {i}: {generated_path}")
-                    else:
-                        logger.warning(f"Failed to generate voice for conversation {i}")
-                except Exception as e:
-                    logger.error(f"Voice generation task {idx} raised exception: {e}")
-                    results[idx] = None
 
-        # 元の順序で結果を組み立て
-        audio_paths = []
+        # キャッシュ済みの行はそのまま書き出し、残りだけを合成する
+        results: Dict[int, Optional[str]] = {}
+        pending = []
         for task in tasks:
-            i = task[0]
-            path = results.get(i)
-            if path:
-                audio_paths.append(path)
+            i, text, task_speed, task_pitch, task_intonation, audio_path, speaker = task
+            speaker_id = self.speakers.get(speaker, self.zundamon_speaker_id)
+            audio_data = self._lookup_cached_voice(
+                speaker_id, text, task_speed, task_pitch, task_intonation
+            )
+            if audio_data is not None:
+                results[i] = self._save_voice(audio_data, audio_path, speaker)
+                if on_voice_ready and results[i]:
+                    on_voice_ready(i, results[i])
+            else:
+                pending.append(task)
+
+        cached_count = len(results)
+        self.synthesis_stats["voice_hits"] = cached_count
+        if progress_callback and cached_count:
+            progress_callback(cached_count / len(tasks))
+
+        # 短い行が多い台本はHTTPの往復が支配的になるため、設定時は話者ごとにまとめて合成する
+        batches = self._group_batches(pending, max(1, VOICEVOX_CONFIG.batch_size))
+
+        def report_progress(done: int) -> None:
+            synthesized_lines = len(pending) * done / len(batches)
+            progress_callback((cached_count + synthesized_lines) / len(tasks))
+
+        def run_batch(batch, client) -> Optional[List[Optional[str]]]:
+            generated_paths = self._generate_voice_batch_worker(batch, client)
+            # 合成できた行から順に後続の解析へ流す
+            if on_voice_ready and generated_paths:
+                for task, path in zip(batch, generated_paths):
+                    if path:
+                        on_voice_ready(task[0], path)
+            return generated_paths
+
+        # 各エンジンの同時実行数を応答時間に合わせて調整しながら振り分けて合成
+        scheduler = VoiceSynthesisScheduler(self.endpoint_pool)
+        synthesized = scheduler.run(
+            batches,
+            run_batch,
+            units=lambda batch: sum(len(task[1]) for task in batch),
+            progress_callback=report_progress if progress_callback else None,
+        )
+        for batch, generated_paths in zip(batches, synthesized):
+            for k, task in enumerate(batch):
+                results[task[0]] = generated_paths[k] if generated_paths else None
+                if not results[task[0]]:
+                    logger.warning(
+                        f"Failed to generate voice for conversation {task[0]}"
+                    )
+
+        for endpoint in self.endpoint_pool.endpoints:
+            logger.info(
+                f"VOICEVOX endpoint {endpoint.url}: {endpoint.stats()}, "
+                f"requests={endpoint.client.stats()}"
+            )
+        with self._stats_lock:
+            stats = self.synthesis_stats
+            queries = stats["query_hits"] + stats["query_misses"]
+            stats["voice_hit_rate"] = round(stats["voice_hits"] / stats["lines"], 3)
+            stats["query_hit_rate"] = (
+                round(stats["query_hits"] / queries, 3) if queries else 0.0
+            )
+        logger.info(
+            f"Voice synthesis stats: {self.synthesis_stats}, "
+            f"TTS cache (process total): {self.tts_cache.stats()}"
+        )
 
-        return audio_paths
+        # 1行でも欠けると音声と会話の対応がずれるため、黙って詰めずに失敗させる
+        failed = [task[0] for task in tasks if not results.get(task[0])]
+        if failed:
+            FileManager.cleanup_audio_files(
+                [path for path in results.values() if path]
+            )
+            raise VoicevoxError(f"Voice generation failed for conversations {failed}")
+
+        # 元の順序で結果を組み立て
+        return [results[task[0]] for task in tasks]
 
@@ -0,0 +1,298 @@
+"""VOICEVOX API クライアント
+
+ワーカープロセスごとに1つの requests.Session を共有し、keep-alive 接続を
+プールして再利用する。接続エラー・タイムアウト・5xx/429 はジッターつきの
+指数バックオフで再試行し、エンドポイントごとのレイテンシを記録する。
+"""
+
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zipfile
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import VOICEVOX_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 再試行するHTTPステータス
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# /version の取得に失敗した後、再度問い合わせるまでの秒数
+ENGINE_VERSION_RETRY_SECONDS = 60.0
+
+
+class VoicevoxError(RuntimeError):
+    """VOICEVOX API の呼び出しが再試行後も失敗した"""
+
+
+class VoicevoxClient:
+    """スレッドセーフな VOICEVOX API クライアント"""
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+    ):
+        self.api_url = (api_url or VOICEVOX_CONFIG.get_primary_url()).rstrip("/")
+        self.pool_size = pool_size or VOICEVOX_CONFIG.pool_size
+        self.max_retries = (
+            VOICEVOX_CONFIG.max_retries if max_retries is None else max_retries
+        )
+
+        self.session = requests.Session()
+        # pool_block=True で同時接続数を pool_size に制限する
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, pool_block=True
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._engine_version: Optional[str] = None
+        # /version の取得に最後に失敗した時刻（monotonic）
+        self._engine_version_failed_at: Optional[float] = None
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        timeout: float,
+        retries: Optional[int] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """再試行つきでリクエストを送信する
+
+        Raises:
+            VoicevoxError: 再試行後も成功しなかった場合
+        """
+        retries = self.max_retries if retries is None else retries
+        url = f"{self.api_url}{endpoint}"
+        last_error = ""
+
+        for attempt in range(retries + 1):
+            if attempt:
+                self._record(endpoint, retried=True)
+                time.sleep(self._backoff(attempt))
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    timeout=(VOICEVOX_CONFIG.connect_timeout, timeout),
+                    **kwargs,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(endpoint, time.perf_counter() - started, failed=True)
+                last_error = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    f"VOICEVOX {endpoint} attempt {attempt + 1} failed: {last_error}"
+                )
+                continue
+
+            elapsed = time.perf_counter() - started
+            if response.status_code in RETRY_STATUS_CODES:
+                self._record(endpoint, elapsed, failed=True)
+                last_error = f"HTTP {response.status_code}"
+                logger.warning(
+                    f"VOICEVOX {endpoint} attempt {attempt + 1} failed: {last_error}"
+                )
+                continue
+
+            if response.status_code != 200:
+                # 4xx はリクエスト内容の問題のため再試行しない
+                self._record(endpoint, elapsed, failed=True)
+                raise VoicevoxError(
+                    f"VOICEVOX {endpoint} failed: HTTP {response.status_code} "
+                    f"{response.text[:200]}"
+                )
+
+            self._record(endpoint, elapsed)
+            return response
+
+        raise VoicevoxError(
+            f"VOICEVOX {endpoint} failed after {retries + 1} attempts: {last_error}"
+        )
+
+    def audio_query(self, text: str, speaker_id: int) -> Dict[str, Any]:
+        """テキストから音声合成用クエリを作成する"""
+        response = self.request(
+            "POST",
+            "/audio_query",
+            VOICEVOX_CONFIG.query_timeout,
+            params={"text": text, "speaker": speaker_id},
+        )
+        return response.json()
+
+    def synthesis(self, audio_query: Dict[str, Any], speaker_id: int) -> bytes:
+        """音声合成用クエリからWAVを合成する"""
+        response = self.request(
+            "POST",
+            "/synthesis",
+            VOICEVOX_CONFIG.synthesis_timeout,
+            headers={"Content-Type": "application/json"},
+            params={"speaker": speaker_id},
+            data=json.dumps(audio_query),
+        )
+        return response.content
+
+    def multi_synthesis(
+        self, audio_queries: List[Dict[str, Any]], speaker_id: int
+    ) -> List[bytes]:
+        """複数の音声合成用クエリをまとめて合成し、クエリと同じ順序でWAVを返す
+
+        エンジンは 001.wav, 002.wav ... を格納したzipを返すため、メモリ上で展開する。
+
+        Raises:
+            VoicevoxError: 合成に失敗した・zipの内容がクエリと対応しない場合
+        """
+        response = self.request(
+            "POST",
+            "/multi_synthesis",
+            # 1行ずつの合成を直列にまとめた分だけ待つ
+            VOICEVOX_CONFIG.synthesis_timeout * max(1, len(audio_queries)),
+            headers={"Content-Type": "application/json"},
+            params={"speaker": speaker_id},
+            data=json.dumps(audio_queries),
+        )
+        try:
+            with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+                names = sorted(
+                    name for name in archive.namelist() if name.endswith(".wav")
+                )
+                wavs = [archive.read(name) for name in names]
+        except zipfile.BadZipFile as e:
+            raise VoicevoxError(f"VOICEVOX /multi_synthesis returned invalid zip: {e}")
+
+        if len(wavs) != len(audio_queries):
+            raise VoicevoxError(
+                f"VOICEVOX /multi_synthesis returned {len(wavs)} files "
+                f"for {len(audio_queries)} queries"
+            )
+        return wavs
+
+    def engine_version(self) -> Optional[str]:
+        """エンジンのバージョンを取得する（取得できない場合は None）
+
+        取得に失敗した場合は ENGINE_VERSION_RETRY_SECONDS の間は問い合わせず
+        None を返す（エンジン停止中や /version のないエンジンでセリフごとに
+        リクエストしない）。
+        """
+        if self._engine_version is not None:
+            return self._engine_version
+        failed_at = self._engine_version_failed_at
+        if (
+            failed_at is not None
+            and time.monotonic() - failed_at < ENGINE_VERSION_RETRY_SECONDS
+        ):
+            return None
+        try:
+            response = self.request("GET", "/version", 10, retries=0)
+            self._engine_version = str(response.json())
+            self._engine_version_failed_at = None
+        except (VoicevoxError, ValueError) as e:
+            self._engine_version_failed_at = time.monotonic()
+            logger.warning(
+                f"VOICEVOX engine version unavailable, retrying after "
+                f"{ENGINE_VERSION_RETRY_SECONDS:.0f}s: {e}"
+            )
+        return self._engine_version
+
+    def check_health(self) -> bool:
+        """VOICEVOX API が応答するか確認する（再試行なし）"""
+        try:
+            self.request("GET", "/speakers", 10, retries=0)
+            return True
+        except VoicevoxError as e:
+            logger.error(f"VOICEVOX API health check failed: {e}")
+            return False
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """指数バックオフの待ち時間（full jitter）"""
+        ceiling = min(
+            VOICEVOX_CONFIG.backoff_max,
+            VOICEVOX_CONFIG.backoff_base * (2 ** (attempt - 1)),
+        )
+        return random.uniform(0, ceiling)
+
+    def _record(
+        self,
+        endpoint: str,
+        elapsed: Optional[float] = None,
+        failed: bool = False,
+        retried: bool = False,
+    ) -> None:
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(
+                endpoint,
+                {
+                    "calls": 0,
+                    "failures": 0,
+                    "retries": 0,
+                    "total_seconds": 0.0,
+                    "max_seconds": 0.0,
+                },
+            )
+            if retried:
+                metrics["retries"] += 1
+                return
+            metrics["calls"] += 1
+            if failed:
+                metrics["failures"] += 1
+            if elapsed is not None:
+                metrics["total_seconds"] += elapsed
+                metrics["max_seconds"] = max(metrics["max_seconds"], elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """エンドポイントごとの呼び出し回数・失敗数・再試行数・レイテンシ"""
+        with self._metrics_lock:
+            result = {}
+            for endpoint, metrics in self._metrics.items():
+                calls = metrics["calls"]
+                result[endpoint] = {
+                    "calls": calls,
+                    "failures": metrics["failures"],
+                    "retries": metrics["retries"],
+                    "avg_ms": round(metrics["total_seconds"] / calls * 1000, 1)
+                    if calls
+                    else 0.0,
+                    "max_ms": round(metrics["max_seconds"] * 1000, 1),
+                }
+            return result
+
+    def reset_stats(self) -> None:
+        with self._metrics_lock:
+            self._metrics.clear()
+
+
+_clients: Dict[str, VoicevoxClient] = {}
+_clients_lock = threading.Lock()
+_clients_pid: Optional[int] = None
+
+
+def get_voicevox_client(api_url: Optional[str] = None) -> VoicevoxClient:
+    """プロセス内で共有するクライアントを取得する
+
+    fork後の子プロセスでは親の接続を使わないよう新しいクライアントを作成する。
+    """
+    global _clients_pid
+    api_url = (api_url or VOICEVOX_CONFIG.get_primary_url()).rstrip("/")
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(api_url)
+        if client is None:
+            client = VoicevoxClient(api_url)
+            _clients[api_url] = client
+        return client
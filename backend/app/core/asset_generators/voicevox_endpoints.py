@@ -0,0 +1,264 @@
+"""複数の VOICEVOX エンジンへの振り分け
+
+エンドポイントごとに VoicevoxClient（keep-alive 接続）と AIMD リミッターを持ち、
+リクエストは正常なエンドポイントのうち処理中のリクエストが最も少なく、
+かつリミッターに空きがあるものへ振り分ける。
+
+連続して失敗したエンドポイントは振り分け対象から外し、バックグラウンドの
+/speakers ヘルスチェックが成功した時点で復帰させる。全エンドポイントが外れた
+場合は外したものにも振り分け、そのリクエストが成功した時点でも復帰させる。
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from app.config import VOICEVOX_CONFIG
+from .synthesis_scheduler import AdaptiveConcurrencyLimiter, get_synthesis_limiter
+from .voicevox_client import VoicevoxClient, get_voicevox_client
+
+logger = logging.getLogger(__name__)
+
+
+class VoicevoxEndpoint:
+    """1つの VOICEVOX エンジン"""
+
+    def __init__(
+        self, url: str, client: VoicevoxClient, limiter: AdaptiveConcurrencyLimiter
+    ):
+        self.url = url
+        self.client = client
+        self.limiter = limiter
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.ejections = 0
+
+    @property
+    def outstanding(self) -> int:
+        return self.limiter.in_flight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "ejections": self.ejections,
+            "concurrency": self.limiter.stats(),
+        }
+
+
+class VoicevoxEndpointPool:
+    """最小処理中リクエスト数で振り分けるエンドポイントプール
+
+    acquire() は任意のイベントループから await でき、空きがない場合は
+    到着順に待機する。release() は任意のスレッドから呼び出してよい。
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        health_check_interval: Optional[float] = None,
+        eject_after_failures: Optional[int] = None,
+    ):
+        self.endpoints = [
+            VoicevoxEndpoint(url, get_voicevox_client(url), get_synthesis_limiter(url))
+            for url in urls
+        ]
+        self.health_check_interval = (
+            VOICEVOX_CONFIG.health_check_interval
+            if health_check_interval is None
+            else health_check_interval
+        )
+        self.eject_after_failures = (
+            eject_after_failures or VOICEVOX_CONFIG.eject_after_failures
+        )
+
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+        self._round_robin = 0
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+        # エンドポイントが1つでも、外した後の復帰のためにヘルスチェックを行う
+        if self.health_check_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name="voicevox-health", daemon=True
+            )
+            self._health_thread.start()
+
+    @property
+    def max_concurrency(self) -> int:
+        """全エンドポイントの同時実行数の上限の合計"""
+        return sum(endpoint.limiter.max_limit for endpoint in self.endpoints)
+
+    @property
+    def primary(self) -> VoicevoxEndpoint:
+        return self.endpoints[0]
+
+    def engine_version(self) -> Optional[str]:
+        """全エンドポイントで共通のエンジンバージョン
+
+        取得できたバージョンが一致しない場合は None（どのエンジンで合成した音声かを
+        キャッシュキーで区別できないため）。応答しないエンドポイントは無視する。
+        """
+        versions = {endpoint.client.engine_version() for endpoint in self.endpoints}
+        versions.discard(None)
+        if len(versions) != 1:
+            if len(versions) > 1:
+                logger.warning(f"VOICEVOX engine versions differ: {sorted(versions)}")
+            return None
+        return versions.pop()
+
+    def pick(self) -> VoicevoxEndpoint:
+        """処理中のリクエストが最も少ない正常なエンドポイントを選ぶ（実行枠は確保しない）"""
+        with self._lock:
+            return min(self._candidates(), key=lambda endpoint: endpoint.outstanding)
+
+    async def acquire(self, exclude: FrozenSet[str] = frozenset()) -> VoicevoxEndpoint:
+        """実行枠に空きのあるエンドポイントを1つ確保する
+
+        Args:
+            exclude: 避けるエンドポイントのURL（失敗したリクエストの再試行用）。
+                     他に候補がない場合は無視する
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters:
+                endpoint = self._try_acquire(exclude)
+                if endpoint is not None:
+                    return endpoint
+            future = loop.create_future()
+            waiter = (loop, future, exclude)
+            self._waiters.append(waiter)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # 割り当て後にキャンセルされた（future 自体がキャンセル済みなら _grant が返却する）
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            raise
+
+    def release(
+        self,
+        endpoint: VoicevoxEndpoint,
+        elapsed: Optional[float] = None,
+        success: bool = True,
+        units: int = 1,
+    ) -> None:
+        """実行枠を返却し、結果をエンドポイントの状態に反映する"""
+        endpoint.limiter.release(elapsed, success, units)
+        with self._lock:
+            if elapsed is not None:
+                if success:
+                    endpoint.consecutive_failures = 0
+                    if not endpoint.healthy:
+                        self._set_healthy(endpoint, True)
+                else:
+                    endpoint.consecutive_failures += 1
+                    if (
+                        endpoint.healthy
+                        and endpoint.consecutive_failures >= self.eject_after_failures
+                    ):
+                        self._set_healthy(endpoint, False)
+            self._wake_waiters()
+
+    def _candidates(
+        self, exclude: FrozenSet[str] = frozenset()
+    ) -> List[VoicevoxEndpoint]:
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.healthy]
+        # 全滅した場合は外したエンドポイントにも振り分ける（処理を止めないため）
+        candidates = healthy or self.endpoints
+        return [
+            endpoint for endpoint in candidates if endpoint.url not in exclude
+        ] or candidates
+
+    def _try_acquire(
+        self, exclude: FrozenSet[str] = frozenset()
+    ) -> Optional[VoicevoxEndpoint]:
+        candidates = self._candidates(exclude)
+        # 同数の場合に先頭へ偏らないよう開始位置をずらす
+        self._round_robin = (self._round_robin + 1) % len(candidates)
+        rotated = candidates[self._round_robin:] + candidates[: self._round_robin]
+        for endpoint in sorted(rotated, key=lambda endpoint: endpoint.outstanding):
+            if endpoint.limiter.try_acquire():
+                return endpoint
+        return None
+
+    def _wake_waiters(self) -> None:
+        while self._waiters:
+            loop, future, exclude = self._waiters[0]
+            endpoint = self._try_acquire(exclude)
+            if endpoint is None:
+                return
+            self._waiters.popleft()
+            loop.call_soon_threadsafe(self._grant, future, endpoint)
+
+    def _grant(self, future: asyncio.Future, endpoint: VoicevoxEndpoint) -> None:
+        if future.cancelled():
+            # 割り当て前に待機がキャンセルされた枠は返却する
+            self.release(endpoint)
+        else:
+            future.set_result(endpoint)
+
+    def _set_healthy(self, endpoint: VoicevoxEndpoint, healthy: bool) -> None:
+        endpoint.healthy = healthy
+        if healthy:
+            endpoint.consecutive_failures = 0
+            logger.info(f"VOICEVOX endpoint re-admitted: {endpoint.url}")
+        else:
+            endpoint.ejections += 1
+            logger.warning(f"VOICEVOX endpoint ejected: {endpoint.url}")
+
+    def check_health(self) -> bool:
+        """全エンドポイントのヘルスチェックを行い、1つでも正常なら True"""
+        results: List[Tuple[VoicevoxEndpoint, bool]] = [
+            (endpoint, endpoint.client.check_health()) for endpoint in self.endpoints
+        ]
+        with self._lock:
+            for endpoint, healthy in results:
+                if healthy != endpoint.healthy:
+                    self._set_healthy(endpoint, healthy)
+            # 復帰したエンドポイントで待機中のリクエストを処理する
+            self._wake_waiters()
+        return any(healthy for _, healthy in results)
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_check_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.warning(f"VOICEVOX health check loop error: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint.url: endpoint.stats() for endpoint in self.endpoints}
+
+
+_pools: Dict[Tuple[str, ...], VoicevoxEndpointPool] = {}
+_pools_lock = threading.Lock()
+_pools_pid: Optional[int] = None
+
+
+def get_endpoint_pool(urls: Optional[Sequence[str]] = None) -> VoicevoxEndpointPool:
+    """プロセス内で共有するエンドポイントプールを取得"""
+    global _pools_pid
+    key = tuple(url.rstrip("/") for url in (urls or VOICEVOX_CONFIG.get_api_urls()))
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            # fork前のヘルスチェックスレッドは子プロセスには存在しない
+            _pools.clear()
+            _pools_pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = VoicevoxEndpointPool(key)
+            _pools[key] = pool
+            logger.info(f"VOICEVOX endpoints: {list(key)}")
+        return pool
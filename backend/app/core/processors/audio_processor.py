@@ -1,57 +1,156 @@
 import librosa
 import numpy as np
 import logging
-from typing import List, Tuple
-from moviepy import AudioFileClip
+import os
+import soundfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 from scipy import signal
 
 logger = logging.getLogger(__name__)
 
+# analyze_audio_batch の既定の並列数
+DEFAULT_ANALYSIS_WORKERS = min(4, os.cpu_count() or 1)
+# RMS を計算するサンプルレート（従来の librosa.load の既定値。フレーム分割を従来と揃える）
+ANALYSIS_SAMPLE_RATE = 22050
+
+
+def grid_duration(duration: float) -> float:
+    """強度列のフレーム分割に使う音声長
+
+    従来は AudioFileClip の音声長（ffmpeg が表示する 1/100 秒単位に四捨五入した値）
+    でフレーム数と窓の間隔を決めていたため、同じ値に丸める。
+    """
+    return int(duration * 100 + 0.5) / 100
+
+
+def frame_rms(y: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """フレームごとの RMS（librosa.feature.rms の center=True と同じフレーム分割）
+
+    解析結果が変わる変更をした場合は tts_cache.LIPSYNC_ANALYSIS_VERSION を上げる。
+
+    両端を frame_length // 2 ずつ無音で埋め、hop_length ごとの窓の二乗平均を
+    二乗和の累積和の差で求める（窓をコピーしないため長い音声でも O(サンプル数)）。
+    """
+    pad = frame_length // 2
+    squared = np.zeros(len(y) + 2 * pad + 1, dtype=np.float64)
+    squared[pad + 1 : pad + 1 + len(y)] = np.square(y, dtype=np.float64)
+    cumulative = np.cumsum(squared)
+
+    frame_count = 1 + (len(y) + 2 * pad - frame_length) // hop_length
+    if frame_count <= 0:
+        return np.zeros(0, dtype=np.float32)
+    starts = np.arange(frame_count) * hop_length
+    power = (cumulative[starts + frame_length] - cumulative[starts]) / frame_length
+    return np.sqrt(np.maximum(power, 0.0)).astype(np.float32)
+
 
 class AudioProcessor:
-    def __init__(self, fps: int = 30):
+    def __init__(self, fps: int = 30, tts_cache=None, audio_store=None):
         self.fps = fps
+        # 解析結果をWAVの内容ごとに保存するキャッシュ（TTSCache）
+        self.tts_cache = tts_cache
+        # デコード済み音声を結合処理と共有するストア（AudioSegmentStore）
+        self.audio_store = audio_store
 
     def analyze_audio_for_mouth_sync(self, audio_path: str) -> Tuple[List[float], float]:
-        """音声解析（口パク用）- 実時間ベース"""
+        """音声解析（口パク用）- 実時間ベース
+
+        tts_cache が有効な場合、同じ内容のWAVは前回の解析結果を再利用する。
+        """
+        if self.tts_cache is None or not self.tts_cache.enabled:
+            return self._analyze_audio(audio_path)
+
         try:
-            # 1. 実際の音声時間を取得
-            audio_clip = AudioFileClip(audio_path)
-            actual_duration = audio_clip.duration
-            audio_clip.close()
+            with open(audio_path, "rb") as f:
+                wav_data = f.read()
+        except OSError as e:
+            logger.error(f"Audio analysis failed: {e}")
+            return [], 0.0
 
-            if actual_duration <= 0:
-                logger.warning(f"Invalid audio duration: {audio_path}")
-                return [], 0.0
+        cached = self.tts_cache.get_lipsync(wav_data, self.fps)
+        if cached is not None:
+            return cached
+
+        intensities, actual_duration = self._analyze_audio(audio_path)
+        if intensities and actual_duration > 0:
+            self.tts_cache.put_lipsync(
+                wav_data, self.fps, intensities, actual_duration
+            )
+        return intensities, actual_duration
+
+    def analyze_audio_batch(
+        self, audio_paths: Sequence[str], max_workers: Optional[int] = None
+    ) -> Dict[str, Tuple[List[float], float]]:
+        """複数の音声をまとめて解析し、{音声パス: (強度列, 音声長)} を返す
+
+        デコードと RMS 計算は numpy / libsndfile 側で GIL を解放するため、
+        max_workers > 1 の場合はスレッドで並列に解析する。
+        """
+        paths = list(dict.fromkeys(audio_paths))
+        workers = min(max_workers or DEFAULT_ANALYSIS_WORKERS, len(paths))
+        if workers <= 1:
+            results = [self.analyze_audio_for_mouth_sync(path) for path in paths]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="audio-analysis"
+            ) as executor:
+                results = list(executor.map(self.analyze_audio_for_mouth_sync, paths))
+        return dict(zip(paths, results))
 
-            # 2. 音声データ読み込み
-            y, sr = librosa.load(audio_path)
-            if len(y) == 0:
+    def _load_mono(self, audio_path: str) -> Tuple[np.ndarray, int]:
+        """モノラル float32 PCM を元のサンプルレートのまま取得（デコードは1回）"""
+        if self.audio_store is not None:
+            # ストアのPCMを結合処理と共有する
+            return (
+                self.audio_store.mono(audio_path),
+                self.audio_store.get(audio_path).sample_rate,
+            )
+        try:
+            data, sr = soundfile.read(audio_path, dtype="float32", always_2d=True)
+        except RuntimeError:
+            # libsndfile が読めない形式は librosa で読み込む
+            y, sr = librosa.load(audio_path, sr=None, mono=True)
+            return y.astype(np.float32, copy=False), sr
+        if data.shape[1] == 1:
+            return data[:, 0], sr
+        return data.mean(axis=1, dtype=np.float32), sr
+
+    def _analyze_audio(self, audio_path: str) -> Tuple[List[float], float]:
+        """RMSから口パク用の強度列を計算する"""
+        try:
+            # 1. 音声データ読み込み（音声長はサンプル数から求める）
+            y, sr = self._load_mono(audio_path)
+            actual_duration = len(y) / sr if sr else 0.0
+
+            if actual_duration <= 0:
                 logger.warning(f"Empty audio file: {audio_path}")
                 return [], actual_duration
 
-            # 3. 目標フレーム数を実時間から計算
-            target_frames = max(1, int(actual_duration * self.fps))
+            # 2. 目標フレーム数を実時間から計算（従来と同じく 1/100 秒単位の音声長から）
+            frame_grid_duration = grid_duration(actual_duration)
+            target_frames = max(1, int(frame_grid_duration * self.fps))
 
-            # 4. 実時間ベースのhop_length計算
-            time_per_frame = actual_duration / target_frames
-            hop_length = max(1, int(sr * time_per_frame))
+            # 3. 実時間ベースのhop_length計算（従来と同じサンプルレートで窓を区切る）
+            if sr != ANALYSIS_SAMPLE_RATE:
+                y = librosa.resample(y, orig_sr=sr, target_sr=ANALYSIS_SAMPLE_RATE)
+                sr = ANALYSIS_SAMPLE_RATE
+            # （従来と同じ演算順序にする。先に割ると切り捨てで1サンプルずれる場合がある）
+            hop_length = max(1, int(sr * frame_grid_duration / target_frames))
 
-            # 5. フレーム長の調整
+            # 4. フレーム長の調整
             frame_length = hop_length * 2
             if frame_length > len(y):
                 frame_length = len(y)
 
-            # 6. RMS解析
-            rms = librosa.feature.rms(
-                y=y, hop_length=hop_length, frame_length=frame_length
-            )[0]
+            # 5. RMS解析
+            rms = frame_rms(y, frame_length, hop_length)
 
             if len(rms) == 0:
                 logger.warning(f"RMS analysis returned empty array for: {audio_path}")
                 return [], actual_duration
 
-            # 7. 正確なフレーム数にリサンプリング
+            # 6. 正確なフレーム数にリサンプリング
             if len(rms) != target_frames:
                 try:
                     rms_resampled = signal.resample(rms, target_frames)
@@ -63,7 +162,7 @@ class AudioProcessor:
                     x_new = np.linspace(0, 1, target_frames)
                     rms = np.interp(x_new, x_old, rms)
 
-            # 8. 正規化
+            # 7. 正規化
             rms_max = np.max(rms)
             if rms_max > 0:
                 rms = rms / rms_max
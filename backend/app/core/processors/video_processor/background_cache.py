@@ -0,0 +1,93 @@
+"""リサイズ済み背景画像のディスクキャッシュ
+
+背景画像は Imagen で生成するたびに assets/backgrounds に増えていくが、
+これまではジョブごとに全画像をデコードして描画解像度にリサイズしていた。
+ここでは描画解像度にリサイズした BGR 画像を、元画像の (パス, mtime, サイズ) と
+解像度をキーに temp/background_cache へ .npy として保存し、次回からは
+読み取り専用の mmap で読み込む。ページキャッシュを共有するため、
+ワーカープロセスが何個あっても背景1枚のメモリは1つだけになる。
+
+元画像が差し替えられた（mtime・サイズが変わった）場合はキーが変わるため
+作り直し、古い .npy は削除する。
+"""
+
+import hashlib
+import logging
+import os
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import Paths
+from .sprite_atlas import _write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_path(
+    directory: str, path: str, stat: os.stat_result, resolution: Tuple[int, int]
+) -> str:
+    path_hash = hashlib.sha1(os.path.realpath(path).encode("utf-8")).hexdigest()[:16]
+    width, height = resolution
+    return os.path.join(
+        directory,
+        f"{path_hash}_{stat.st_mtime_ns:x}_{stat.st_size:x}_{width}x{height}.npy",
+    )
+
+
+def decode_background(path: str, resolution: Tuple[int, int]) -> Optional[np.ndarray]:
+    """背景画像をデコードして描画解像度にリサイズする"""
+    image = cv2.imread(path)
+    if image is None:
+        return None
+    return cv2.resize(image, tuple(resolution))
+
+
+def load_resized_background(
+    path: str, resolution: Tuple[int, int], directory: Optional[str] = None
+) -> Optional[np.ndarray]:
+    """描画解像度にリサイズした背景画像を取得（キャッシュがなければ作成する）
+
+    Returns:
+        読み取り専用の (高さ, 幅, 3) の BGR 画像。デコードできない場合は None
+    """
+    directory = directory or Paths.get_background_cache_dir()
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        logger.error(f"Error loading background {path}: {e}")
+        return None
+    cache_path = _cache_path(directory, path, stat, resolution)
+
+    if os.path.exists(cache_path):
+        try:
+            return np.load(cache_path, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Background cache file is broken, decoding again ({cache_path}): {e}")
+
+    image = decode_background(path, resolution)
+    if image is None:
+        return None
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_atomic(cache_path, lambda f: np.save(f, np.ascontiguousarray(image)))
+        _remove_stale(directory, cache_path)
+        return np.load(cache_path, mmap_mode="r")
+    except OSError as e:
+        logger.warning(f"Background cache write failed, keeping in memory: {e}")
+        return image
+
+
+def _remove_stale(directory: str, cache_path: str) -> None:
+    """同じ画像・解像度の古いバージョンの .npy を削除"""
+    name = os.path.basename(cache_path)
+    prefix = name.split("_", 1)[0] + "_"
+    suffix = "_" + name.rsplit("_", 1)[1]
+    for other in os.listdir(directory):
+        if other.startswith(prefix) and other.endswith(suffix) and other != name:
+            try:
+                os.remove(os.path.join(directory, other))
+            except OSError:
+                pass
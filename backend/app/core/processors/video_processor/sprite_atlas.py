@@ -0,0 +1,223 @@
+"""キャラクタースプライトのアトラス（プロセス間で共有する mmap）
+
+キャラクター画像は全表情 × 口の状態（closed / half / open / blink）を
+ワーカープロセスごとに PNG からデコードし、元の解像度のまま保持していた。
+ここでは全スプライトを描画時のサイズ（APP_CONFIG.resolution と
+CharacterConfig.size_ratio から決まる大きさ）にリサイズした RGBA を1つの
+.npy に詰めて temp/sprite_atlas に書き出し、各プロセスは読み取り専用の mmap で
+参照する。ページキャッシュを共有するため、ワーカープロセスを増やしても
+スプライトのメモリは増えない。
+
+アトラスのファイル名には元画像の (パス, mtime, サイズ)・解像度・size_ratio の
+ハッシュを含めるため、素材や設定が変わると自動的に作り直される。
+
+事前に作成する場合:
+    python -m app.core.processors.video_processor.sprite_atlas
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import Paths
+
+logger = logging.getLogger(__name__)
+
+# アトラスの形式を変えた場合に上げる（古いアトラスを使わないようにする）
+ATLAS_VERSION = 1
+
+# {キャラクター: {表情: {口の状態: 画像}}}
+CharacterImages = Dict[str, Dict[str, Dict[str, np.ndarray]]]
+
+
+def sprite_target_size(
+    char_config, char_w: int, char_h: int, bg_w: int, bg_h: int
+) -> Tuple[int, int]:
+    """背景サイズと size_ratio からスプライトの描画サイズ (幅, 高さ) を求める"""
+    target_height = int(bg_h * char_config.size_ratio)
+    target_width = int(char_w * target_height / char_h)
+    if target_width > bg_w * 0.8:
+        target_width = int(bg_w * 0.8)
+        target_height = int(char_h * target_width / char_w)
+    return target_width, target_height
+
+
+def _source_signature(video_processor) -> Tuple:
+    """アトラスの元になる画像ファイルと設定の一覧"""
+    entries = []
+    for char_name in sorted(video_processor.characters):
+        char_dir = Paths.get_character_dir(char_name)
+        for root, _, files in os.walk(char_dir):
+            for name in files:
+                if not name.lower().endswith(".png"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+    ratios = tuple(
+        (name, config.size_ratio)
+        for name, config in sorted(video_processor.characters.items())
+    )
+    return (ATLAS_VERSION, tuple(video_processor.resolution), ratios, tuple(sorted(entries)))
+
+
+def atlas_key(video_processor) -> str:
+    return hashlib.sha1(
+        repr(_source_signature(video_processor)).encode("utf-8")
+    ).hexdigest()[:20]
+
+
+def build_sprite_atlas(video_processor, directory: Optional[str] = None) -> Optional[str]:
+    """全キャラクターのスプライトを描画サイズにリサイズしてアトラスに書き出す
+
+    Returns:
+        アトラス（.npy）のパス。キャラクター画像がない場合は None
+    """
+    from .video_processor_image_loader import _load_character_images_cached
+
+    directory = directory or Paths.get_sprite_atlas_dir()
+    key = atlas_key(video_processor)
+    atlas_path = os.path.join(directory, f"sprites_{key}.npy")
+    if os.path.exists(atlas_path) and os.path.exists(_index_path(atlas_path)):
+        return atlas_path
+
+    bg_w, bg_h = video_processor.resolution
+    index: Dict = {}
+    chunks = []
+    offset = 0
+    for char_name in video_processor.characters:
+        char_config = video_processor.characters[char_name]
+        base_path = Paths.get_character_dir(char_name)
+        for expression in video_processor.get_available_expressions(char_name) or ["normal"]:
+            # 表情ごとのデコードは従来の読み込みと同じ処理（口の状態のサイズを揃える）
+            cached_data, _ = _load_character_images_cached.__wrapped__(
+                char_name, expression, base_path
+            )
+            for mouth_state, shape, dtype_str, img_bytes in cached_data:
+                img = np.frombuffer(img_bytes, dtype=dtype_str).reshape(shape)
+                char_h, char_w = img.shape[:2]
+                target_w, target_h = sprite_target_size(
+                    char_config, char_w, char_h, bg_w, bg_h
+                )
+                if target_w > 0 and target_h > 0:
+                    img = cv2.resize(img, (target_w, target_h))
+                img = np.ascontiguousarray(img, dtype=np.uint8)
+                index.setdefault(char_name, {}).setdefault(expression, {})[
+                    mouth_state
+                ] = [offset, list(img.shape)]
+                chunks.append(img.reshape(-1))
+                offset += img.size
+
+    if not chunks:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    _write_atomic(atlas_path, lambda f: np.save(f, np.concatenate(chunks)))
+    # インデックスを最後に書き出す（インデックスがあればアトラスは完全）
+    _write_atomic(
+        _index_path(atlas_path),
+        lambda f: f.write(json.dumps(index, ensure_ascii=False).encode("utf-8")),
+    )
+    _remove_stale(directory, atlas_path)
+    logger.info(
+        f"Sprite atlas built: {atlas_path} "
+        f"({len(chunks)} sprites, {offset / 1024 / 1024:.1f}MB)"
+    )
+    return atlas_path
+
+
+def load_sprite_atlas(video_processor) -> CharacterImages:
+    """アトラスを mmap して {キャラクター: {表情: {口の状態: 画像}}} を返す
+
+    アトラスがない・古い場合はここで作成する。
+    """
+    key = atlas_key(video_processor)
+    with _atlas_lock:
+        cached = _atlas_cache.get(key)
+        if cached is not None and _atlas_pid == os.getpid():
+            return cached
+
+    atlas_path = build_sprite_atlas(video_processor)
+    if atlas_path is None:
+        return {}
+    buffer = np.load(atlas_path, mmap_mode="r")
+    with open(_index_path(atlas_path), encoding="utf-8") as f:
+        index = json.load(f)
+
+    images: CharacterImages = {}
+    for char_name, expressions in index.items():
+        for expression, states in expressions.items():
+            for mouth_state, (offset, shape) in states.items():
+                size = int(np.prod(shape))
+                images.setdefault(char_name, {}).setdefault(expression, {})[
+                    mouth_state
+                ] = buffer[offset : offset + size].reshape(shape)
+
+    _remember(key, images)
+    return images
+
+
+def _index_path(atlas_path: str) -> str:
+    return atlas_path[: -len(".npy")] + ".json"
+
+
+def _write_atomic(path: str, write) -> None:
+    """一時ファイルに書き出してから置き換える（他プロセスに途中の内容を見せない）"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        # 別ユーザーで動くプロセスからも読めるようにする（mkstemp は 0600）
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _remove_stale(directory: str, atlas_path: str) -> None:
+    """古いアトラスを削除する（mmap 中のプロセスはそのまま読み続けられる）"""
+    keep = {os.path.basename(atlas_path), os.path.basename(_index_path(atlas_path))}
+    for name in os.listdir(directory):
+        if name.startswith("sprites_") and name not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+# プロセス内でマップ済みのアトラス（キー -> 画像の辞書）
+_atlas_cache: Dict[str, CharacterImages] = {}
+_atlas_lock = threading.Lock()
+_atlas_pid: Optional[int] = None
+
+
+def _remember(key: str, images: CharacterImages) -> None:
+    global _atlas_pid
+    with _atlas_lock:
+        if _atlas_pid != os.getpid():
+            _atlas_pid = os.getpid()
+        # 古いキーのアトラスは参照を外す（素材が変わった場合）
+        _atlas_cache.clear()
+        _atlas_cache[key] = images
+
+
+if __name__ == "__main__":
+    from app.core.processors.video_processor import VideoProcessor
+
+    logging.basicConfig(level=logging.INFO)
+    path = build_sprite_atlas(VideoProcessor())
+    print(path or "No character images found")
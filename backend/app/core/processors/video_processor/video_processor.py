@@ -1,4 +1,5 @@
 import logging
+from collections import OrderedDict
 from typing import List, Dict
 
 from app.config import APP_CONFIG, SUBTITLE_CONFIG, Characters
@@ -20,6 +21,11 @@ class VideoProcessor(ImageLoaderMixin, CompositorMixin, SubtitleMixin, Animation
 
         self._cached_font = None
         self._resize_cache = {}
+        self._subtitle_panel_cache = OrderedDict()
+        self._subtitle_panel_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._layer_cache = OrderedDict()
+        self._layer_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._item_sprite = None
         
         # SubtitleMixinで使用するbudouxパーサーを初期化
         from budoux import load_default_japanese_parser
@@ -0,0 +1,156 @@
+"""スプライト合成カーネル
+
+RGBA スプライトを事前乗算アルファ（uint16 固定小数点）に変換しておき、
+フレーム上のクリップ済み矩形だけをインプレースでブレンドする。
+
+    out = (bg * (255 - a) + fg * a) // 255
+
+を整数演算で厳密に計算するため、従来の float64 による合成との差は
+丸め方向の違いによる ±1 以内に収まる。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class PreparedSprite:
+    """合成用に前処理済みのスプライト
+
+    premultiplied / inv_alpha は完全透明な外周を切り落とした範囲のみを保持し、
+    offset_x / offset_y はその範囲の元画像内での位置を表す。
+    """
+
+    width: int  # 元画像の幅
+    height: int  # 元画像の高さ
+    offset_x: int = 0
+    offset_y: int = 0
+    premultiplied: Optional[np.ndarray] = None  # (h, w, 3) uint16: fg * a
+    inv_alpha: Optional[np.ndarray] = None  # (h, w, 1) uint16: 255 - a
+    opaque: Optional[np.ndarray] = None  # アルファなし画像（そのまま上書き）
+
+    @property
+    def is_empty(self) -> bool:
+        return self.premultiplied is None and self.opaque is None
+
+
+def prepare_sprite(image: np.ndarray) -> PreparedSprite:
+    """スプライトを合成用に前処理する"""
+    height, width = image.shape[:2]
+
+    if image.ndim < 3 or image.shape[2] != 4:
+        return PreparedSprite(width, height, opaque=image)
+
+    alpha = image[:, :, 3]
+    rows = np.flatnonzero(alpha.any(axis=1))
+    if rows.size == 0:
+        return PreparedSprite(width, height)
+    cols = np.flatnonzero(alpha.any(axis=0))
+
+    top, bottom = int(rows[0]), int(rows[-1]) + 1
+    left, right = int(cols[0]), int(cols[-1]) + 1
+    cropped = image[top:bottom, left:right]
+
+    a = cropped[:, :, 3:4].astype(np.uint16)
+    premultiplied = cropped[:, :, :3].astype(np.uint16) * a
+
+    return PreparedSprite(
+        width,
+        height,
+        offset_x=left,
+        offset_y=top,
+        premultiplied=premultiplied,
+        inv_alpha=255 - a,
+    )
+
+
+def blend_sprite(frame: np.ndarray, sprite: PreparedSprite, x: int, y: int) -> None:
+    """前処理済みスプライトをフレームの (x, y) にインプレースで合成する"""
+    if sprite.is_empty:
+        return
+
+    frame_h, frame_w = frame.shape[:2]
+    source = sprite.opaque if sprite.opaque is not None else sprite.premultiplied
+    src_h, src_w = source.shape[:2]
+
+    # フレーム上の描画先矩形（フレーム外はクリップ）
+    left = x + sprite.offset_x
+    top = y + sprite.offset_y
+    x0, y0 = max(left, 0), max(top, 0)
+    x1, y1 = min(left + src_w, frame_w), min(top + src_h, frame_h)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    src = (slice(y0 - top, y1 - top), slice(x0 - left, x1 - left))
+    roi = frame[y0:y1, x0:x1]
+
+    if sprite.opaque is not None:
+        roi[:] = sprite.opaque[src]
+        return
+
+    # bg * (255 - a) + fg * a は最大 65025 のため uint16 に収まる
+    acc = np.multiply(roi, sprite.inv_alpha[src], dtype=np.uint16)
+    acc += sprite.premultiplied[src]
+
+    # x // 255 を (x + 1 + (x >> 8)) >> 8 で計算（0 <= x <= 65025 で厳密）
+    tmp = acc >> 8
+    tmp += 1
+    acc += tmp
+    acc >>= 8
+    roi[:] = acc
+
+
+def merge_sprites(
+    layers: List[Tuple[PreparedSprite, int, int]],
+) -> Tuple[PreparedSprite, int, int]:
+    """複数のスプライトを重ね順どおりに1枚の事前乗算レイヤーへまとめる
+
+    1枚だけの場合はそのまま返すため合成結果は変わらない。
+    複数枚の場合は中間結果を丸めるため、個別に合成した場合との差は数階調以内。
+
+    Returns:
+        (まとめたスプライト, x, y)
+    """
+    layers = [
+        (sprite, x, y)
+        for sprite, x, y in layers
+        if not sprite.is_empty and sprite.opaque is None
+    ]
+    if not layers:
+        return PreparedSprite(0, 0), 0, 0
+    if len(layers) == 1:
+        return layers[0]
+
+    # 全レイヤーを覆う矩形
+    left = min(x + s.offset_x for s, x, _ in layers)
+    top = min(y + s.offset_y for s, _, y in layers)
+    right = max(x + s.offset_x + s.premultiplied.shape[1] for s, x, _ in layers)
+    bottom = max(y + s.offset_y + s.premultiplied.shape[0] for s, _, y in layers)
+
+    premultiplied = np.zeros((bottom - top, right - left, 3), dtype=np.uint32)
+    inv_alpha = np.full((bottom - top, right - left, 1), 255, dtype=np.uint32)
+
+    for sprite, x, y in layers:
+        h, w = sprite.premultiplied.shape[:2]
+        ox = x + sprite.offset_x - left
+        oy = y + sprite.offset_y - top
+        region = (slice(oy, oy + h), slice(ox, ox + w))
+        inv = sprite.inv_alpha
+
+        # 下のレイヤーを上のレイヤーの透過率で減衰させてから重ねる
+        premultiplied[region] = (premultiplied[region] * inv + 127) // 255
+        premultiplied[region] += sprite.premultiplied
+        inv_alpha[region] = (inv_alpha[region] * inv + 127) // 255
+
+    # 丸め誤差で fg * a の上限を超えないようにする（blend_sprite の uint16 演算のため）
+    np.minimum(premultiplied, (255 - inv_alpha) * 255, out=premultiplied)
+
+    merged = PreparedSprite(
+        right - left,
+        bottom - top,
+        premultiplied=premultiplied.astype(np.uint16),
+        inv_alpha=inv_alpha.astype(np.uint16),
+    )
+    return merged, left, top
@@ -1,44 +1,140 @@
 """フレーム合成関連のMixin"""
 
 import logging
+from dataclasses import dataclass
 from typing import List, Tuple, Optional, Dict
 import cv2
 import numpy as np
 
-from app.config import Characters
+from app.config import RENDER_CONFIG, Characters
+
+from .video_processor_blend import (
+    PreparedSprite,
+    blend_sprite,
+    merge_sprites,
+    prepare_sprite,
+)
+from .sprite_atlas import sprite_target_size
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class SpriteDraw:
+    """1フレーム内のスプライト描画指示"""
+
+    key: Tuple  # スプライトと位置を一意に表すキー（レイヤーキャッシュ用）
+    sprite: PreparedSprite
+    x: int
+    y: int
+    dynamic: bool = False  # 発話中などフレームごとに変化するか
+
+
 class CompositorMixin:
     """フレーム合成機能を提供するMixin"""
 
-    def _get_resized_image(
+    def resolve_expression(
+        self, expressions: Dict[str, Dict], char_name: str, expression: str
+    ) -> Optional[str]:
+        """表情名を読み込み済みの表情に解決（なければ normal → 最初の表情）"""
+        if expression in expressions:
+            return expression
+        if "normal" in expressions:
+            logger.warning(
+                f"[COMPOSITE] Expression '{expression}' not found for {char_name}, using 'normal'"
+            )
+            return "normal"
+
+        available_expressions = list(expressions.keys())
+        if available_expressions:
+            logger.warning(
+                f"[COMPOSITE] Expression '{expression}' not found for {char_name}, using '{available_expressions[0]}'"
+            )
+            return available_expressions[0]
+
+        logger.error(f"No expressions available for {char_name}")
+        return None
+
+    def _select_mouth_key(
+        self, char_name: str, intensity: float, is_blinking: bool
+    ) -> Tuple[float, str]:
+        """口パク感度を調整した強度と、スプライトキャッシュ用の口の状態を返す"""
+        # キャラクター別の口パク感度調整
+        adjusted_intensity = intensity
+        if char_name == "zundamon":
+            # ずんだもんは口の動きを大きくする
+            adjusted_intensity = intensity * 1.7
+
+        # 画像選択と同じ強度からキーを作る（キャッシュの取り違え防止）
+        return adjusted_intensity, self._get_mouth_state(
+            adjusted_intensity, is_blinking
+        )
+
+    def _get_prepared_sprite(
         self,
         original_img: np.ndarray,
         char_name: str,
         expression: str,
-        intensity: float,
-        is_blinking: bool,
+        mouth_state: str,
         target_width: int,
         target_height: int,
-    ) -> np.ndarray:
-        """リサイズ画像をキャッシュから取得"""
-        mouth_state = self._get_mouth_state(intensity, is_blinking)
+    ) -> PreparedSprite:
+        """リサイズ・前処理済みスプライトをキャッシュから取得"""
         cache_key = (char_name, expression, mouth_state, target_width, target_height)
 
         if cache_key in self._resize_cache:
             return self._resize_cache[cache_key]
 
-        resized_img = cv2.resize(original_img, (target_width, target_height))
+        # アトラスのスプライトは描画サイズにリサイズ済み
+        if original_img.shape[:2] == (target_height, target_width):
+            resized_img = original_img
+        else:
+            resized_img = cv2.resize(original_img, (target_width, target_height))
+        sprite = prepare_sprite(resized_img)
 
         if len(self._resize_cache) >= 100:
             first_key = next(iter(self._resize_cache))
             del self._resize_cache[first_key]
 
-        self._resize_cache[cache_key] = resized_img
+        self._resize_cache[cache_key] = sprite
+
+        return sprite
+
+    def _get_prepared_item(self, item_image: np.ndarray) -> PreparedSprite:
+        """アイテム画像を正方形の枠に収めた前処理済みスプライトを取得"""
+        cached = getattr(self, "_item_sprite", None)
+        if cached is not None and cached[0] is item_image:
+            return cached[1]
+
+        max_size = 400  # 最大サイズ（正方形の枠）
+
+        # 元の画像サイズを取得
+        orig_h, orig_w = item_image.shape[:2]
+
+        # アスペクト比を維持してリサイズ
+        scale = min(max_size / orig_w, max_size / orig_h)
+        new_w = int(orig_w * scale)
+        new_h = int(orig_h * scale)
+
+        # リサイズ（高品質な補間方法を使用）
+        item_resized = cv2.resize(item_image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+
+        # 正方形のキャンバス（透明）を作成
+        canvas = np.zeros((max_size, max_size, item_image.shape[2]), dtype=np.uint8)
+
+        # キャンバスの中央に画像を配置
+        paste_x = (max_size - new_w) // 2
+        paste_y = (max_size - new_h) // 2
+        canvas[paste_y : paste_y + new_h, paste_x : paste_x + new_w] = item_resized
+
+        if canvas.shape[2] == 4:
+            sprite = prepare_sprite(canvas)
+        else:
+            # RGB画像は半透明合成のため枠ごと保持
+            sprite = PreparedSprite(max_size, max_size, opaque=canvas)
 
-        return resized_img
+        self._item_sprite = (item_image, sprite)
+        return sprite
 
     def composite_frame(
         self,
@@ -52,57 +148,8 @@ class CompositorMixin:
             char_h, char_w = character.shape[:2]
             position = ((bg_w - char_w) // 2, (bg_h - char_h) // 2)
 
-        x, y = position
         result = background.copy()
-
-        if character.shape[2] == 4:
-            char_rgb = character[:, :, :3]
-            char_alpha = character[:, :, 3] / 255.0
-
-            char_h, char_w = character.shape[:2]
-            bg_h, bg_w = background.shape[:2]
-
-            if y < 0:
-                char_rgb = char_rgb[-y:, :]
-                char_alpha = char_alpha[-y:, :]
-                char_h += y
-                y = 0
-
-            if x < 0:
-                char_rgb = char_rgb[:, -x:]
-                char_alpha = char_alpha[:, -x:]
-                char_w += x
-                x = 0
-
-            if y + char_h > bg_h:
-                char_h = bg_h - y
-                if char_h > 0:
-                    char_rgb = char_rgb[:char_h, :]
-                    char_alpha = char_alpha[:char_h, :]
-
-            if x + char_w > bg_w:
-                char_w = bg_w - x
-                if char_w > 0:
-                    char_rgb = char_rgb[:, :char_w]
-                    char_alpha = char_alpha[:, :char_w]
-
-            if (
-                char_h > 0
-                and char_w > 0
-                and char_rgb.shape[0] > 0
-                and char_rgb.shape[1] > 0
-            ):
-                char_alpha_expanded = char_alpha[:, :, np.newaxis]
-                for c in range(3):
-                    result[y : y + char_h, x : x + char_w, c] = (
-                        char_alpha_expanded[:, :, 0] * char_rgb[:, :, c]
-                        + (1 - char_alpha_expanded[:, :, 0])
-                        * background[y : y + char_h, x : x + char_w, c]
-                    )
-        else:
-            char_h, char_w = character.shape[:2]
-            result[y : y + char_h, x : x + char_w] = character
-
+        blend_sprite(result, prepare_sprite(character), *position)
         return result
 
     def composite_conversation_frame(
@@ -113,9 +160,36 @@ class CompositorMixin:
         conversation_mode: str = "duo",
         current_time: float = 0.0,
         blink_timings: List[Dict] = None,
+        blink_states: Optional[Dict[str, bool]] = None,
     ) -> np.ndarray:
         """会話用のフレーム合成（表情対応）"""
-        result = background.copy()
+        draws = self._plan_character_draws(
+            background,
+            character_images,
+            active_speakers,
+            conversation_mode,
+            current_time,
+            blink_timings,
+            blink_states,
+        )
+        return self._composite_layers(background, draws)
+
+    def _plan_character_draws(
+        self,
+        background: np.ndarray,
+        character_images: Dict[str, Dict[str, Dict[str, np.ndarray]]],
+        active_speakers: Dict[str, Dict[str, any]],
+        conversation_mode: str = "duo",
+        current_time: float = 0.0,
+        blink_timings: List[Dict] = None,
+        blink_states: Optional[Dict[str, bool]] = None,
+    ) -> List[SpriteDraw]:
+        """描画順に並べたキャラクタースプライトの一覧を作成
+
+        blink_states が指定された場合は瞬きタイミングの検索を省略し、
+        キャラクター名 → 瞬き中か の対応をそのまま使う。
+        """
+        draws: List[SpriteDraw] = []
 
         # デバッグ: active_speakers の内容をログ出力（サンプリング）
         if not hasattr(self, "_composite_call_count"):
@@ -152,35 +226,24 @@ class CompositorMixin:
                 intensity = float(speaker_data)
                 expression = "normal"
 
-            if expression in character_images[char_name]:
-                char_imgs = character_images[char_name][expression]
-            elif "normal" in character_images[char_name]:
-                char_imgs = character_images[char_name]["normal"]
-                logger.warning(
-                    f"[COMPOSITE] Expression '{expression}' not found for {char_name}, using 'normal'"
-                )
-            else:
-                available_expressions = list(character_images[char_name].keys())
-                if available_expressions:
-                    char_imgs = character_images[char_name][available_expressions[0]]
-                    logger.warning(
-                        f"[COMPOSITE] Expression '{expression}' not found for {char_name}, using '{available_expressions[0]}'"
-                    )
-                else:
-                    logger.error(f"No expressions available for {char_name}")
-                    continue
+            resolved_expression = self.resolve_expression(
+                character_images[char_name], char_name, expression
+            )
+            if resolved_expression is None:
+                continue
+            char_imgs = character_images[char_name][resolved_expression]
 
             is_blinking = False
-            if blink_timings:
+            if blink_states is not None:
+                is_blinking = blink_states.get(char_name, False)
+            elif blink_timings:
                 is_blinking = self.is_character_blinking(
                     current_time, blink_timings, char_name
                 )
 
-            # キャラクター別の口パク感度調整
-            adjusted_intensity = intensity
-            if char_name == "zundamon":
-                # ずんだもんは口の動きを大きくする
-                adjusted_intensity = intensity * 1.7
+            adjusted_intensity, mouth_state = self._select_mouth_key(
+                char_name, intensity, is_blinking
+            )
 
             mouth_img = self.select_mouth_image(
                 adjusted_intensity, char_imgs, is_blinking
@@ -190,25 +253,21 @@ class CompositorMixin:
             char_h, char_w = mouth_img.shape[:2]
 
             char_config = self.characters.get(char_name, Characters.ZUNDAMON)
-            unified_size_ratio = char_config.size_ratio
-            target_height = int(bg_h * unified_size_ratio)
-            target_width = int(char_w * target_height / char_h)
-
+            target_width, target_height = sprite_target_size(
+                char_config, char_w, char_h, bg_w, bg_h
+            )
+            # 位置は幅の上限（画面幅の8割）を適用する前の幅で決める
+            unclamped_width = int(char_w * int(bg_h * char_config.size_ratio) / char_h)
             x_offset_ratio = char_config.x_offset_ratio
-            x = int(bg_w * x_offset_ratio - target_width // 2)
+            x = int(bg_w * x_offset_ratio - unclamped_width // 2)
 
             y = int(bg_h * char_config.y_offset_ratio)
 
-            if target_width > bg_w * 0.8:
-                target_width = int(bg_w * 0.8)
-                target_height = int(char_h * target_width / char_w)
-
-            mouth_img = self._get_resized_image(
+            sprite = self._get_prepared_sprite(
                 mouth_img,
                 char_name,
                 expression,
-                intensity,
-                is_blinking,
+                mouth_state,
                 target_width,
                 target_height,
             )
@@ -217,10 +276,115 @@ class CompositorMixin:
             x = max(-target_width // 3, min(x, bg_w - target_width // 3 * 2))
             y = max(margin, min(y, bg_h - target_height - margin))
 
-            result = self.composite_frame(result, mouth_img, (x, y))
+            draws.append(
+                SpriteDraw(
+                    key=(
+                        char_name,
+                        expression,
+                        mouth_state,
+                        target_width,
+                        target_height,
+                        x,
+                        y,
+                    ),
+                    sprite=sprite,
+                    x=x,
+                    y=y,
+                    # 発話中のキャラクターのみ毎フレーム合成する
+                    dynamic=intensity > 0,
+                )
+            )
+
+        return draws
+
+    def _composite_layers(
+        self, background: np.ndarray, draws: List[SpriteDraw]
+    ) -> np.ndarray:
+        """レイヤーキャッシュを使ってスプライトを重ね順どおりに合成
+
+        最初の発話キャラクターより下の静止スプライトは背景と合成済みの
+        ベースレイヤーとして、上の静止スプライト（アイテムを含む）は
+        事前乗算済みの前景レイヤーとしてキャッシュする。毎フレームの処理は
+        ベースのコピーに発話キャラクターと前景レイヤーを重ねるだけになる。
+        """
+        first_dynamic = next(
+            (i for i, draw in enumerate(draws) if draw.dynamic), len(draws)
+        )
+        result = self._get_base_layer(background, draws[:first_dynamic]).copy()
+
+        pending: List[SpriteDraw] = []
+        for draw in draws[first_dynamic:]:
+            if draw.dynamic:
+                self._blend_foreground(result, pending)
+                pending = []
+                blend_sprite(result, draw.sprite, draw.x, draw.y)
+            else:
+                pending.append(draw)
+        self._blend_foreground(result, pending)
 
         return result
 
+    def _get_base_layer(
+        self, background: np.ndarray, draws: List[SpriteDraw]
+    ) -> np.ndarray:
+        """背景に静止スプライトを合成したベースレイヤーを取得"""
+        if not draws:
+            return background
+
+        cache_key = ("base", id(background), tuple(draw.key for draw in draws))
+        cached = self._get_cached_layer(cache_key)
+        # 同じidの別配列を取り違えないよう、元の背景と同一か確認する
+        if cached is not None and cached[0] is background:
+            return cached[1]
+
+        base = background.copy()
+        for draw in draws:
+            blend_sprite(base, draw.sprite, draw.x, draw.y)
+
+        self._store_cached_layer(cache_key, (background, base))
+        return base
+
+    def _blend_foreground(self, frame: np.ndarray, draws: List[SpriteDraw]) -> None:
+        """連続する静止スプライトを1枚の前景レイヤーとして合成"""
+        if not draws:
+            return
+        if len(draws) == 1:
+            blend_sprite(frame, draws[0].sprite, draws[0].x, draws[0].y)
+            return
+
+        cache_key = ("foreground", tuple(draw.key for draw in draws))
+        layer = self._get_cached_layer(cache_key)
+        if layer is None:
+            layer = merge_sprites([(draw.sprite, draw.x, draw.y) for draw in draws])
+            self._store_cached_layer(cache_key, layer)
+
+        sprite, x, y = layer
+        blend_sprite(frame, sprite, x, y)
+
+    def _get_cached_layer(self, cache_key):
+        cached = self._layer_cache.get(cache_key)
+        if cached is None:
+            self._layer_cache_stats["misses"] += 1
+            return None
+        self._layer_cache.move_to_end(cache_key)
+        self._layer_cache_stats["hits"] += 1
+        return cached
+
+    def _store_cached_layer(self, cache_key, layer) -> None:
+        self._layer_cache[cache_key] = layer
+        while len(self._layer_cache) > RENDER_CONFIG.layer_cache_size:
+            self._layer_cache.popitem(last=False)
+            self._layer_cache_stats["evictions"] += 1
+
+    def get_layer_cache_stats(self) -> Dict[str, int]:
+        """レイヤーキャッシュの統計情報を取得"""
+        return dict(self._layer_cache_stats, size=len(self._layer_cache))
+
+    def clear_layer_cache(self) -> None:
+        """レイヤーキャッシュをクリア"""
+        self._layer_cache.clear()
+        self._item_sprite = None
+
     def composite_conversation_frame_with_item(
         self,
         background: np.ndarray,
@@ -230,6 +394,7 @@ class CompositorMixin:
         current_time: float = 0.0,
         blink_timings: List[Dict] = None,
         item_image: Optional[np.ndarray] = None,
+        blink_states: Optional[Dict[str, bool]] = None,
     ) -> np.ndarray:
         """会話用のフレーム合成（アイテム画像表示対応版）
 
@@ -241,90 +406,54 @@ class CompositorMixin:
             current_time: 現在時刻
             blink_timings: 瞬きタイミング
             item_image: 教育アイテム画像（None の場合は表示しない）
+            blink_states: キャラクターごとの瞬き状態（事前計算済みの場合）
 
         Returns:
             合成されたフレーム
         """
-        # 既存のフレーム合成処理
-        frame = self.composite_conversation_frame(
+        draws = self._plan_character_draws(
             background,
             character_images,
             active_speakers,
             conversation_mode,
             current_time,
             blink_timings,
+            blink_states,
         )
 
-        # アイテム画像がある場合は右側中央に配置
+        # アイテム画像がある場合は右側上部に配置
+        sprite = None
         if item_image is not None:
-            max_size = 400  # 最大サイズ（正方形の枠）
-
-            # 元の画像サイズを取得
-            orig_h, orig_w = item_image.shape[:2]
-
-            # アスペクト比を維持してリサイズ
-            scale = min(max_size / orig_w, max_size / orig_h)
-            new_w = int(orig_w * scale)
-            new_h = int(orig_h * scale)
-
-            # リサイズ（高品質な補間方法を使用）
-            item_resized = cv2.resize(item_image, (new_w, new_h), interpolation=cv2.INTER_AREA)
-
-            # 正方形のキャンバス（透明）を作成
-            if item_image.shape[2] == 4:  # RGBA画像の場合
-                canvas = np.zeros((max_size, max_size, 4), dtype=np.uint8)
-            else:  # RGB画像の場合
-                canvas = np.zeros((max_size, max_size, 3), dtype=np.uint8)
-
-            # 中央配置のためのオフセット計算
-            paste_x = (max_size - new_w) // 2
-            paste_y = (max_size - new_h) // 2
-
-            # キャンバスの中央に画像を配置
-            canvas[paste_y : paste_y + new_h, paste_x : paste_x + new_w] = item_resized
-
-            # 最終的なアイテム画像
-            item_resized = canvas
-            item_width = max_size
-            item_height = max_size
+            sprite = self._get_prepared_item(item_image)
 
             # 右側上部の位置を計算（右端からマージン150px、上から80px）
-            frame_h, frame_w = frame.shape[:2]
-            x_offset = frame_w - item_width - 150  # 右端から150px内側
+            frame_w = background.shape[1]
+            x_offset = frame_w - sprite.width - 150  # 右端から150px内側
             y_offset = 80  # 上から80px
 
-            # アイテム画像の合成（アルファチャンネル対応）
-            if item_resized.shape[2] == 4:  # RGBA画像の場合
-                # アルファチャンネルを分離
-                alpha = item_resized[:, :, 3] / 255.0
-
-                # RGB部分を取得
-                item_rgb = item_resized[:, :, :3]
-
-                # 背景部分を取得
-                bg_region = frame[
-                    y_offset : y_offset + item_height, x_offset : x_offset + item_width
-                ]
-
-                # アルファブレンディング
-                for c in range(3):
-                    bg_region[:, :, c] = (
-                        alpha * item_rgb[:, :, c] + (1 - alpha) * bg_region[:, :, c]
+            if sprite.opaque is None:
+                # アルファ付きのアイテムは最前面の静止レイヤーとして合成
+                draws.append(
+                    SpriteDraw(
+                        key=("item", id(item_image), x_offset, y_offset),
+                        sprite=sprite,
+                        x=x_offset,
+                        y=y_offset,
                     )
+                )
 
-                frame[
-                    y_offset : y_offset + item_height, x_offset : x_offset + item_width
-                ] = bg_region
-            else:
-                # RGB画像の場合は半透明合成
-                alpha = 0.9  # 不透明度
-                bg_region = frame[
-                    y_offset : y_offset + item_height, x_offset : x_offset + item_width
-                ]
-                blended = cv2.addWeighted(bg_region, 1 - alpha, item_resized, alpha, 0)
-                frame[
-                    y_offset : y_offset + item_height, x_offset : x_offset + item_width
-                ] = blended
+        frame = self._composite_layers(background, draws)
+
+        if sprite is not None and sprite.opaque is not None:
+            # RGB画像の場合は半透明合成
+            alpha = 0.9  # 不透明度
+            bg_region = frame[
+                y_offset : y_offset + sprite.height,
+                x_offset : x_offset + sprite.width,
+            ]
+            bg_region[:] = cv2.addWeighted(
+                bg_region, 1 - alpha, sprite.opaque, alpha, 0
+            )
 
         return frame
 
@@ -3,11 +3,13 @@
 import os
 import logging
 from functools import lru_cache
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional
 import cv2
 import numpy as np
 
-from app.config import Characters, Backgrounds, Expressions, Paths
+from app.config import RENDER_CONFIG, Characters, Backgrounds, Expressions, Paths
+from .background_cache import decode_background, load_resized_background
+from .sprite_atlas import load_sprite_atlas
 
 logger = logging.getLogger(__name__)
 
@@ -123,7 +125,17 @@ class ImageLoaderMixin:
         return all_expressions
 
     def load_all_character_images(self) -> Dict[str, Dict[str, Dict[str, np.ndarray]]]:
-        """全キャラクターの全表情画像を読み込む"""
+        """全キャラクターの全表情画像を読み込む
+
+        スプライトアトラスが有効な場合は、描画サイズにリサイズ済みの画像を
+        プロセス間で共有する読み取り専用の mmap から返す。
+        """
+        if RENDER_CONFIG.sprite_atlas:
+            try:
+                return load_sprite_atlas(self)
+            except Exception as e:
+                logger.warning(f"Sprite atlas unavailable, decoding PNGs: {e}")
+
         all_images = {}
         for char_key, char_info in self.characters.items():
             char_expressions = self.load_character_images_all_expressions(char_key)
@@ -132,15 +144,15 @@ class ImageLoaderMixin:
 
         return all_images
 
-    def load_backgrounds(self) -> Dict[str, np.ndarray]:
-        """すべての背景画像を読み込む"""
+    def list_backgrounds(self) -> Dict[str, str]:
+        """背景名 -> ファイルパスの一覧を取得（画像はデコードしない）"""
         bg_dir = Paths.get_backgrounds_dir()
 
-        backgrounds = {}
+        files: Dict[str, str] = {}
 
         if not os.path.exists(bg_dir):
             logger.error(f"Background directory not found: {bg_dir}")
-            return backgrounds
+            return files
 
         supported_extensions = Backgrounds.get_supported_extensions()
 
@@ -154,31 +166,58 @@ class ImageLoaderMixin:
             if ext not in supported_extensions:
                 continue
 
-            try:
-                bg = cv2.imread(file_path)
-                if bg is not None:
-                    bg = cv2.resize(bg, self.resolution)
+            files[os.path.splitext(filename)[0]] = file_path
 
-                    bg_name = os.path.splitext(filename)[0]
-                    backgrounds[bg_name] = bg
+        return files
 
-            except Exception as e:
-                logger.error(f"Error loading background {file_path}: {e}")
+    def load_backgrounds(
+        self, names: Optional[Iterable[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """背景画像を読み込む
+
+        Args:
+            names: 読み込む背景名（None の場合はすべて）。存在しない名前は無視する。
+                "default"（default_bg、なければ最初の画像）は常に含める
+        """
+        files = self.list_backgrounds()
+        if names is None:
+            wanted = list(files)
+        else:
+            wanted = [name for name in dict.fromkeys(names) if name in files]
 
-        if "default_bg" in backgrounds:
-            backgrounds["default"] = backgrounds["default_bg"]
-        elif backgrounds:
-            first_key = list(backgrounds.keys())[0]
-            backgrounds["default"] = backgrounds[first_key]
+        backgrounds = {}
+        for bg_name in wanted:
+            bg = self._load_background_image(files[bg_name])
+            if bg is not None:
+                backgrounds[bg_name] = bg
+
+        # default_bg を優先し、読み込めない場合は最初に読み込める画像を使う
+        default_candidates = sorted(files, key=lambda name: name != "default_bg")
+        for bg_name in default_candidates:
+            if bg_name not in backgrounds:
+                bg = self._load_background_image(files[bg_name])
+                if bg is None:
+                    continue
+                backgrounds[bg_name] = bg
+            backgrounds["default"] = backgrounds[bg_name]
+            break
 
         if not backgrounds:
             logger.error("No background images found")
 
         return backgrounds
 
+    def _load_background_image(self, file_path: str) -> Optional[np.ndarray]:
+        """背景画像1枚を描画解像度で読み込む"""
+        try:
+            if RENDER_CONFIG.background_cache:
+                return load_resized_background(file_path, self.resolution)
+            return decode_background(file_path, self.resolution)
+        except Exception as e:
+            logger.error(f"Error loading background {file_path}: {e}")
+            return None
+
     def get_background_names(self) -> List[str]:
         """利用可能な背景画像名のリストを取得"""
-        backgrounds = self.load_backgrounds()
-        names = [name for name in backgrounds.keys() if name != "default"]
+        names = [name for name in self.list_backgrounds() if name != "default"]
         return sorted(names)
-
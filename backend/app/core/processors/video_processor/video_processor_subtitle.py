@@ -2,7 +2,7 @@
 
 import logging
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
@@ -113,115 +113,235 @@ class SubtitleMixin:
         progress: float = 1.0,
         speaker: str = "zundamon",
     ) -> np.ndarray:
-        """字幕をフレームに描画（複数行対応、左揃え）"""
+        """字幕をフレームに描画（複数行対応、左揃え）
+
+        字幕パネルは (text, speaker) ごとに一度だけ描画してキャッシュし、
+        以降のフレームではパネル矩形のみを合成する。
+        """
         if not text.strip():
             return frame
 
         try:
-            pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            draw = ImageDraw.Draw(pil_image)
-
-            font = self.get_japanese_font()
-            if font is None:
-                logger.warning("No font available")
+            panel = self._get_subtitle_panel(text, speaker)
+            if panel is None:
                 return frame
 
-            max_chars = self.subtitle_config.max_chars_per_line
-            lines = self._split_text_into_lines(text, max_chars)
+            self._blend_subtitle_panel(frame, panel)
+            return frame
 
-            line_heights = []
-            line_widths = []
-            max_line_width = 0
+        except Exception as e:
+            logger.error(f"Subtitle drawing failed: {e}")
+            return frame
 
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=font)
-                width = bbox[2] - bbox[0]
-                height = bbox[3] - bbox[1]
-                line_widths.append(width)
-                line_heights.append(height)
-                max_line_width = max(max_line_width, width)
+    def _get_subtitle_panel(self, text: str, speaker: str) -> Optional[Dict]:
+        """字幕パネルをキャッシュから取得（なければ描画してキャッシュ）"""
+        cache_key = (text, speaker)
+        cache = self._subtitle_panel_cache
 
-            line_spacing = 8
+        if cache_key in cache:
+            cache.move_to_end(cache_key)
+            self._subtitle_panel_stats["hits"] += 1
+            return cache[cache_key]
 
-            padding_x = self.subtitle_config.padding_x
-            padding_top = self.subtitle_config.padding_top
-            padding_bottom = self.subtitle_config.padding_bottom
-            border_width = self.subtitle_config.border_width
+        self._subtitle_panel_stats["misses"] += 1
+        panel = self._render_subtitle_panel(text, speaker)
+        if panel is None:
+            return None
 
-            total_text_height = sum(line_heights) + line_spacing * (len(lines) - 1)
-            bg_width = max_line_width + (padding_x * 2)
-            bg_height = total_text_height + padding_top + padding_bottom
+        cache[cache_key] = panel
+        while len(cache) > self.subtitle_config.panel_cache_size:
+            cache.popitem(last=False)
+            self._subtitle_panel_stats["evictions"] += 1
 
-            bg_x = (self.resolution[0] - bg_width) // 2
-            bg_y = self.resolution[1] - self.subtitle_config.margin_bottom - bg_height
+        return panel
 
-            if pil_image.mode != "RGBA":
-                pil_image = pil_image.convert("RGBA")
-                draw = ImageDraw.Draw(pil_image)
+    def _render_subtitle_panel(self, text: str, speaker: str) -> Optional[Dict]:
+        """字幕パネルを透明キャンバスに描画し、合成用のパッチを作成する
 
-            radius = self.subtitle_config.border_radius
-            bg_color = self.subtitle_config.background_color
-            border_color = self.characters.get(
-                speaker, Characters.ZUNDAMON
-            ).subtitle_color
+        パネル本体は従来どおり下地を完全に置き換える（不透明扱い）。
+        パネル外にはみ出した文字のアンチエイリアス部分は、透明キャンバス上の
+        ストレートアルファを乗算済みアルファに変換して保持する。
 
-            try:
-                draw.rounded_rectangle(
-                    [
-                        bg_x - border_width,
-                        bg_y - border_width,
-                        bg_x + bg_width + border_width,
-                        bg_y + bg_height + border_width,
-                    ],
-                    radius + border_width,
-                    fill=border_color,
-                )
-                draw.rounded_rectangle(
-                    [bg_x, bg_y, bg_x + bg_width, bg_y + bg_height],
-                    radius,
-                    fill=bg_color,
-                )
-            except AttributeError:
-                draw.rectangle(
-                    [
-                        bg_x - border_width,
-                        bg_y - border_width,
-                        bg_x + bg_width + border_width,
-                        bg_y + bg_height + border_width,
-                    ],
-                    fill=border_color,
-                )
-                draw.rectangle(
-                    [bg_x, bg_y, bg_x + bg_width, bg_y + bg_height], fill=bg_color
-                )
-
-            outline_width = self.subtitle_config.outline_width
-            outline_color = self.subtitle_config.outline_color
-            text_color = self.subtitle_config.font_color
-
-            current_y = bg_y + padding_top
-
-            for i, line in enumerate(lines):
-                text_x = bg_x + padding_x
-                text_y = current_y
-
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        if dx != 0 or dy != 0:
-                            draw.text(
-                                (text_x + dx, text_y + dy),
-                                line,
-                                font=font,
-                                fill=outline_color,
-                            )
-
-                draw.text((text_x, text_y), line, font=font, fill=text_color)
-
-                current_y += line_heights[i] + line_spacing
-
-            return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        Returns:
+            パッチ情報の辞書。x, y はフレーム上の左上座標、
+            color は乗算済みBGR、inv_alpha は 255 - alpha。
+        """
+        font = self.get_japanese_font()
+        if font is None:
+            logger.warning("No font available")
+            return None
 
-        except Exception as e:
-            logger.error(f"Subtitle drawing failed: {e}")
-            return frame
+        max_chars = self.subtitle_config.max_chars_per_line
+        lines = self._split_text_into_lines(text, max_chars)
+
+        measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+        line_heights = []
+        max_line_width = 0
+        max_line_bottom = 0
+
+        for line in lines:
+            bbox = measure.textbbox((0, 0), line, font=font)
+            width = bbox[2] - bbox[0]
+            height = bbox[3] - bbox[1]
+            line_heights.append(height)
+            max_line_width = max(max_line_width, width)
+            max_line_bottom = max(max_line_bottom, bbox[3])
+
+        line_spacing = 8
+
+        padding_x = self.subtitle_config.padding_x
+        padding_top = self.subtitle_config.padding_top
+        padding_bottom = self.subtitle_config.padding_bottom
+        border_width = self.subtitle_config.border_width
+        outline_width = self.subtitle_config.outline_width
+
+        total_text_height = sum(line_heights) + line_spacing * (len(lines) - 1)
+        bg_width = max_line_width + (padding_x * 2)
+        bg_height = total_text_height + padding_top + padding_bottom
+
+        frame_w, frame_h = self.resolution
+        bg_x = (frame_w - bg_width) // 2
+        bg_y = frame_h - self.subtitle_config.margin_bottom - bg_height
+
+        # パネルと文字（縁取り含む）が収まる範囲をキャンバスとする
+        margin = border_width + outline_width + max(0, max_line_bottom - min(line_heights))
+        x0 = max(0, bg_x - margin)
+        y0 = max(0, bg_y - margin)
+        x1 = min(frame_w, bg_x + bg_width + margin + 1)
+        y1 = min(frame_h, bg_y + bg_height + margin + 1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        canvas = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+
+        # キャンバス座標系へ変換
+        px = bg_x - x0
+        py = bg_y - y0
 
+        radius = self.subtitle_config.border_radius
+        bg_color = self.subtitle_config.background_color
+        border_color = self.characters.get(speaker, Characters.ZUNDAMON).subtitle_color
+
+        try:
+            draw.rounded_rectangle(
+                [
+                    px - border_width,
+                    py - border_width,
+                    px + bg_width + border_width,
+                    py + bg_height + border_width,
+                ],
+                radius + border_width,
+                fill=border_color,
+            )
+            draw.rounded_rectangle(
+                [px, py, px + bg_width, py + bg_height],
+                radius,
+                fill=bg_color,
+            )
+        except AttributeError:
+            draw.rectangle(
+                [
+                    px - border_width,
+                    py - border_width,
+                    px + bg_width + border_width,
+                    py + bg_height + border_width,
+                ],
+                fill=border_color,
+            )
+            draw.rectangle([px, py, px + bg_width, py + bg_height], fill=bg_color)
+
+        # パネル本体の画素（不透明で下地を置き換える領域）
+        panel_mask = np.array(canvas)[:, :, 3] != 0
+
+        outline_color = self.subtitle_config.outline_color
+        text_color = self.subtitle_config.font_color
+
+        current_y = py + padding_top
+
+        for i, line in enumerate(lines):
+            text_x = px + padding_x
+            text_y = current_y
+
+            for dx in range(-outline_width, outline_width + 1):
+                for dy in range(-outline_width, outline_width + 1):
+                    if dx != 0 or dy != 0:
+                        draw.text(
+                            (text_x + dx, text_y + dy),
+                            line,
+                            font=font,
+                            fill=outline_color,
+                        )
+
+            draw.text((text_x, text_y), line, font=font, fill=text_color)
+
+            current_y += line_heights[i] + line_spacing
+
+        rgba = np.array(canvas)
+        alpha = rgba[:, :, 3]
+        alpha_eff = np.where(panel_mask, 255, alpha).astype(np.uint8)
+
+        # 何も描画されていない外周を切り詰める
+        rows = np.flatnonzero(alpha_eff.any(axis=1))
+        cols = np.flatnonzero(alpha_eff.any(axis=0))
+        if len(rows) == 0 or len(cols) == 0:
+            return None
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+
+        color = cv2.cvtColor(
+            np.ascontiguousarray(rgba[top:bottom, left:right, :3]), cv2.COLOR_RGB2BGR
+        )
+        alpha_eff = alpha_eff[top:bottom, left:right]
+
+        opaque = alpha_eff == 255
+        translucent_ys, translucent_xs = np.nonzero((alpha_eff > 0) & ~opaque)
+        translucent_alpha = alpha_eff[translucent_ys, translucent_xs].astype(
+            np.uint16
+        )[:, np.newaxis]
+
+        return {
+            "x": x0 + left,
+            "y": y0 + top,
+            "color": color,
+            "opaque": opaque[:, :, np.newaxis],
+            "translucent_ys": translucent_ys,
+            "translucent_xs": translucent_xs,
+            "translucent_color": (
+                color[translucent_ys, translucent_xs].astype(np.uint16)
+                * translucent_alpha
+                + 127
+            )
+            // 255,
+            "translucent_inv_alpha": 255 - translucent_alpha,
+        }
+
+    @staticmethod
+    def _blend_subtitle_panel(frame: np.ndarray, panel: Dict) -> None:
+        """キャッシュ済み字幕パネルをフレームへ直接合成する"""
+        h, w = panel["color"].shape[:2]
+        x, y = panel["x"], panel["y"]
+        roi = frame[y : y + h, x : x + w]
+
+        np.copyto(roi, panel["color"], where=panel["opaque"])
+
+        ys = panel["translucent_ys"]
+        if len(ys):
+            xs = panel["translucent_xs"]
+            under = roi[ys, xs].astype(np.uint16)
+            roi[ys, xs] = (
+                panel["translucent_color"]
+                + (under * panel["translucent_inv_alpha"] + 127) // 255
+            ).astype(np.uint8)
+
+    def get_subtitle_panel_cache_stats(self) -> Dict[str, float]:
+        """字幕パネルキャッシュのヒット/ミス統計を取得"""
+        stats = dict(self._subtitle_panel_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["size"] = len(self._subtitle_panel_cache)
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear_subtitle_panel_cache(self) -> None:
+        """字幕パネルキャッシュを破棄する"""
+        self._subtitle_panel_cache.clear()
@@ -2,7 +2,10 @@ import os
 import logging
 from typing import List, Optional, Tuple, Dict
 from moviepy import AudioFileClip, concatenate_audioclips
+from app.config import RENDER_CONFIG
 from app.models.video_models import AudioSegmentInfo
+from app.services import audio_mixer
+from app.services.audio_mixer import MixedAudio
 
 logger = logging.getLogger(__name__)
 
@@ -10,9 +13,14 @@ logger = logging.getLogger(__name__)
 class AudioCombiner:
     """音声結合・解析クラス"""
 
-    def __init__(self, audio_processor, fps: int):
+    # キャラクター音声の音量倍率
+    VOICE_VOLUME = 2.0
+
+    def __init__(self, audio_processor, fps: int, audio_store=None):
         self.audio_processor = audio_processor
         self.fps = fps
+        # デコード済み音声を口パク解析と共有するストア（AudioSegmentStore）
+        self.audio_store = audio_store
 
     def combine_audio_files(
         self, audio_file_list: List[str]
@@ -23,6 +31,9 @@ class AudioCombiner:
             tuple: (combined_audio, audio_clips, audio_durations)
                    audio_durations は {audio_path: duration} の辞書
         """
+        if self.audio_store is not None:
+            return self._combine_from_store(audio_file_list)
+
         audio_clips = []
         audio_durations = {}
 
@@ -30,7 +41,7 @@ class AudioCombiner:
             if os.path.exists(audio_path):
                 clip = AudioFileClip(audio_path)
                 # キャラクター音声の音量を2倍に調整
-                clip = clip.with_volume_scaled(2.0)
+                clip = clip.with_volume_scaled(self.VOICE_VOLUME)
                 audio_clips.append(clip)
                 audio_durations[audio_path] = clip.duration
 
@@ -41,36 +52,75 @@ class AudioCombiner:
         combined_audio = concatenate_audioclips(audio_clips)
         return combined_audio, audio_clips, audio_durations
 
-    def analyze_audio_segments(
+    def _combine_from_store(
         self, audio_file_list: List[str]
+    ) -> Tuple[Optional[MixedAudio], List, Dict[str, float]]:
+        """ストアのPCMを連結し、出力サンプルレートのステレオ音声にする"""
+        parts = []
+        audio_durations = {}
+
+        for audio_path in audio_file_list:
+            if not os.path.exists(audio_path):
+                continue
+            segment = self.audio_store.get(audio_path)
+            parts.append(
+                (self.audio_store.samples(audio_path), segment.sample_rate)
+            )
+            audio_durations[audio_path] = segment.duration
+
+        combined = audio_mixer.concatenate(
+            parts, RENDER_CONFIG.audio_sample_rate, gain=self.VOICE_VOLUME
+        )
+        if combined is None:
+            logger.error("No valid audio clips")
+            return None, None, {}
+        return combined, [], audio_durations
+
+    def analyze_audio_segments(
+        self,
+        audio_file_list: List[str],
+        analyzed: Optional[Dict[str, Tuple[List[float], float]]] = None,
     ) -> List[AudioSegmentInfo]:
-        """音声セグメントの解析（実時間ベース）"""
+        """音声セグメントの解析（実時間ベース）
+
+        Args:
+            analyzed: 音声合成と並行して解析済みの {音声パス: (強度列, 音声長)}。
+                      含まれない音声だけをここで解析する
+        """
         segment_audio_intensities = []
         current_time = 0.0
+        analyzed = dict(analyzed or {})
+
+        # 未解析の音声はまとめて（並列に）実時間ベースで解析する
+        pending = [
+            audio_path
+            for audio_path in audio_file_list
+            if audio_path not in analyzed and os.path.exists(audio_path)
+        ]
+        if pending:
+            analyzed.update(self.audio_processor.analyze_audio_batch(pending))
 
         for audio_path in audio_file_list:
-            if os.path.exists(audio_path):
-                # 実時間ベースの音声解析
-                intensities, actual_duration = self.audio_processor.analyze_audio_for_mouth_sync(
-                    audio_path
-                )
-                if intensities and actual_duration > 0:
-                    # 強度値の統計情報をログ出力
-                    max_intensity = max(intensities)
-                    avg_intensity = sum(intensities) / len(intensities)
-                    non_zero_count = sum(1 for i in intensities if i > 0.1)
-
-                    segment_audio_intensities.append(
-                        AudioSegmentInfo(
-                            start_time=current_time,
-                            intensities=intensities,
-                            duration=actual_duration,  # 実際の音声時間を使用
-                            actual_frame_count=len(intensities)  # 実際のフレーム数
-                        )
+            if audio_path not in analyzed:
+                continue
+            intensities, actual_duration = analyzed[audio_path]
+            if intensities and actual_duration > 0:
+                # 強度値の統計情報をログ出力
+                max_intensity = max(intensities)
+                avg_intensity = sum(intensities) / len(intensities)
+                non_zero_count = sum(1 for i in intensities if i > 0.1)
+
+                segment_audio_intensities.append(
+                    AudioSegmentInfo(
+                        start_time=current_time,
+                        intensities=intensities,
+                        duration=actual_duration,  # 実際の音声時間を使用
+                        actual_frame_count=len(intensities)  # 実際のフレーム数
                     )
-                    current_time += actual_duration  # 実時間で累積
-                else:
-                    logger.warning(f"Failed to analyze audio segment: {audio_path}")
+                )
+                current_time += actual_duration  # 実時間で累積
+            else:
+                logger.warning(f"Failed to analyze audio segment: {audio_path}")
 
         total_duration = current_time
         return segment_audio_intensities
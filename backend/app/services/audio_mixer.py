@@ -0,0 +1,159 @@
+"""NumPy による音声ミックス
+
+moviepy のクリップグラフ（AudioFileClip ごとの ffmpeg プロセス、ループした
+サブクリップの CompositeAudioClip）は書き出し時に Python でチャンクごとに
+評価されるため、セリフ数が多いと遅い。ここではセリフの連結・音量調整、
+BGM のループ・フェード・加算をすべて float32 の配列演算で行い、
+1つのバッファを1回だけ書き出す。
+
+MixedAudio は duration / write_audiofile / close を持ち、これまで
+moviepy のクリップを受け取っていた箇所でそのまま使える。
+"""
+
+import logging
+import subprocess
+import wave
+from math import gcd
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 書き出し時の最大振幅（moviepy の量子化と同じ）
+QUANTIZE_LIMIT = 0.99
+# 書き出し時に一度に量子化するサンプル数
+WRITE_CHUNK_FRAMES = 1 << 20
+# モノラルをステレオにするときの各チャンネルの係数
+# （moviepy が使う ffmpeg のアップミックスと同じく -3dB にして音量を揃える）
+MONO_TO_STEREO_GAIN = np.float32(np.sqrt(0.5))
+
+
+class MixedAudio:
+    """ミックス済みのステレオ float32 PCM"""
+
+    nchannels = 2
+
+    def __init__(self, samples: np.ndarray, sample_rate: int):
+        self.samples = samples
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    def write_audiofile(self, filename: str, fps: Optional[int] = None, **_) -> None:
+        """16bit PCM の WAV として書き出す（fps が異なる場合はリサンプリング）"""
+        samples = self.samples
+        if fps and fps != self.sample_rate:
+            samples = resample(samples, self.sample_rate, fps)
+        with wave.open(filename, "wb") as wav:
+            wav.setnchannels(self.nchannels)
+            wav.setsampwidth(2)
+            wav.setframerate(fps or self.sample_rate)
+            for start in range(0, len(samples), WRITE_CHUNK_FRAMES):
+                chunk = np.clip(
+                    samples[start : start + WRITE_CHUNK_FRAMES],
+                    -QUANTIZE_LIMIT,
+                    QUANTIZE_LIMIT,
+                )
+                wav.writeframes((chunk * 32768).astype("<i2").tobytes())
+
+    def close(self) -> None:
+        """moviepy のクリップと同じインターフェース（解放するリソースはない）"""
+
+
+def to_stereo(samples: np.ndarray) -> np.ndarray:
+    """(frames, channels) の PCM を2チャンネルにする"""
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    if samples.shape[1] == 1:
+        return np.repeat(samples * MONO_TO_STEREO_GAIN, 2, axis=1)
+    return samples[:, :2]
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """ポリフェーズフィルタでサンプルレートを変換"""
+    if from_rate == to_rate:
+        return samples
+    from scipy.signal import resample_poly
+
+    divisor = gcd(from_rate, to_rate)
+    return resample_poly(
+        samples, to_rate // divisor, from_rate // divisor, axis=0
+    ).astype(np.float32)
+
+
+def concatenate(
+    parts: Iterable[Tuple[np.ndarray, int]], sample_rate: int, gain: float = 1.0
+) -> Optional[MixedAudio]:
+    """(PCM, サンプルレート) の列を連結して1つのバッファにする"""
+    converted = [
+        to_stereo(resample(samples, rate, sample_rate)) for samples, rate in parts
+    ]
+    if not converted:
+        return None
+    combined = np.concatenate(converted).astype(np.float32)
+    if gain != 1.0:
+        combined *= gain
+    return MixedAudio(combined, sample_rate)
+
+
+def loop_to_length(samples: np.ndarray, frame_count: int) -> np.ndarray:
+    """PCM を繰り返して frame_count サンプルにする（長い場合は先頭から切り出す）"""
+    if len(samples) >= frame_count:
+        return samples[:frame_count]
+    repeats = -(-frame_count // len(samples))
+    return np.tile(samples, (repeats, 1))[:frame_count]
+
+
+def apply_fades(
+    samples: np.ndarray, sample_rate: int, fade_in: float, fade_out: float
+) -> np.ndarray:
+    """線形のフェードイン・フェードアウトをかける（samples を直接変更する）"""
+    frame_count = len(samples)
+    t = np.arange(frame_count, dtype=np.float32) / sample_rate
+    if fade_in > 0:
+        head = min(frame_count, int(np.ceil(fade_in * sample_rate)))
+        samples[:head] *= np.minimum(t[:head] / fade_in, 1.0)[:, None]
+    if fade_out > 0:
+        duration = frame_count / sample_rate
+        tail = max(0, frame_count - int(np.ceil(fade_out * sample_rate)))
+        samples[tail:] *= np.minimum((duration - t[tail:]) / fade_out, 1.0)[:, None]
+    return samples
+
+
+def mix_at(mix: MixedAudio, samples: np.ndarray, start_time: float) -> MixedAudio:
+    """start_time（秒）の位置に PCM を加算する（必要なら末尾を延長する）"""
+    start = int(round(start_time * mix.sample_rate))
+    end = start + len(samples)
+    if end > len(mix.samples):
+        padded = np.zeros((end, 2), dtype=np.float32)
+        padded[: len(mix.samples)] = mix.samples
+        mix.samples = padded
+    mix.samples[start:end] += samples
+    return mix
+
+
+def decode_audio_file(path: str, sample_rate: int) -> Optional[np.ndarray]:
+    """ffmpeg で音声ファイルをステレオ float32 PCM にデコード（1ファイル1プロセス）"""
+    from moviepy.config import FFMPEG_BINARY
+
+    cmd = [
+        FFMPEG_BINARY, "-v", "error",
+        "-i", path,
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ac", "2", "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=120)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.error(f"Audio decode failed ({path}): {e}")
+        return None
+    if result.returncode != 0 or not result.stdout:
+        logger.error(
+            f"Audio decode failed ({path}): {result.stderr.decode(errors='replace')[:200]}"
+        )
+        return None
+    return np.frombuffer(result.stdout, dtype="<f4").reshape(-1, 2)
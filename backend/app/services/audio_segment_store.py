@@ -0,0 +1,188 @@
+"""ジョブ内で共有するデコード済み音声
+
+セリフごとの WAV は口パク解析・音声の結合・タイミング検証でそれぞれ
+読み込まれていた。このストアは1行につき1回だけデコードし、PCM（元の
+サンプルレートの float32）と音声長を以降の処理で共有する。
+
+メモリ上の合計が上限を超えた場合は最終アクセスが古い行から .npy として
+作業ディレクトリへ退避し、次回アクセス時は mmap で読み込む（再デコードしない）。
+"""
+
+import logging
+import os
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# PCM のサンプル幅（バイト）ごとの dtype と正規化係数
+_PCM_FORMATS = {
+    1: (np.uint8, 128.0),
+    2: (np.dtype("<i2"), 32768.0),
+    4: (np.dtype("<i4"), 2147483648.0),
+}
+
+
+@dataclass
+class AudioSegment:
+    """1行分のデコード済み音声"""
+
+    path: str
+    sample_rate: int
+    channels: int
+    frame_count: int
+    # (frame_count, channels) の float32。退避中は None
+    samples: Optional[np.ndarray] = None
+    spill_path: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.frame_count * self.channels * 4
+
+
+class AudioSegmentStore:
+    """音声パスごとのデコード済み PCM を保持するスレッドセーフなストア"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._segments: Dict[str, AudioSegment] = {}
+        # メモリ上にある行（最終アクセス順）
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._decode_locks: Dict[str, threading.Lock] = {}
+
+        self.decodes = 0
+        self.spills = 0
+
+    def get(self, path: str) -> AudioSegment:
+        """音声を取得する（未デコードならここでデコード）"""
+        with self._lock:
+            segment = self._segments.get(path)
+            if segment is None:
+                decode_lock = self._decode_locks.setdefault(path, threading.Lock())
+        if segment is not None:
+            return segment
+
+        # 同じ行を複数スレッドが同時にデコードしないようにする
+        with decode_lock:
+            with self._lock:
+                segment = self._segments.get(path)
+            if segment is None:
+                segment = self._decode(path)
+                with self._lock:
+                    self._segments[path] = segment
+                    self.decodes += 1
+                    self._track(segment)
+        return segment
+
+    def duration(self, path: str) -> float:
+        return self.get(path).duration
+
+    def samples(self, path: str) -> np.ndarray:
+        """(frame_count, channels) の float32 PCM を取得"""
+        segment = self.get(path)
+        with self._lock:
+            samples = segment.samples
+            if samples is not None:
+                self._resident.move_to_end(path)
+                return samples
+            spill_path = segment.spill_path
+        # 退避済みの行は読み取り専用の mmap で返す
+        return np.load(spill_path, mmap_mode="r")
+
+    def mono(self, path: str) -> np.ndarray:
+        """チャンネルを平均したモノラル PCM を取得"""
+        samples = self.samples(path)
+        if samples.shape[1] == 1:
+            return samples[:, 0]
+        return samples.mean(axis=1, dtype=np.float32)
+
+    def clear(self) -> None:
+        with self._lock:
+            for segment in self._segments.values():
+                if segment.spill_path and os.path.exists(segment.spill_path):
+                    try:
+                        os.remove(segment.spill_path)
+                    except OSError:
+                        pass
+            self._segments.clear()
+            self._resident.clear()
+            self._decode_locks.clear()
+            self._resident_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "segments": len(self._segments),
+                "decodes": self.decodes,
+                "resident_bytes": self._resident_bytes,
+                "spills": self.spills,
+            }
+
+    def _decode(self, path: str) -> AudioSegment:
+        try:
+            with wave.open(path, "rb") as wav:
+                sample_rate = wav.getframerate()
+                channels = wav.getnchannels()
+                width = wav.getsampwidth()
+                raw = wav.readframes(wav.getnframes())
+            if width not in _PCM_FORMATS:
+                raise wave.Error(f"unsupported sample width: {width}")
+            dtype, scale = _PCM_FORMATS[width]
+            samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+            if width == 1:
+                samples -= 128.0
+            samples /= scale
+        except wave.Error:
+            # PCM以外（float WAV など）は librosa で元のサンプルレートのまま読み込む
+            import librosa
+
+            data, sample_rate = librosa.load(path, sr=None, mono=False)
+            data = np.atleast_2d(data)
+            channels = data.shape[0]
+            samples = np.ascontiguousarray(data.T, dtype=np.float32).reshape(-1)
+
+        samples = samples.reshape(-1, channels)
+        return AudioSegment(
+            path=path,
+            sample_rate=sample_rate,
+            channels=channels,
+            frame_count=len(samples),
+            samples=samples,
+        )
+
+    def _track(self, segment: AudioSegment) -> None:
+        """メモリ上の行として登録し、上限を超えたら古い行を退避する（ロック内で呼ぶ）"""
+        self._resident[segment.path] = segment.nbytes
+        self._resident_bytes += segment.nbytes
+        if not self.spill_dir:
+            return
+        while self._resident_bytes > self.max_bytes and len(self._resident) > 1:
+            path, nbytes = self._resident.popitem(last=False)
+            victim = self._segments[path]
+            spill_path = os.path.join(
+                self.spill_dir, f"pcm_{abs(hash(path)):x}_{victim.frame_count}.npy"
+            )
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                np.save(spill_path, victim.samples)
+            except OSError as e:
+                logger.warning(f"Audio store spill failed, keeping in memory: {e}")
+                self._resident[path] = nbytes
+                self._resident.move_to_end(path, last=False)
+                return
+            victim.spill_path = spill_path
+            victim.samples = None
+            self._resident_bytes -= nbytes
+            self.spills += 1
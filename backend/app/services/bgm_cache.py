@@ -0,0 +1,183 @@
+"""デコード済みBGMのプロセス間共有キャッシュ
+
+BGM_LIBRARY の曲はどの動画でも同じファイルだが、これまでは動画ごとに
+デコードし直していた。ここではデコード・リサンプリング済みのステレオ
+float32 PCM を (ファイルパス, mtime, サイズ, サンプルレート) をキーに
+temp/bgm_cache へ .npy として保存し、各プロセスは読み取り専用の mmap で
+読み込む。ページキャッシュを共有するため、同じホストのワーカーが何プロセス
+あってもBGMのPCMはメモリ上に1つだけになる。
+
+ファイルが差し替えられた（mtime・サイズが変わった）場合はキーが変わるため
+デコードし直し、古い .npy は削除する。
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config.app import BGM_CACHE_CONFIG, Paths
+from app.services import audio_mixer
+
+logger = logging.getLogger(__name__)
+
+
+class BGMPCMCache:
+    """BGMファイルごとのデコード済み PCM を保持するスレッドセーフなキャッシュ"""
+
+    def __init__(self, directory: Optional[str] = None):
+        # None の場合はプロセス内のメモリだけに保持する
+        self.directory = directory
+        self._entries: Dict[Tuple[str, int, int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+        # ファイルごとのデコードの排他（別のファイルは並行してデコードする）
+        self._decode_locks: Dict[Tuple[str, int, int, int], threading.Lock] = {}
+
+        self.hits = 0
+        self.disk_loads = 0
+        self.decodes = 0
+
+    def get(self, path: str, sample_rate: int) -> Optional[np.ndarray]:
+        """(サンプル数, 2) の読み取り専用 float32 PCM を取得（未デコードならここでデコード）"""
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.error(f"BGMファイルの読み込みエラー ({path}): {e}")
+            return None
+        key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size, sample_rate)
+
+        with self._lock:
+            samples = self._entries.get(key)
+            if samples is not None:
+                self.hits += 1
+                return samples
+            decode_lock = self._decode_locks.setdefault(key, threading.Lock())
+
+        with decode_lock:
+            with self._lock:
+                samples = self._entries.get(key)
+            if samples is None:
+                samples = self._load(path, key)
+                if samples is None:
+                    return None
+                with self._lock:
+                    self._entries[key] = samples
+        return samples
+
+    def preload(self, sample_rate: int) -> int:
+        """BGM_LIBRARY の全曲を読み込み、読み込めた曲数を返す"""
+        from app.config.resource_config.bgm_library import BGM_LIBRARY, get_bgm_file_path
+
+        loaded = 0
+        for bgm_id in BGM_LIBRARY:
+            if bgm_id == "none":
+                continue
+            path = get_bgm_file_path(bgm_id)
+            if path and os.path.exists(path) and self.get(path, sample_rate) is not None:
+                loaded += 1
+        return loaded
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_loads": self.disk_loads,
+                "decodes": self.decodes,
+            }
+
+    def _load(self, path: str, key: Tuple[str, int, int, int]) -> Optional[np.ndarray]:
+        file_path = self._file_path(key) if self.directory else None
+        if file_path and os.path.exists(file_path):
+            try:
+                samples = np.load(file_path, mmap_mode="r")
+                with self._lock:
+                    self.disk_loads += 1
+                return samples
+            except (OSError, ValueError) as e:
+                logger.warning(f"BGM cache file is broken, decoding again ({file_path}): {e}")
+
+        samples = audio_mixer.decode_audio_file(path, key[3])
+        if samples is None or len(samples) == 0:
+            logger.error(f"BGMファイルの読み込みエラー: {path}")
+            return None
+        with self._lock:
+            self.decodes += 1
+        if file_path is None:
+            return samples
+
+        try:
+            self._save(file_path, samples)
+            self._remove_stale(key, file_path)
+            return np.load(file_path, mmap_mode="r")
+        except OSError as e:
+            logger.warning(f"BGM cache write failed, keeping in memory: {e}")
+            return samples
+
+    def _file_path(self, key: Tuple[str, int, int, int]) -> str:
+        real_path, mtime_ns, size, sample_rate = key
+        path_hash = hashlib.sha1(real_path.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(
+            self.directory, f"{path_hash}_{mtime_ns:x}_{size:x}_{sample_rate}.npy"
+        )
+
+    def _save(self, file_path: str, samples: np.ndarray) -> None:
+        """一時ファイルに書き出してから置き換える（読み込み中の他プロセスに途中の内容を見せない）"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, samples)
+            os.replace(tmp_path, file_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _remove_stale(self, key: Tuple[str, int, int, int], file_path: str) -> None:
+        """同じファイル・サンプルレートの古いバージョンの .npy を削除"""
+        prefix = os.path.basename(file_path).split("_", 1)[0] + "_"
+        suffix = f"_{key[3]}.npy"
+        for name in os.listdir(self.directory):
+            if (
+                name.startswith(prefix)
+                and name.endswith(suffix)
+                and name != os.path.basename(file_path)
+            ):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+_bgm_cache: Optional[BGMPCMCache] = None
+_bgm_cache_lock = threading.Lock()
+_bgm_cache_pid: Optional[int] = None
+
+
+def get_bgm_pcm_cache() -> BGMPCMCache:
+    """設定に従ってプロセス内で共有するキャッシュを取得"""
+    global _bgm_cache, _bgm_cache_pid
+    with _bgm_cache_lock:
+        if _bgm_cache is None or _bgm_cache_pid != os.getpid():
+            directory = (
+                Paths.get_bgm_cache_dir() if BGM_CACHE_CONFIG.backend == "disk" else None
+            )
+            _bgm_cache = BGMPCMCache(directory)
+            _bgm_cache_pid = os.getpid()
+        return _bgm_cache
+
+
+def preload_bgm_cache(sample_rate: int) -> None:
+    """全BGMをキャッシュに読み込む（ワーカープロセスの起動時にスレッドで実行）"""
+    try:
+        loaded = get_bgm_pcm_cache().preload(sample_rate)
+        logger.info(f"BGM cache preloaded: {loaded} tracks ({get_bgm_pcm_cache().stats()})")
+    except Exception as e:
+        logger.warning(f"BGM cache preload failed: {e}")
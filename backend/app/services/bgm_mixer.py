@@ -8,13 +8,17 @@ import logging
 import threading
 import time
 import gc
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+import numpy as np
 from moviepy.audio.AudioClip import CompositeAudioClip, concatenate_audioclips, AudioClip
 from moviepy.audio.io.AudioFileClip import AudioFileClip
 from moviepy.audio.fx import AudioFadeIn, AudioFadeOut
 
 from app.config.resource_config.bgm_library import get_bgm_file_path, get_bgm_track
 from app.models.scripts.common import VideoSection
+from app.services import audio_mixer
+from app.services.audio_mixer import MixedAudio
+from app.services.bgm_cache import get_bgm_pcm_cache
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +80,66 @@ class BGMMixer:
 
             return None
 
+    def _load_bgm_pcm(self, bgm_file_path: str, sample_rate: int) -> Optional[np.ndarray]:
+        """BGMファイルをステレオ float32 PCM として読み込む
+
+        デコード済みのPCMはプロセス間で共有するキャッシュから取得するため、
+        同じ曲を動画ごとにデコードし直さない（clear_cache でも破棄しない）。
+        """
+        return get_bgm_pcm_cache().get(bgm_file_path, sample_rate)
+
+    def _resolve_bgm_file(self, section: VideoSection) -> Optional[str]:
+        """セクションのBGMファイルのパスを取得（BGMなし・ファイルなしは None）"""
+        if section.bgm_id == "none" or not section.bgm_id:
+            return None
+
+        bgm_file_path = get_bgm_file_path(section.bgm_id)
+        if not bgm_file_path or not os.path.exists(bgm_file_path):
+            logger.warning(
+                f"BGMファイルが見つかりません: {section.bgm_id} "
+                f"(path: {bgm_file_path})"
+            )
+            return None
+        return bgm_file_path
+
+    def create_section_bgm_pcm(
+        self,
+        section: VideoSection,
+        start_time: float,
+        duration: float,
+        sample_rate: int,
+    ) -> Optional[np.ndarray]:
+        """セクション用のBGMを PCM で作成（ループ・音量・フェードを配列演算で適用）
+
+        Returns:
+            (サンプル数, 2) の float32 配列、BGMがない場合はNone
+        """
+        bgm_file_path = self._resolve_bgm_file(section)
+        if bgm_file_path is None:
+            return None
+
+        base_pcm = self._load_bgm_pcm(bgm_file_path, sample_rate)
+        if base_pcm is None:
+            return None
+
+        # BGMをループさせて必要な長さに調整し、音量を調整
+        frame_count = int(round(duration * sample_rate))
+        track = audio_mixer.loop_to_length(base_pcm, frame_count) * np.float32(
+            section.bgm_volume
+        )
+
+        # フェードイン・フェードアウト（0.5秒）
+        fade_duration = min(0.5, duration / 4)  # 最大0.5秒、短いセクションは1/4
+        audio_mixer.apply_fades(track, sample_rate, fade_duration, fade_duration)
+
+        bgm_track = get_bgm_track(section.bgm_id)
+        logger.info(
+            f"BGM作成: {bgm_track.name if bgm_track else section.bgm_id} "
+            f"(start: {start_time:.2f}s, duration: {duration:.2f}s, "
+            f"volume: {section.bgm_volume})"
+        )
+        return track
+
     def create_section_bgm_track(
         self,
         section: VideoSection,
@@ -92,15 +156,8 @@ class BGMMixer:
         Returns:
             AudioClip: BGM音声クリップ、BGMがない場合はNone
         """
-        if section.bgm_id == "none" or not section.bgm_id:
-            return None
-
-        bgm_file_path = get_bgm_file_path(section.bgm_id)
-        if not bgm_file_path or not os.path.exists(bgm_file_path):
-            logger.warning(
-                f"BGMファイルが見つかりません: {section.bgm_id} "
-                f"(path: {bgm_file_path})"
-            )
+        bgm_file_path = self._resolve_bgm_file(section)
+        if bgm_file_path is None:
             return None
 
         try:
@@ -164,23 +221,110 @@ class BGMMixer:
     ):
         """ボイスオーバーとBGMを合成
 
+        voiceover_audio が MixedAudio の場合は NumPy でミックスし、そのバッファに
+        BGMを加算した MixedAudio を返す。moviepy のクリップの場合は
+        CompositeAudioClip を返す。
+
         Args:
             voiceover_audio: ボイスオーバー音声
             sections: ビデオセクションのリスト
             section_durations: 各セクションの長さ（秒）のリスト
 
         Returns:
-            CompositeAudioClip: 合成された音声
+            合成された音声
+        """
+        placements = self._place_sections(
+            voiceover_audio.duration, sections, section_durations
+        )
+        if not placements:
+            return voiceover_audio
+
+        if isinstance(voiceover_audio, MixedAudio):
+            return self._mix_pcm(voiceover_audio, sections, placements)
+
+        # 事前にすべての必要なBGMファイルを読み込む（デッドロック回避）
+        unique_bgm_ids = set()
+        for section in sections:
+            if section.bgm_id and section.bgm_id != "none":
+                bgm_file_path = get_bgm_file_path(section.bgm_id)
+                if bgm_file_path and os.path.exists(bgm_file_path):
+                    unique_bgm_ids.add(bgm_file_path)
+
+        # すべてのBGMファイルを順次読み込み
+        success_count = 0
+        for idx, bgm_path in enumerate(unique_bgm_ids, 1):
+            result = self._load_bgm_file(bgm_path)
+            if result:
+                success_count += 1
+            # ファイル間で少し待機（ffmpegプロセスのクリーンアップ時間を確保）
+            if idx < len(unique_bgm_ids):
+                time.sleep(0.2)
+
+        bgm_clips = []
+        for section, start_time, duration in placements:
+            bgm_clip = self.create_section_bgm_track(
+                section,
+                start_time=start_time,
+                duration=duration
+            )
+            if bgm_clip:
+                bgm_clips.append(bgm_clip)
+
+        if not bgm_clips:
+            return voiceover_audio
+
+        # ボイスオーバーとBGMを合成
+        composite_audio = CompositeAudioClip([voiceover_audio] + bgm_clips)
+        
+        logger.info(
+            f"BGM合成完了: セクション数={len(sections)}, "
+            f"BGMクリップ数={len(bgm_clips)}, "
+            f"最終音声長={composite_audio.duration:.3f}s"
+        )
+
+        return composite_audio
+
+    def _mix_pcm(
+        self,
+        voiceover_audio: MixedAudio,
+        sections: List[VideoSection],
+        placements: List[Tuple[VideoSection, float, float]],
+    ) -> MixedAudio:
+        """セクションごとのBGMをボイスオーバーのバッファに加算する"""
+        bgm_count = 0
+        for section, start_time, duration in placements:
+            track = self.create_section_bgm_pcm(
+                section, start_time, duration, voiceover_audio.sample_rate
+            )
+            if track is not None:
+                audio_mixer.mix_at(voiceover_audio, track, start_time)
+                bgm_count += 1
+
+        logger.info(
+            f"BGM合成完了: セクション数={len(sections)}, "
+            f"BGMクリップ数={bgm_count}, "
+            f"最終音声長={voiceover_audio.duration:.3f}s"
+        )
+        return voiceover_audio
+
+    def _place_sections(
+        self,
+        actual_audio_duration: float,
+        sections: List[VideoSection],
+        section_durations: List[float],
+    ) -> List[Tuple[VideoSection, float, float]]:
+        """各セクションのBGMの (セクション, 開始時刻, 長さ) を求める
+
+        セクションの長さの合計が実際の音声長と異なる場合は比例的に調整し、
+        最後のセクションは音声の終わりに合わせる。
         """
         if len(sections) != len(section_durations):
             logger.error(
                 f"セクション数とduration数が一致しません: "
                 f"sections={len(sections)}, durations={len(section_durations)}"
             )
-            return voiceover_audio
+            return []
 
-        # 実際の音声の長さを取得
-        actual_audio_duration = voiceover_audio.duration
         calculated_total_duration = sum(section_durations)
         
         # 計算された合計と実際の音声の長さを比較
@@ -201,27 +345,9 @@ class BGMMixer:
                 )
             else:
                 logger.error("計算された合計durationが0です。BGMを追加しません。")
-                return voiceover_audio
-
-        # 事前にすべての必要なBGMファイルを読み込む（デッドロック回避）
-        unique_bgm_ids = set()
-        for section in sections:
-            if section.bgm_id and section.bgm_id != "none":
-                bgm_file_path = get_bgm_file_path(section.bgm_id)
-                if bgm_file_path and os.path.exists(bgm_file_path):
-                    unique_bgm_ids.add(bgm_file_path)
+                return []
 
-        # すべてのBGMファイルを順次読み込み
-        success_count = 0
-        for idx, bgm_path in enumerate(unique_bgm_ids, 1):
-            result = self._load_bgm_file(bgm_path)
-            if result:
-                success_count += 1
-            # ファイル間で少し待機（ffmpegプロセスのクリーンアップ時間を確保）
-            if idx < len(unique_bgm_ids):
-                time.sleep(0.2)
-
-        bgm_clips = []
+        placements = []
         current_time = 0.0
 
         for i, (section, duration) in enumerate(zip(sections, section_durations)):
@@ -239,14 +365,7 @@ class BGMMixer:
                     )
                     break
 
-            bgm_clip = self.create_section_bgm_track(
-                section,
-                start_time=current_time,
-                duration=duration
-            )
-
-            if bgm_clip:
-                bgm_clips.append(bgm_clip)
+            placements.append((section, current_time, duration))
 
             current_time += duration
             logger.debug(
@@ -256,19 +375,7 @@ class BGMMixer:
                 f"次の開始={current_time:.3f}s"
             )
 
-        if not bgm_clips:
-            return voiceover_audio
-
-        # ボイスオーバーとBGMを合成
-        composite_audio = CompositeAudioClip([voiceover_audio] + bgm_clips)
-        
-        logger.info(
-            f"BGM合成完了: セクション数={len(sections)}, "
-            f"BGMクリップ数={len(bgm_clips)}, "
-            f"最終音声長={composite_audio.duration:.3f}s"
-        )
-
-        return composite_audio
+        return placements
 
     def cleanup_bgm_clips(self, bgm_clips: List[AudioFileClip]):
         """BGMクリップのクリーンアップ
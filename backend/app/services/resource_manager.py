@@ -1,5 +1,6 @@
 import logging
 import os
+import random
 import cv2
 from typing import Dict, List, Optional
 
@@ -10,64 +11,100 @@ from app.config.resource_config.backgrounds import (
 
 logger = logging.getLogger(__name__)
 
+# 教育アイテム画像のディレクトリ
+ITEM_IMAGES_DIR = "assets/items"
+
+
+def referenced_background_names(
+    conversations: List[Dict], selected_bg_name: Optional[str] = None
+) -> List[str]:
+    """会話リストと台本・テーマから使用する背景名を列挙する（"default" は除く）"""
+    names = [conv.get("background", "default") for conv in conversations]
+    if selected_bg_name:
+        names.append(selected_bg_name)
+    return [name for name in dict.fromkeys(names) if name and name != "default"]
+
 
 class ResourceManager:
     """リソース管理クラス"""
 
-    def __init__(self, video_processor):
+    def __init__(self, video_processor, render_context=None):
         self.video_processor = video_processor
+        # タスク間でデコード済みの素材を共有するコンテキスト（RenderContext）
+        self.render_context = render_context
 
     def load_character_images(self) -> Dict:
         """キャラクター画像の読み込み"""
-        character_images = self.video_processor.load_all_character_images()
+        if self.render_context is not None:
+            character_images = self.render_context.character_images()
+        else:
+            character_images = self.video_processor.load_all_character_images()
         if not character_images:
             logger.error("No character images loaded")
             return None
         return character_images
 
     def load_backgrounds(
-        self, theme: Optional[str] = None, script_data: Optional[Dict] = None
+        self,
+        theme: Optional[str] = None,
+        script_data: Optional[Dict] = None,
+        conversations: Optional[List[Dict]] = None,
     ) -> Dict:
         """背景画像の読み込み（台本データまたはテーマに基づいてデフォルト背景を設定）
 
         Args:
             theme: スクリプトのテーマ（背景選択に使用、後方互換性）
             script_data: 台本データ（背景選択に使用、優先）
+            conversations: 会話リスト。指定した場合はセリフの "background" と
+                台本・テーマの背景だけを読み込む（未指定の場合はすべて）
 
         Returns:
             背景画像の辞書。script_dataまたはthemeが指定された場合、
             適切な背景が"default"にマップされる
         """
-        backgrounds = self.video_processor.load_backgrounds()
-        if not backgrounds:
-            logger.error("No background images loaded")
-            return None
-
         # script_dataが指定されている場合、台本から背景名を取得（優先）
+        selected_bg_name = None
         if script_data:
             selected_bg_name = script_to_background_name(script_data)
             logger.info(f"Looking for background: '{selected_bg_name}'")
-            if selected_bg_name in backgrounds:
-                backgrounds["default"] = backgrounds[selected_bg_name]
-                logger.info(
-                    f"Script-based background selected: '{selected_bg_name}'"
-                )
-            else:
-                logger.warning(
-                    f"Background '{selected_bg_name}' not found, using existing default"
-                )
         # テーマのみが指定されている場合（後方互換性）
         elif theme:
             selected_bg_name = theme_to_background_name(theme)
-            if selected_bg_name in backgrounds:
-                backgrounds["default"] = backgrounds[selected_bg_name]
+
+        names = None
+        if conversations is not None:
+            names = referenced_background_names(conversations, selected_bg_name)
+
+        if self.render_context is not None:
+            # 共有の辞書は変更せず、"default" の差し替えはコピーに対して行う
+            backgrounds = dict(self.render_context.backgrounds(names) or {})
+        else:
+            backgrounds = self.video_processor.load_backgrounds(names)
+        if not backgrounds:
+            logger.error("No background images loaded")
+            return None
+
+        if selected_bg_name is None:
+            return backgrounds
+
+        if selected_bg_name in backgrounds:
+            backgrounds["default"] = backgrounds[selected_bg_name]
+            if script_data:
                 logger.info(
-                    f"Theme-based background selected: '{selected_bg_name}' for theme '{theme}'"
+                    f"Script-based background selected: '{selected_bg_name}'"
                 )
             else:
-                logger.warning(
-                    f"Background '{selected_bg_name}' not found for theme '{theme}', using existing default"
+                logger.info(
+                    f"Theme-based background selected: '{selected_bg_name}' for theme '{theme}'"
                 )
+        elif script_data:
+            logger.warning(
+                f"Background '{selected_bg_name}' not found, using existing default"
+            )
+        else:
+            logger.warning(
+                f"Background '{selected_bg_name}' not found for theme '{theme}', using existing default"
+            )
 
         return backgrounds
 
@@ -81,6 +118,26 @@ class ResourceManager:
             blink_timings.extend(char_blink_timings)
         return blink_timings
 
+    def generate_segment_blink_timings(self, segments: List) -> List:
+        """音声セグメントごとの瞬きタイミングの生成
+
+        セグメントの番号とキャラクター名から決まる乱数で各セグメント内の瞬きを
+        生成する。動画全体の長さに依存しないため、先頭のセグメントだけで
+        生成した結果は全セグメントで生成した結果の先頭と一致する
+        （音声合成と並行した描画で使用する）。
+        """
+        blink_timings = []
+        for index, segment in enumerate(segments):
+            for char_name in self.video_processor.characters.keys():
+                rng = random.Random(f"{index}:{char_name}")
+                for timing in self.video_processor.generate_blink_timings(
+                    segment.duration, char_name, rng=rng
+                ):
+                    timing["start"] += segment.start_time
+                    timing["end"] += segment.start_time
+                    blink_timings.append(timing)
+        return blink_timings
+
     def validate_resources(self, character_images: Dict, backgrounds: Dict) -> bool:
         """リソースの検証"""
         return character_images is not None and backgrounds is not None
@@ -94,8 +151,14 @@ class ResourceManager:
         Returns:
             Dict[str, np.ndarray]: アイテムID -> 画像データの辞書
         """
+        if self.render_context is not None:
+            return self.render_context.item_images()
+        return self.read_item_images()
+
+    def read_item_images(self) -> Dict:
+        """assets/items/ 配下のPNG画像をファイルから読み込む"""
         items = {}
-        item_base_dir = "assets/items"
+        item_base_dir = ITEM_IMAGES_DIR
 
         if not os.path.exists(item_base_dir):
             logger.warning(f"Item directory not found: {item_base_dir}")
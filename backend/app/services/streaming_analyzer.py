@@ -0,0 +1,121 @@
+"""音声合成と並行して口パク解析を行うストリーミング解析
+
+音声合成が1行終わるごとに WAV を有界キューに入れ、解析スレッドが届いた順に
+音声長と RMS 強度列を計算する。全行の合成が終わった時点でほとんどの解析が
+済んでいるため、動画生成の解析ステージの待ち時間が短くなる。
+
+キューが一杯の場合は submit() が待機するため、解析が追いつかないときは
+合成側が減速する（メモリ使用量は queue_size 行分までに抑えられる）。
+
+on_result を指定すると、1行の解析が終わるごとに解析スレッドから
+(行番号, 音声パス, 強度列, 音声長) で呼び出す（音声合成と並行した描画に使用）。
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# キューの終端
+_STOP = object()
+
+
+class StreamingAudioAnalyzer:
+    """合成済みの音声を届いた順に解析するスレッドプール"""
+
+    def __init__(
+        self,
+        audio_processor,
+        workers: int = 2,
+        queue_size: int = 16,
+        on_result: Optional[Callable[[int, str, List[float], float], None]] = None,
+    ):
+        self.audio_processor = audio_processor
+        self.workers = max(1, workers)
+        self.on_result = on_result
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._results: Dict[str, Tuple[List[float], float]] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+        self._started_at: Optional[float] = None
+        self._first_result_at: Optional[float] = None
+        self._submitted = 0
+        self._max_depth = 0
+
+    def start(self) -> "StreamingAudioAnalyzer":
+        self._started_at = time.perf_counter()
+        for n in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"audio-analysis-{n}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, index: int, audio_path: str) -> None:
+        """合成済みの音声を解析キューに追加する（キューが一杯なら待機）"""
+        if self._closed:
+            return
+        self._queue.put((index, audio_path))
+        with self._lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    def finish(self) -> Dict[str, Tuple[List[float], float]]:
+        """残りの解析を待ち、音声パスごとの (強度列, 音声長) を返す"""
+        self.close()
+        for thread in self._threads:
+            thread.join()
+        with self._lock:
+            return dict(self._results)
+
+    def close(self) -> None:
+        """新しい音声の受け付けを終了する（キュー内の音声は解析する）"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(_STOP)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            index, audio_path = item
+            try:
+                intensities, duration = (
+                    self.audio_processor.analyze_audio_for_mouth_sync(audio_path)
+                )
+            except Exception as e:
+                logger.warning(f"Streaming analysis failed for line {index}: {e}")
+                continue
+            if not intensities or duration <= 0:
+                continue
+            with self._lock:
+                self._results[audio_path] = (intensities, duration)
+                if self._first_result_at is None:
+                    self._first_result_at = time.perf_counter()
+            if self.on_result is not None:
+                try:
+                    self.on_result(index, audio_path, intensities, duration)
+                except Exception as e:
+                    logger.warning(f"Streaming analysis callback failed for line {index}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "submitted": self._submitted,
+                "analyzed": len(self._results),
+                "max_queue_depth": self._max_depth,
+                "first_result_seconds": round(
+                    self._first_result_at - self._started_at, 3
+                )
+                if self._first_result_at is not None
+                else None,
+            }
@@ -0,0 +1,44 @@
+"""並列レンダリングのチャンクを描画するプロセスのエントリーポイント
+
+ParallelFrameRenderer が `python -m app.services.video.chunk_worker` として
+ワーカー数だけ起動する。Celery の prefork ワーカーはデーモンプロセスのため
+multiprocessing の子プロセス（ProcessPoolExecutor）を作れないので、
+multiprocessing を介さない独立したプロセスにしている。
+
+標準入力から「ジョブのpickleのパス<TAB>結果のpickleのパス」を1行ずつ受け取り、
+チャンクを描画して結果を書き出したら結果のパスを1行返す（標準入力が閉じられるまで
+繰り返すため、素材の読み込みやモジュールのインポートはプロセスごとに1回で済む）。
+"""
+
+import logging
+import os
+import pickle
+import sys
+
+
+def main() -> int:
+    # 応答用に標準出力を確保し、描画中の出力は標準エラーへ流す
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    from app.services.video.parallel_renderer import _render_chunk
+
+    for line in sys.stdin:
+        job_path, result_path = line.rstrip("\n").split("\t")
+        with open(job_path, "rb") as f:
+            job = pickle.load(f)
+
+        result = _render_chunk(job)
+
+        tmp_path = result_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f)
+        os.replace(tmp_path, result_path)
+        replies.write(result_path + "\n")
+        replies.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
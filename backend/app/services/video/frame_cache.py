@@ -0,0 +1,82 @@
+"""合成済みフレームのキャッシュ
+
+fps=10・口の状態3種類という条件では、背景・表情・口/瞬き・字幕・アイテムが
+すべて同じフレームが繰り返し現れる。レンダープランの見た目キーごとに
+字幕まで描画済みのフレームを保持し、一致したフレームは合成を省略して
+キャッシュ済みのバッファをそのままエンコーダへ渡す。
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCache:
+    """メモリ使用量の上限つき LRU フレームキャッシュ
+
+    キャッシュしたフレームはエンコーダに渡すだけで書き換えないこと。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[np.ndarray]:
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self._frames.move_to_end(key)
+        self.hits += 1
+        return frame
+
+    def put(self, key: Hashable, frame: np.ndarray) -> None:
+        if frame.nbytes > self.max_bytes or key in self._frames:
+            return
+
+        self._frames[key] = frame
+        self._bytes += frame.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._frames.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """キャッシュの統計情報を取得"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._frames),
+            "bytes": self._bytes,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def merge_stats(stats_list: Iterable[Dict[str, float]]) -> Dict[str, float]:
+        """複数のキャッシュ（並列描画の各ワーカー）の統計を合算"""
+        merged = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0}
+        for stats in stats_list:
+            for key in merged:
+                merged[key] += stats.get(key, 0)
+
+        lookups = merged["hits"] + merged["misses"]
+        merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+        return merged
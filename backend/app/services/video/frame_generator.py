@@ -1,8 +1,11 @@
-import cv2
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from app.config import RENDER_CONFIG
 from app.models.video_models import AudioSegmentInfo, SubtitleData
+from .frame_cache import FrameCache
 from .frame_info_builder import FrameInfoBuilder
+from .render_plan import RenderPlan, RenderPlanCompiler
+from .video_encoder import OpenCVVideoEncoder
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +17,42 @@ class FrameGenerator:
         self.video_processor = video_processor
         self.fps = fps
         self.frame_info_builder = FrameInfoBuilder(video_processor, fps)
+        self.plan_compiler = RenderPlanCompiler(
+            video_processor, self.frame_info_builder, fps
+        )
+        # 直近の generate_video_frames の統計（フレームキャッシュのヒット率など）
+        self.last_render_stats: Dict = {}
+
+    def compile_plan(
+        self,
+        total_frames: int,
+        conversations: List[Dict],
+        audio_file_list: List[str],
+        segment_audio_intensities: List[AudioSegmentInfo],
+        backgrounds: Dict,
+        character_images: Dict,
+        blink_timings: List,
+        subtitle_lines: List[SubtitleData],
+        sections: List = None,
+        start_frame: int = 0,
+        **_,
+    ) -> RenderPlan:
+        """フレーム生成引数からレンダープランを作成
+
+        start_frame を指定すると start_frame〜total_frames の区間だけを作成する。
+        """
+        return self.plan_compiler.compile(
+            total_frames,
+            conversations,
+            audio_file_list,
+            segment_audio_intensities,
+            backgrounds,
+            character_images,
+            blink_timings,
+            subtitle_lines,
+            sections,
+            start_frame=start_frame,
+        )
 
     def generate_video_frames(
         self,
@@ -30,113 +69,159 @@ class FrameGenerator:
         item_images: Dict = None,
         sections: List = None,
         progress_callback=None,
+        encoder=None,
+        frame_range: Optional[Tuple[int, int]] = None,
+        plan: Optional[RenderPlan] = None,
+        validate_timing: bool = True,
+        audio_durations: Optional[Dict[str, float]] = None,
     ) -> bool:
-        """動画フレームの生成"""
+        """動画フレームの生成
+
+        Args:
+            encoder: フレームの書き出し先（open/write/repeat_last/close/abort を持つ）。
+                     None の場合は temp_video_path へ cv2.VideoWriter で書き出す
+            frame_range: 描画するフレーム範囲 (start, end)。None の場合は全フレーム
+            plan: 事前にコンパイルしたレンダープラン。None の場合はここで作成
+            validate_timing: 音声ファイルとのタイミング整合性を検証するか
+            audio_durations: 音声パスごとの長さ（検証時に音声ファイルを読み直さない）
+        """
         # タイミング整合性の検証
-        if not self.frame_info_builder.validate_timing_consistency(
-            segment_audio_intensities, audio_file_list
+        if validate_timing and not self.frame_info_builder.validate_timing_consistency(
+            segment_audio_intensities, audio_file_list, audio_durations
         ):
             logger.warning("Timing inconsistency detected, but continuing...")
 
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        out = cv2.VideoWriter(
-            temp_video_path, fourcc, self.fps, self.video_processor.resolution
+        out = encoder or OpenCVVideoEncoder(
+            temp_video_path, self.fps, self.video_processor.resolution
         )
 
-        if not out.isOpened():
-            logger.error("Failed to open video writer")
+        if not out.open():
             return False
 
         try:
-            # 現在表示中のアイテムを追跡
-            current_item = None
-            current_section_key = None
-
-            # アイテム表示が許可されるセクションキー
-            ITEM_ALLOWED_SECTIONS = {"background", "learning"}
-
-            # セクションごとのセグメント範囲を事前計算
-            section_segment_ranges = []
-            if sections:
-                segment_index = 0
-                for section in sections:
-                    segment_count = len(section.segments)
-                    section_segment_ranges.append({
-                        "key": getattr(section, "section_key", None),
-                        "start": segment_index,
-                        "end": segment_index + segment_count
-                    })
-                    segment_index += segment_count
-
-            for frame_idx in range(total_frames):
-                if progress_callback:
-                    progress_callback((frame_idx + 1) / total_frames)
-
-                current_time = frame_idx / self.fps
-
-                # 現在のフレーム情報を取得
-                active_speakers, current_background = (
-                    self.frame_info_builder.get_frame_info(
-                        current_time,
-                        conversations,
-                        audio_file_list,
-                        segment_audio_intensities,
-                        backgrounds,
-                    )
-                )
-
-                # 現在のセグメントを特定してアイテムを更新
-                for i, conv in enumerate(conversations):
-                    if i < len(segment_audio_intensities):
-                        segment = segment_audio_intensities[i]
-                        segment_start = segment.start_time
-                        segment_end = segment_start + segment.duration
-
-                        if segment_start <= current_time < segment_end:
-                            # 現在のセグメントが属するセクションを判定
-                            new_section_key = None
-                            for section_range in section_segment_ranges:
-                                if section_range["start"] <= i < section_range["end"]:
-                                    new_section_key = section_range["key"]
-                                    break
-
-                            # セクションが変わった場合
-                            if new_section_key != current_section_key:
-                                # アイテム表示が許可されていないセクションに入った場合はクリア
-                                if new_section_key not in ITEM_ALLOWED_SECTIONS:
-                                    if current_item is not None:
-                                        logger.info(
-                                            f"Item cleared: section changed to '{new_section_key}' at time={current_time:.3f}s"
-                                        )
-                                        current_item = None
-                                else:
-                                    logger.info(
-                                        f"Entered item-allowed section '{new_section_key}' at time={current_time:.3f}s"
-                                    )
-                                current_section_key = new_section_key
-
-                            break
-
-                # フレーム合成（アイテム付き）
-                frame = self.video_processor.composite_conversation_frame_with_item(
-                    current_background,
+            if plan is None:
+                plan = self.compile_plan(
+                    total_frames,
+                    conversations,
+                    audio_file_list,
+                    segment_audio_intensities,
+                    backgrounds,
                     character_images,
-                    active_speakers,
-                    conversation_mode,
-                    current_time,
                     blink_timings,
-                    current_item,
+                    subtitle_lines,
+                    sections,
                 )
-
-                # 字幕追加
-                frame = self.frame_info_builder.add_subtitle_to_frame(frame, subtitle_lines, current_time)
-
-                out.write(frame)
-
-            out.release()
+            start_frame, end_frame = frame_range or (0, total_frames)
+            self.write_frames(
+                out,
+                plan,
+                (start_frame, end_frame),
+                backgrounds,
+                character_images,
+                blink_timings,
+                subtitle_lines,
+                conversation_mode,
+                item_images,
+                progress_callback,
+            )
+
+            if not out.close():
+                return False
+
+            logger.info(
+                f"Subtitle panel cache: {self.video_processor.get_subtitle_panel_cache_stats()}"
+            )
+            logger.info(
+                f"Layer cache: {self.video_processor.get_layer_cache_stats()}"
+            )
             return True
 
         except Exception as e:
             logger.error(f"Frame generation failed: {e}")
-            out.release()
+            out.abort()
             return False
+
+    def write_frames(
+        self,
+        out,
+        plan: RenderPlan,
+        frame_range: Tuple[int, int],
+        backgrounds: Dict,
+        character_images: Dict,
+        blink_timings: List,
+        subtitle_lines: List[SubtitleData],
+        conversation_mode: str,
+        item_images: Dict = None,
+        progress_callback=None,
+    ) -> None:
+        """プランに従ってフレーム範囲を描画し、開いているエンコーダへ書き出す
+
+        エンコーダの open/close は呼び出し側で行う（音声合成と並行した描画では
+        同じエンコーダへ区間ごとに書き足す）。統計は last_render_stats に保存する。
+        """
+        item_images = item_images or {}
+
+        start_frame, end_frame = frame_range
+        range_frames = max(1, end_frame - start_frame)
+
+        # 見た目が同じフレームは合成済みバッファを再利用する
+        frame_cache = FrameCache(RENDER_CONFIG.frame_cache_mb * 1024 * 1024)
+        state_keys = plan.visual_state_keys()
+        previous_key = None
+        repeated_frames = 0
+
+        for frame_idx in range(start_frame, end_frame):
+            if progress_callback:
+                progress_callback((frame_idx - start_frame + 1) / range_frames)
+
+            state_key = state_keys[plan.row(frame_idx)].tobytes()
+
+            # 直前と同じ見た目なら前フレームを延長（VFRでは書き出し自体を省略）
+            if state_key == previous_key:
+                out.repeat_last()
+                repeated_frames += 1
+                continue
+            previous_key = state_key
+
+            if frame_cache.enabled:
+                cached_frame = frame_cache.get(state_key)
+                if cached_frame is not None:
+                    out.write(cached_frame)
+                    continue
+
+            current_time = frame_idx / self.fps
+
+            item_name = plan.item_name(frame_idx)
+            current_item = item_images.get(item_name) if item_name else None
+
+            # フレーム合成（アイテム付き）
+            frame = self.video_processor.composite_conversation_frame_with_item(
+                backgrounds[plan.background_name(frame_idx)],
+                character_images,
+                plan.active_speakers(frame_idx),
+                conversation_mode,
+                current_time,
+                blink_timings,
+                current_item,
+                blink_states=plan.blink_states(frame_idx),
+            )
+
+            # 字幕追加
+            subtitle_idx = plan.subtitle_index(frame_idx)
+            if subtitle_idx is not None:
+                frame = self.frame_info_builder.draw_subtitle(
+                    frame, subtitle_lines[subtitle_idx], current_time
+                )
+
+            if frame_cache.enabled:
+                frame_cache.put(state_key, frame)
+            out.write(frame)
+
+        self.last_render_stats = {
+            "frame_cache": frame_cache.stats(),
+            "repeated_frames": repeated_frames,
+        }
+        logger.info(
+            f"Frame cache: {self.last_render_stats['frame_cache']}, "
+            f"repeated_frames={repeated_frames}"
+        )
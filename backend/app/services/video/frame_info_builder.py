@@ -3,9 +3,10 @@
 import cv2
 import logging
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from moviepy import AudioFileClip
 from app.models.video_models import AudioSegmentInfo, SubtitleData
+from .timeline_index import TimelineIndex
 
 logger = logging.getLogger(__name__)
 
@@ -33,147 +34,210 @@ class FrameInfoBuilder:
         audio_file_list: List[str],
         segment_audio_intensities: List[AudioSegmentInfo],
         backgrounds: Dict,
+        timeline: Optional[TimelineIndex] = None,
+        frame_idx: Optional[int] = None,
     ) -> Tuple[Dict, any]:
-        """現在のフレーム情報を取得"""
+        """現在のフレーム情報を取得
+
+        timeline が指定された場合はセグメントを索引から検索し、
+        全セグメントの線形走査を省略する。
+        """
         active_speakers = {}
         current_background = backgrounds["default"]
         current_conversation = None
         intensity = 0.0  # 強度値を初期化
 
-        # 現在の話者と強度、背景、表情を特定
-        for i, (conv, audio_path) in enumerate(zip(conversations, audio_file_list)):
-            if i < len(segment_audio_intensities):
-                segment = segment_audio_intensities[i]
-                segment_start = segment.start_time
-                segment_end = segment_start + segment.duration
-
-                if segment_start <= current_time < segment_end:
-                    current_conversation = conv
-                    local_time = current_time - segment_start
-
-                    # より精密なフレーム番号計算（線形補間使用）
-                    if segment.intensities and segment.duration > 0:
-                        # 相対的な進行度を計算
-                        frame_progress = local_time / segment.duration
-                        exact_frame_index = frame_progress * (
-                            len(segment.intensities) - 1
-                        )
-
-                        # 線形補間でintensityを計算
-                        lower_idx = max(0, int(exact_frame_index))
-                        upper_idx = min(lower_idx + 1, len(segment.intensities) - 1)
-
-                        if lower_idx == upper_idx:
-                            intensity = segment.intensities[lower_idx]
-                        else:
-                            interpolation_factor = exact_frame_index - lower_idx
-                            intensity = (
-                                segment.intensities[lower_idx]
-                                * (1 - interpolation_factor)
-                                + segment.intensities[upper_idx] * interpolation_factor
-                            )
-
-                        current_frame_idx = int(current_time * self.fps)
-                    else:
-                        intensity = 0
-
-                    speaker = conv.get("speaker", "zundamon")
-                    expression = conv.get("expression", "normal")
-                    character_expressions = conv.get("character_expressions", {})
-
-                    # 現在のセリフの背景を取得
-                    background_name = conv.get("background", "default")
-                    if background_name in backgrounds:
-                        current_background = backgrounds[background_name]
+        segment_index = self._find_segment_index(
+            current_time,
+            conversations,
+            audio_file_list,
+            segment_audio_intensities,
+            timeline,
+            frame_idx,
+        )
 
-                    break
+        # 現在の話者と強度、背景を特定
+        if segment_index is not None:
+            conv = conversations[segment_index]
+            segment = segment_audio_intensities[segment_index]
+            current_conversation = conv
+            local_time = current_time - segment.start_time
+
+            # より精密なフレーム番号計算（線形補間使用）
+            if segment.intensities and segment.duration > 0:
+                # 相対的な進行度を計算
+                frame_progress = local_time / segment.duration
+                exact_frame_index = frame_progress * (len(segment.intensities) - 1)
+
+                # 線形補間でintensityを計算
+                lower_idx = max(0, int(exact_frame_index))
+                upper_idx = min(lower_idx + 1, len(segment.intensities) - 1)
+
+                if lower_idx == upper_idx:
+                    intensity = segment.intensities[lower_idx]
+                else:
+                    interpolation_factor = exact_frame_index - lower_idx
+                    intensity = (
+                        segment.intensities[lower_idx] * (1 - interpolation_factor)
+                        + segment.intensities[upper_idx] * interpolation_factor
+                    )
+            else:
+                intensity = 0
+
+            # 現在のセリフの背景を取得
+            background_name = conv.get("background", "default")
+            if background_name in backgrounds:
+                current_background = backgrounds[background_name]
 
         # 表示するキャラクターを決定
         if current_conversation:
-            speaker = current_conversation.get("speaker", "zundamon")
-            speaker = CHARACTER_NAME_MAP.get(speaker, speaker)
-            expression = current_conversation.get("expression", "normal")
-            character_expressions = current_conversation.get("character_expressions", {})
-            visible_chars_raw = current_conversation.get(
-                "visible_characters", [speaker, "zundamon"]
-            )
-            visible_chars = [
-                CHARACTER_NAME_MAP.get(char, char) for char in visible_chars_raw
-            ]
-            character_expressions = {
-                CHARACTER_NAME_MAP.get(k, k): v
-                for k, v in character_expressions.items()
-            }
-
-            # ナレーターの場合、話者自体は表示しない
-            if speaker == "narrator":
-                # visible_charactersに指定されたキャラクターのみ表示
-                for char_name in visible_chars:
-                    if (
-                        char_name in self.video_processor.characters
-                        and char_name != "narrator"
-                    ):
-                        # character_expressionsから表情を取得、なければnormal
-                        char_expression = character_expressions.get(char_name, "normal")
-                        active_speakers[char_name] = {
-                            "intensity": 0,  # ナレーション中なので動きなし
-                            "expression": char_expression,
-                        }
-            else:
-                if speaker not in visible_chars:
-                    visible_chars = visible_chars + [speaker]
-                for char_name in visible_chars:
-                    if (
-                        char_name in self.video_processor.characters
-                        and char_name != "narrator"
-                    ):
-                        # character_expressionsから表情を取得
-                        # 優先順位: character_expressions > expression(話者の場合) > normal
-                        if char_name in character_expressions:
-                            char_expression = character_expressions[char_name]
-                        elif char_name == speaker:
-                            # 後方互換性: character_expressionsがない場合、話者はexpressionを使用
-                            char_expression = expression
-                        else:
-                            char_expression = "normal"
-
-                        if char_name == speaker:
-                            active_speakers[char_name] = {
-                                "intensity": intensity,
-                                "expression": char_expression,
-                            }
-                        else:
-                            active_speakers[char_name] = {
-                                "intensity": 0,
-                                "expression": char_expression,
-                            }
+            speaking_char, layout = self.get_segment_layout(current_conversation)
+            for char_name, char_expression in layout:
+                active_speakers[char_name] = {
+                    # ナレーション中・非話者は動きなし
+                    "intensity": intensity if char_name == speaking_char else 0,
+                    "expression": char_expression,
+                }
         else:
             active_speakers = {"zundamon": {"intensity": 0, "expression": "normal"}}
 
         return active_speakers, current_background
 
+    def get_segment_layout(
+        self, conversation: Dict
+    ) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """セリフごとの表示キャラクターと表情を決定
+
+        Returns:
+            (口パクする話者名（ナレーターの場合は None）, [(キャラクター名, 表情), ...])
+            リストは表示キャラクターの指定順
+        """
+        speaker = conversation.get("speaker", "zundamon")
+        speaker = CHARACTER_NAME_MAP.get(speaker, speaker)
+        expression = conversation.get("expression", "normal")
+        character_expressions = conversation.get("character_expressions", {})
+        visible_chars_raw = conversation.get(
+            "visible_characters", [speaker, "zundamon"]
+        )
+        visible_chars = [
+            CHARACTER_NAME_MAP.get(char, char) for char in visible_chars_raw
+        ]
+        character_expressions = {
+            CHARACTER_NAME_MAP.get(k, k): v for k, v in character_expressions.items()
+        }
+
+        # ナレーターの場合、話者自体は表示しない
+        if speaker == "narrator":
+            speaking_char = None
+        else:
+            speaking_char = speaker
+            if speaker not in visible_chars:
+                visible_chars = visible_chars + [speaker]
+
+        layout = []
+        seen = set()
+        for char_name in visible_chars:
+            if (
+                char_name not in self.video_processor.characters
+                or char_name == "narrator"
+                or char_name in seen
+            ):
+                continue
+            seen.add(char_name)
+
+            # 優先順位: character_expressions > expression(話者の場合) > normal
+            if char_name in character_expressions:
+                char_expression = character_expressions[char_name]
+            elif char_name == speaking_char:
+                # 後方互換性: character_expressionsがない場合、話者はexpressionを使用
+                char_expression = expression
+            else:
+                char_expression = "normal"
+            layout.append((char_name, char_expression))
+
+        return speaking_char, layout
+
+    def _find_segment_index(
+        self,
+        current_time: float,
+        conversations: List[Dict],
+        audio_file_list: List[str],
+        segment_audio_intensities: List[AudioSegmentInfo],
+        timeline: Optional[TimelineIndex] = None,
+        frame_idx: Optional[int] = None,
+    ) -> Optional[int]:
+        """現在時刻に該当するセグメントのインデックスを取得"""
+        segment_count = min(
+            len(conversations), len(audio_file_list), len(segment_audio_intensities)
+        )
+
+        if timeline is not None:
+            if frame_idx is not None:
+                index = timeline.segment_index_at_frame(frame_idx)
+            else:
+                index = timeline.segment_index_at(current_time)
+            if index is not None and index < segment_count:
+                return index
+            return None
+
+        for i in range(segment_count):
+            segment = segment_audio_intensities[i]
+            segment_start = segment.start_time
+            segment_end = segment_start + segment.duration
+            if segment_start <= current_time < segment_end:
+                return i
+
+        return None
+
     def add_subtitle_to_frame(
-        self, frame, subtitle_lines: List[SubtitleData], current_time: float
+        self,
+        frame,
+        subtitle_lines: List[SubtitleData],
+        current_time: float,
+        timeline: Optional[TimelineIndex] = None,
+        frame_idx: Optional[int] = None,
     ):
         """フレームに字幕を追加"""
         if not subtitle_lines:
             return frame
 
-        for subtitle in subtitle_lines:
-            if subtitle.start_time <= current_time <= subtitle.end_time:
-                line_progress = (current_time - subtitle.start_time) / subtitle.duration
-                line_progress = min(1.0, max(0.0, line_progress))
-                frame = self.video_processor.draw_subtitle_on_frame(
-                    frame, subtitle.text, line_progress, subtitle.speaker
-                )
-                break
+        subtitle = None
+        if timeline is not None:
+            if frame_idx is not None:
+                index = timeline.subtitle_index_at_frame(frame_idx)
+            else:
+                index = timeline.subtitle_index_at(current_time)
+            if index is not None:
+                subtitle = subtitle_lines[index]
+        else:
+            for candidate in subtitle_lines:
+                if candidate.start_time <= current_time <= candidate.end_time:
+                    subtitle = candidate
+                    break
+
+        if subtitle is not None:
+            frame = self.draw_subtitle(frame, subtitle, current_time)
 
         return frame
 
+    def draw_subtitle(self, frame, subtitle: SubtitleData, current_time: float):
+        """字幕をフレームに描画"""
+        line_progress = (current_time - subtitle.start_time) / subtitle.duration
+        line_progress = min(1.0, max(0.0, line_progress))
+        return self.video_processor.draw_subtitle_on_frame(
+            frame, subtitle.text, line_progress, subtitle.speaker
+        )
+
     def validate_timing_consistency(
-        self, segments: List[AudioSegmentInfo], audio_files: List[str]
+        self,
+        segments: List[AudioSegmentInfo],
+        audio_files: List[str],
+        audio_durations: Optional[Dict[str, float]] = None,
     ) -> bool:
-        """タイミングの整合性をチェック"""
+        """タイミングの整合性をチェック
+
+        audio_durations（音声パス→長さ）があれば音声ファイルを読み直さずに使う。
+        """
         try:
             # セグメント時間の合計を計算
             total_segment_duration = sum(segment.duration for segment in segments)
@@ -181,7 +245,9 @@ class FrameInfoBuilder:
             # 実際の音声ファイル時間の合計を計算
             total_actual_duration = 0.0
             for audio_path in audio_files:
-                if os.path.exists(audio_path):
+                if audio_durations and audio_path in audio_durations:
+                    total_actual_duration += audio_durations[audio_path]
+                elif os.path.exists(audio_path):
                     audio_clip = AudioFileClip(audio_path)
                     total_actual_duration += audio_clip.duration
                     audio_clip.close()
@@ -0,0 +1,354 @@
+"""フレーム範囲分割による並列レンダリング
+
+タイムラインをフレーム範囲（チャンク）に分割し、ワーカー数だけ起動した
+描画プロセス（chunk_worker）が独自の VideoProcessor でチャンクを描画・エンコードする。
+Celery の prefork ワーカー（デーモンプロセス）からも使えるよう、描画プロセスは
+multiprocessing ではなく subprocess で起動する。
+チャンクは ffmpeg の concat demuxer でストリームコピー結合（再エンコードなし）し、
+同じ呼び出しで音声を多重化する。
+
+瞬きタイミングやアイテム表示状態を含むレンダープランは親プロセスで
+一度だけコンパイルしてワーカーへ渡すため、チャンク分割の仕方によらず同じ映像になる。
+"""
+
+import logging
+import os
+import pickle
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import RENDER_CONFIG
+from .frame_cache import FrameCache
+from .video_encoder import create_ffmpeg_encoder
+
+logger = logging.getLogger(__name__)
+
+# 1チャンクあたりの最小秒数（短すぎるとプロセス起動・リソース読込の比率が増える）
+MIN_CHUNK_SECONDS = 10
+# ワーカー数に対するチャンク数の倍率（進捗の粒度と負荷分散のため）
+CHUNKS_PER_WORKER = 4
+# app パッケージを含むディレクトリ（描画プロセスのインポートパスに加える）
+APP_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+
+def split_frame_ranges(total_frames: int, chunk_count: int) -> List[Tuple[int, int]]:
+    """フレーム数をほぼ均等な連続範囲に分割する"""
+    chunk_count = max(1, min(chunk_count, total_frames))
+    base, remainder = divmod(total_frames, chunk_count)
+
+    ranges = []
+    start = 0
+    for i in range(chunk_count):
+        end = start + base + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _render_chunk(job: Dict[str, Any]) -> Tuple[int, bool, Dict]:
+    """描画プロセス（chunk_worker）で1チャンクを描画・エンコードする"""
+    from app.core.processors.video_processor import VideoProcessor
+    from app.services.resource_manager import ResourceManager
+    from .frame_generator import FrameGenerator
+
+    video_processor = VideoProcessor()
+    resource_manager = ResourceManager(video_processor)
+
+    character_images = resource_manager.load_character_images()
+    backgrounds = resource_manager.load_backgrounds(
+        theme=job["theme"],
+        script_data=job["script_data"],
+        conversations=job["frame_kwargs"]["conversations"],
+    )
+    item_images = resource_manager.load_item_images()
+
+    if not resource_manager.validate_resources(character_images, backgrounds):
+        return job["chunk_index"], False, {}
+
+    encoder = create_ffmpeg_encoder(
+        job["chunk_path"],
+        video_processor.fps,
+        video_processor.resolution,
+        profile=job["profile"],
+    )
+    frame_generator = FrameGenerator(video_processor, video_processor.fps)
+    success = frame_generator.generate_video_frames(
+        backgrounds=backgrounds,
+        character_images=character_images,
+        item_images=item_images,
+        temp_video_path=job["chunk_path"],
+        encoder=encoder,
+        validate_timing=False,
+        **job["frame_kwargs"],
+    )
+    return job["chunk_index"], success, frame_generator.last_render_stats
+
+
+class ParallelFrameRenderer:
+    """チャンク単位のマルチプロセスレンダラー"""
+
+    # ワーカーへ渡すフレーム生成引数（pickle可能なもののみ）
+    SHARED_FRAME_KWARGS = (
+        "total_frames",
+        "conversations",
+        "audio_file_list",
+        "segment_audio_intensities",
+        "blink_timings",
+        "subtitle_lines",
+        "conversation_mode",
+        "sections",
+    )
+
+    def __init__(self, fps: int, workers: int):
+        self.fps = fps
+        self.workers = workers
+        # 全チャンクを合算した描画統計
+        self.render_stats: Dict[str, Any] = {}
+
+    def plan_chunks(self, total_frames: int) -> List[Tuple[int, int]]:
+        """ワーカー数とフレーム数からチャンク範囲を決定する"""
+        min_chunk_frames = self.fps * MIN_CHUNK_SECONDS
+        max_chunks = max(1, total_frames // max(1, min_chunk_frames))
+        chunk_count = min(self.workers * CHUNKS_PER_WORKER, max_chunks)
+        return split_frame_ranges(total_frames, chunk_count)
+
+    def render(
+        self,
+        frame_generator,
+        frame_kwargs: Dict[str, Any],
+        output_path: str,
+        audio_path: str,
+        theme: Optional[str] = None,
+        script_data: Optional[Dict] = None,
+        progress_reporter=None,
+        work_dir: Optional[str] = None,
+    ) -> bool:
+        """全チャンクを並列に描画し、音声付きの最終MP4を書き出す
+
+        チャンクファイルは work_dir（未指定の場合は出力先と同じディレクトリ）に作成する。
+        """
+        total_frames = frame_kwargs["total_frames"]
+        chunk_ranges = self.plan_chunks(total_frames)
+        if len(chunk_ranges) < 2:
+            logger.info("Timeline too short for parallel rendering")
+            return False
+
+        # レンダープランは親プロセスで一度だけ作成して全チャンクで共有する
+        plan = frame_kwargs.get("plan") or frame_generator.compile_plan(**frame_kwargs)
+
+        shared_kwargs = {key: frame_kwargs[key] for key in self.SHARED_FRAME_KWARGS}
+        shared_kwargs["plan"] = plan
+        progress_callback = frame_kwargs.get("progress_callback")
+        profile = RENDER_CONFIG.get_encoder_profile()
+
+        chunk_dir = tempfile.mkdtemp(
+            prefix="chunks_",
+            dir=work_dir or os.path.dirname(os.path.abspath(output_path)),
+        )
+        try:
+            jobs = [
+                {
+                    "chunk_index": i,
+                    "chunk_path": os.path.join(chunk_dir, f"chunk_{i:04d}.mp4"),
+                    "profile": profile,
+                    "theme": theme,
+                    "script_data": script_data,
+                    "frame_kwargs": dict(shared_kwargs, frame_range=frame_range),
+                }
+                for i, frame_range in enumerate(chunk_ranges)
+            ]
+
+            logger.info(
+                f"Parallel rendering: frames={total_frames}, "
+                f"chunks={len(jobs)}, workers={self.workers}"
+            )
+
+            if not self._run_jobs(jobs, chunk_ranges, total_frames, progress_callback):
+                return False
+
+            if progress_reporter is not None:
+                progress_reporter.start_stage("mux")
+            return self._concat_chunks(
+                [job["chunk_path"] for job in jobs],
+                chunk_ranges,
+                audio_path,
+                output_path,
+                os.path.join(chunk_dir, "chunks.txt"),
+            )
+        finally:
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+
+    def _run_jobs(
+        self,
+        jobs: List[Dict[str, Any]],
+        chunk_ranges: List[Tuple[int, int]],
+        total_frames: int,
+        progress_callback=None,
+    ) -> bool:
+        """描画プロセスを workers 個起動し、空いたプロセスから順にチャンクを渡す
+
+        1つでも失敗した場合は全ての描画プロセスを終了し、残りのチャンクは描画しない。
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            path for path in (APP_ROOT, env.get("PYTHONPATH")) if path
+        )
+        pending: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        results: "queue.Queue[Tuple[int, bool, Dict]]" = queue.Queue()
+        aborted = threading.Event()
+        processes: List[subprocess.Popen] = []
+        processes_lock = threading.Lock()
+
+        def serve() -> None:
+            """1つの描画プロセスにチャンクがなくなるまで渡す（スレッドで実行）"""
+            job = None
+            try:
+                with processes_lock:
+                    if aborted.is_set():
+                        return
+                    process = subprocess.Popen(
+                        [sys.executable, "-m", "app.services.video.chunk_worker"],
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        text=True,
+                        env=env,
+                    )
+                    processes.append(process)
+                try:
+                    while not aborted.is_set():
+                        try:
+                            job = pending.get_nowait()
+                        except queue.Empty:
+                            return
+                        base_path = os.path.splitext(job["chunk_path"])[0]
+                        job_path = base_path + ".job"
+                        with open(job_path, "wb") as f:
+                            pickle.dump(job, f, protocol=pickle.HIGHEST_PROTOCOL)
+                        process.stdin.write(f"{job_path}\t{base_path}.result\n")
+                        process.stdin.flush()
+
+                        result_path = process.stdout.readline().rstrip("\n")
+                        if not result_path:
+                            raise RuntimeError(
+                                f"chunk worker exited with code {process.wait()}"
+                            )
+                        with open(result_path, "rb") as f:
+                            results.put(pickle.load(f))
+                        job = None
+                finally:
+                    process.stdin.close()
+                    process.wait()
+            except Exception as e:
+                if job is not None:
+                    logger.error(f"Chunk {job['chunk_index']} worker failed: {e}")
+                    results.put((job["chunk_index"], False, {}))
+
+        def abort() -> None:
+            with processes_lock:
+                aborted.set()
+                for process in processes:
+                    if process.poll() is None:
+                        process.terminate()
+
+        threads = [
+            threading.Thread(target=serve, name=f"render-chunk-{i}", daemon=True)
+            for i in range(min(self.workers, len(jobs)))
+        ]
+        for thread in threads:
+            thread.start()
+
+        def next_result() -> Optional[Tuple[int, bool, Dict]]:
+            while True:
+                try:
+                    return results.get(timeout=1)
+                except queue.Empty:
+                    # 描画プロセスを起動できなかった場合など、結果が届かないまま全て終了した
+                    if not any(thread.is_alive() for thread in threads):
+                        return results.get_nowait() if not results.empty() else None
+
+        done_frames = 0
+        chunk_stats = []
+        try:
+            for _ in jobs:
+                result = next_result()
+                if result is None:
+                    logger.error("Chunk workers exited before rendering all chunks")
+                    abort()
+                    return False
+                chunk_index, success, stats = result
+                if not success:
+                    logger.error(f"Chunk {chunk_index} rendering failed")
+                    abort()
+                    return False
+
+                chunk_stats.append(stats)
+                start, end = chunk_ranges[chunk_index]
+                done_frames += end - start
+                if progress_callback:
+                    progress_callback(done_frames / total_frames)
+        except BaseException:
+            # タスクのタイムアウトなどで中断された場合も描画プロセスを残さない
+            abort()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        self.render_stats = {
+            "frame_cache": FrameCache.merge_stats(
+                stats.get("frame_cache", {}) for stats in chunk_stats
+            ),
+            "repeated_frames": sum(
+                stats.get("repeated_frames", 0) for stats in chunk_stats
+            ),
+        }
+        logger.info(f"Frame cache (all chunks): {self.render_stats['frame_cache']}")
+        return True
+
+    def _concat_chunks(
+        self,
+        chunk_paths: List[str],
+        chunk_ranges: List[Tuple[int, int]],
+        audio_path: str,
+        output_path: str,
+        list_path: str,
+    ) -> bool:
+        """チャンクをストリームコピーで結合し、音声を多重化する"""
+        vfr = RENDER_CONFIG.frame_rate_mode == "vfr"
+
+        # VFRのチャンクは末尾の重複フレームが破棄されて短くなるため、
+        # 各チャンクの長さをフレーム範囲から明示して後続チャンクの位置を揃える
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path, (start, end) in zip(chunk_paths, chunk_ranges):
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+                f.write(f"duration {(end - start) / self.fps:.6f}\n")
+
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error", "-nostats",
+            "-f", "concat", "-safe", "0",
+            "-i", list_path,
+            "-i", audio_path,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+        ]
+        if not vfr:
+            cmd += ["-shortest"]
+        cmd += [output_path]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        if result.returncode != 0:
+            logger.error(f"ffmpeg concat failed: {result.stderr}")
+            return False
+        return True
@@ -0,0 +1,236 @@
+"""ワーカープロセス内でタスク間で共有する描画素材
+
+VideoGenerator はタスクごとに作り直されるため、これまでは毎回 budoux の
+パーサーとフォントを読み込み、全キャラクターのスプライトと背景を PNG から
+デコードし、タスクの終わりにそれらのキャッシュを破棄していた。
+
+RenderContext はプロセスに1つだけ作り、VideoProcessor（パーサー・フォント・
+リサイズ済みスプライトのキャッシュ）とデコード済みの素材を保持し続ける。
+
+- 素材のグループ（キャラクター・アイテム）ごとにファイルの
+  (パス, mtime, サイズ) の一覧を署名として保持し、取得のたびに stat だけで
+  変更を確認する。変わっていればそのグループを読み込み直す
+- 保持する素材の合計が上限（RENDER_CONTEXT_MAX_MB）を超える場合、
+  そのグループは保持せずタスクごとに読み込む
+- 共有する配列は読み取り専用にする（あるタスクの書き込みが次のタスクに
+  漏れないようにする）
+- 背景はライブラリが大きくなり続けるため保持せず、タスクごとに参照される
+  ものだけをリサイズ済みのディスクキャッシュ（temp/background_cache）から
+  mmap で読み込む
+
+同時に使えるのは1タスクだけで、使用中に別のタスクが checkout() した場合は
+False を返す（呼び出し側は自前の VideoProcessor を使う）。
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.config import RENDER_CONFIG, Characters, Paths
+from app.core.processors.video_processor import VideoProcessor
+from app.services.resource_manager import ITEM_IMAGES_DIR, ResourceManager
+
+logger = logging.getLogger(__name__)
+
+# 素材ファイルの署名: ((相対パス, mtime_ns, サイズ), ...)
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+def directory_signature(*directories: str) -> Signature:
+    """ディレクトリ以下の全ファイルの (パス, mtime, サイズ) を列挙する"""
+    entries = []
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(entries))
+
+
+def _freeze(value: Any) -> int:
+    """入れ子の dict に含まれる配列を読み取り専用にし、合計バイト数を返す"""
+    seen = set()
+
+    def visit(item: Any) -> int:
+        if isinstance(item, np.memmap):
+            # ファイルの mmap（スプライトアトラス）はプロセス間で共有されるため数えない
+            return 0
+        if isinstance(item, np.ndarray):
+            if id(item) in seen:
+                return 0
+            seen.add(id(item))
+            item.flags.writeable = False
+            return item.nbytes
+        if isinstance(item, dict):
+            return sum(visit(child) for child in item.values())
+        return 0
+
+    return visit(value)
+
+
+class RenderContext:
+    """プロセス内でタスク間で共有する VideoProcessor とデコード済み素材"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.video_processor = VideoProcessor()
+        self._loader = ResourceManager(self.video_processor)
+
+        # グループ名 -> (署名, 素材, バイト数)
+        self._groups: Dict[str, Tuple[Signature, Any, int]] = {}
+        self._lock = threading.RLock()
+        self._in_use = False
+
+        self.tasks = 0
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        self.over_limit = 0
+        self.background_loads = 0
+
+    def checkout(self) -> bool:
+        """タスクで使用を開始する（他のタスクが使用中なら False）"""
+        with self._lock:
+            if self._in_use:
+                return False
+            self._in_use = True
+            self.tasks += 1
+        # フレーム内容に依存するキャッシュは前のタスクのものを持ち越さない
+        self.video_processor.clear_layer_cache()
+        self.video_processor.clear_subtitle_panel_cache()
+        return True
+
+    def release(self) -> None:
+        """タスクでの使用を終了する"""
+        with self._lock:
+            self._in_use = False
+
+    def character_images(self) -> Optional[Dict]:
+        return self._get(
+            "characters",
+            lambda: directory_signature(
+                *(Paths.get_character_dir(name) for name in Characters.get_all())
+            ),
+            self._loader.load_character_images,
+            self._invalidate_characters,
+        )
+
+    def backgrounds(self, names: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """指定した背景と "default"（names が None なら全背景）"""
+        with self._lock:
+            self.background_loads += 1
+        return self.video_processor.load_backgrounds(names)
+
+    def item_images(self) -> Dict:
+        return self._get(
+            "items",
+            lambda: directory_signature(ITEM_IMAGES_DIR),
+            self._loader.read_item_images,
+        )
+
+    def warm(self) -> None:
+        """フォントと素材を読み込んでおく（ワーカープロセスの起動時）"""
+        started = time.perf_counter()
+        self.video_processor.get_japanese_font()
+        self.character_images()
+        # 背景は "default" だけリサイズ済みキャッシュを作っておく
+        self.backgrounds(names=())
+        self.item_images()
+        logger.info(
+            f"Render context warmed in {time.perf_counter() - started:.2f}s: {self.stats()}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tasks": self.tasks,
+                "hits": self.hits,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+                "over_limit": self.over_limit,
+                "background_loads": self.background_loads,
+                "resident_bytes": sum(group[2] for group in self._groups.values()),
+                "groups": {name: group[2] for name, group in self._groups.items()},
+            }
+
+    def _get(
+        self,
+        name: str,
+        signature: Callable[[], Signature],
+        load: Callable[[], Any],
+        on_invalidate: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        current = signature()
+        with self._lock:
+            group = self._groups.get(name)
+            if group is not None and group[0] == current:
+                self.hits += 1
+                return group[1]
+            if group is not None:
+                # 素材ファイルが変更された
+                del self._groups[name]
+                self.invalidations += 1
+                logger.info(f"Render context: {name} changed on disk, reloading")
+                if on_invalidate:
+                    on_invalidate()
+
+            value = load()
+            self.loads += 1
+            if not value:
+                return value
+            nbytes = _freeze(value)
+            resident = sum(group[2] for group in self._groups.values())
+            if resident + nbytes > self.max_bytes:
+                self.over_limit += 1
+                logger.warning(
+                    f"Render context: {name} ({nbytes / 1024 / 1024:.1f}MB) exceeds "
+                    f"the limit ({self.max_bytes / 1024 / 1024:.0f}MB), not kept"
+                )
+                return value
+            self._groups[name] = (current, value, nbytes)
+            return value
+
+    def _invalidate_characters(self) -> None:
+        """キャラクター画像から作ったキャッシュを破棄する"""
+        from app.core.processors.video_processor.video_processor_image_loader import (
+            _load_character_images_cached,
+        )
+
+        _load_character_images_cached.cache_clear()
+        self.video_processor._resize_cache.clear()
+        self.video_processor.clear_layer_cache()
+
+
+_render_context: Optional[RenderContext] = None
+_render_context_lock = threading.Lock()
+_render_context_pid: Optional[int] = None
+
+
+def get_render_context() -> Optional[RenderContext]:
+    """プロセス内で共有する描画コンテキストを取得（RENDER_CONTEXT_MAX_MB=0 なら None）"""
+    global _render_context, _render_context_pid
+    if RENDER_CONFIG.context_max_mb <= 0:
+        return None
+    with _render_context_lock:
+        if _render_context is None or _render_context_pid != os.getpid():
+            _render_context = RenderContext(RENDER_CONFIG.context_max_mb * 1024 * 1024)
+            _render_context_pid = os.getpid()
+        return _render_context
+
+
+def warm_render_context() -> None:
+    """描画コンテキストを読み込んでおく（ワーカープロセスの起動時にスレッドで実行）"""
+    try:
+        context = get_render_context()
+        if context is not None:
+            context.warm()
+    except Exception as e:
+        logger.warning(f"Render context warm-up failed: {e}")
@@ -0,0 +1,462 @@
+"""フレーム描画計画（レンダープラン）
+
+会話データ・音声セグメント・瞬きタイミング・セクションから、
+フレームごとの描画内容を列指向の NumPy 配列にまとめる。
+
+描画ループは話者名の正規化・表情のフォールバック・強度の補間・
+瞬き判定などをフレームごとに行わず、コンパイル済みのプランを
+そのまま実行する。プランは描画前に summary() / describe_frame() で
+確認できるため、デバッグやレンダリングコストの見積もりにも使える。
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.video_models import AudioSegmentInfo, SubtitleData
+from .timeline_index import TimelineIndex
+
+logger = logging.getLogger(__name__)
+
+# アイテム表示が許可されるセクションキー
+ITEM_ALLOWED_SECTIONS = {"background", "learning"}
+
+# 口の状態コード（mouth_states 列の値）
+MOUTH_STATES = ("closed", "half", "open", "blink")
+
+# セグメント外のフレームで表示するキャラクター
+DEFAULT_LAYOUT = (("zundamon", "normal"),)
+
+
+@dataclass
+class RenderPlan:
+    """フレームごとの描画内容（列指向）
+
+    キャラクター単位の列は character_names の順に並び、
+    表示しないキャラクターの expression_ids / mouth_states は -1 になる。
+    各列は start_frame〜total_frames のフレームを表す（アクセサはフレーム番号で引く）。
+    """
+
+    fps: int
+    total_frames: int
+    character_names: List[str]
+    expression_names: List[str]
+    background_names: List[str]
+    item_names: List[str]
+    # レイアウト = 表示キャラクター列番号の並び（active_speakers の挿入順）
+    layouts: List[Tuple[int, ...]]
+
+    segment_ids: np.ndarray  # (n,) int32, -1: セグメント外
+    background_ids: np.ndarray  # (n,) int16
+    layout_ids: np.ndarray  # (n,) int16
+    speaker_ids: np.ndarray  # (n,) int16, 口パクする列番号, -1: なし
+    intensities: np.ndarray  # (n,) float64, 話者の音声強度
+    expression_ids: np.ndarray  # (n, c) int16
+    mouth_states: np.ndarray  # (n, c) int8
+    blink: np.ndarray  # (n, c) bool
+    subtitle_ids: np.ndarray  # (n,) int32, -1: 字幕なし
+    item_ids: np.ndarray  # (n,) int16, -1: アイテムなし
+
+    warnings: List[str] = field(default_factory=list)
+    # 列の先頭のフレーム番号（音声合成と並行して描画する区間のプランでは0以外）
+    start_frame: int = 0
+
+    @property
+    def frame_count(self) -> int:
+        return self.total_frames - self.start_frame
+
+    def row(self, frame_idx: int) -> int:
+        """フレーム番号に対応する列の行番号"""
+        return frame_idx - self.start_frame
+
+    def background_name(self, frame_idx: int) -> str:
+        return self.background_names[self.background_ids[self.row(frame_idx)]]
+
+    def item_name(self, frame_idx: int) -> Optional[str]:
+        item_id = self.item_ids[self.row(frame_idx)]
+        return self.item_names[item_id] if item_id >= 0 else None
+
+    def subtitle_index(self, frame_idx: int) -> Optional[int]:
+        subtitle_id = int(self.subtitle_ids[self.row(frame_idx)])
+        return subtitle_id if subtitle_id >= 0 else None
+
+    def active_speakers(self, frame_idx: int) -> Dict[str, Dict[str, Any]]:
+        """コンポジタに渡す話者情報を組み立てる"""
+        row = self.row(frame_idx)
+        speaker_col = self.speaker_ids[row]
+        intensity = float(self.intensities[row])
+        expressions = self.expression_ids[row]
+
+        active_speakers = {}
+        for col in self.layouts[self.layout_ids[row]]:
+            active_speakers[self.character_names[col]] = {
+                "intensity": intensity if col == speaker_col else 0,
+                "expression": self.expression_names[expressions[col]],
+            }
+        return active_speakers
+
+    def blink_states(self, frame_idx: int) -> Dict[str, bool]:
+        """キャラクターごとの瞬き状態"""
+        blink = self.blink[self.row(frame_idx)]
+        return {
+            name: bool(blink[col]) for col, name in enumerate(self.character_names)
+        }
+
+    def visual_state_keys(self) -> np.ndarray:
+        """フレームの見た目を決める列をまとめた (n, k) 配列（行は row() で引く）
+
+        同じ行を持つフレームは同じ画像になる（字幕の進行度は見た目に影響しない）。
+        話者の強度は口の状態に加えて、0（静止レイヤー扱い）/ 0.1以下 /
+        0.1超（soloモードで表示される）の3段階で区別する。
+        話者の列もコンポジタの静止・動的レイヤーの分け方（重ね合わせの丸め）を
+        変えるため区別する。
+        """
+        speech_levels = np.select(
+            [self.intensities > 0.1, self.intensities > 0], [2, 1], default=0
+        )
+        return np.column_stack(
+            [
+                self.background_ids,
+                speech_levels,
+                self.speaker_ids,
+                self.layout_ids,
+                self.expression_ids,
+                self.mouth_states,
+                self.subtitle_ids,
+                self.item_ids,
+            ]
+        )
+
+    def describe_frame(self, frame_idx: int) -> Dict[str, Any]:
+        """1フレーム分の描画内容を辞書で返す（デバッグ用）"""
+        row = self.row(frame_idx)
+        characters = {}
+        for col in self.layouts[self.layout_ids[row]]:
+            characters[self.character_names[col]] = {
+                "expression": self.expression_names[self.expression_ids[row, col]],
+                "mouth": MOUTH_STATES[self.mouth_states[row, col]],
+                "speaking": bool(col == self.speaker_ids[row]),
+            }
+
+        return {
+            "frame": frame_idx,
+            "time": frame_idx / self.fps,
+            "segment": int(self.segment_ids[row]),
+            "background": self.background_name(frame_idx),
+            "intensity": float(self.intensities[row]),
+            "characters": characters,
+            "subtitle": self.subtitle_index(frame_idx),
+            "item": self.item_name(frame_idx),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """プラン全体の集計（描画前のコスト見積もり用）"""
+        n = self.frame_count
+        if n == 0:
+            return {"total_frames": 0, "duration": 0.0}
+
+        unique_states = len(np.unique(self.visual_state_keys(), axis=0))
+        speaking_frames = int(np.count_nonzero(self.speaker_ids >= 0))
+        background_usage = Counter(
+            self.background_names[i] for i in self.background_ids.tolist()
+        )
+
+        return {
+            "total_frames": n,
+            "duration": n / self.fps,
+            "fps": self.fps,
+            "segments": int(len(np.unique(self.segment_ids[self.segment_ids >= 0]))),
+            "unique_visual_states": unique_states,
+            # 同じ見た目が再出現するフレームの割合（フレームキャッシュの上限）
+            "repeated_frame_ratio": 1.0 - unique_states / n,
+            "speaking_frames": speaking_frames,
+            "static_frames": n - speaking_frames,
+            "blink_frames": int(np.count_nonzero(self.blink.any(axis=1))),
+            "subtitle_frames": int(np.count_nonzero(self.subtitle_ids >= 0)),
+            "item_frames": int(np.count_nonzero(self.item_ids >= 0)),
+            "backgrounds": dict(background_usage),
+            "warnings": list(self.warnings),
+        }
+
+
+class RenderPlanCompiler:
+    """会話データからレンダープランを作成するクラス"""
+
+    def __init__(self, video_processor, frame_info_builder, fps: int):
+        self.video_processor = video_processor
+        self.frame_info_builder = frame_info_builder
+        self.fps = fps
+
+    def compile(
+        self,
+        total_frames: int,
+        conversations: List[Dict],
+        audio_file_list: List[str],
+        segment_audio_intensities: List[AudioSegmentInfo],
+        backgrounds: Dict,
+        character_images: Dict,
+        blink_timings: List,
+        subtitle_lines: List[SubtitleData],
+        sections: List = None,
+        timeline: Optional[TimelineIndex] = None,
+        start_frame: int = 0,
+    ) -> RenderPlan:
+        """レンダープランを作成
+
+        Args:
+            start_frame: プランに含める先頭のフレーム番号。start_frame〜total_frames
+                         の区間だけをコンパイルする（描画済みの区間は作り直さない）
+        """
+        if timeline is None:
+            timeline = TimelineIndex(
+                segment_audio_intensities,
+                subtitle_lines,
+                sections,
+                self.fps,
+                total_frames,
+            )
+
+        character_names = [
+            name for name in self.video_processor.characters if name != "narrator"
+        ]
+        char_cols = {name: col for col, name in enumerate(character_names)}
+        char_count = len(character_names)
+        frame_numbers = range(start_frame, total_frames)
+        frame_count = len(frame_numbers)
+        frame_times = np.arange(start_frame, total_frames, dtype=np.float64) / self.fps
+
+        expression_names: List[str] = []
+        expression_lookup: Dict[str, int] = {}
+        background_names: List[str] = ["default"]
+        layouts: List[Tuple[int, ...]] = []
+        layout_lookup: Dict[Tuple[int, ...], int] = {}
+        warnings: List[str] = []
+
+        def intern(names: List[str], lookup: Dict, value) -> int:
+            if value not in lookup:
+                lookup[value] = len(names)
+                names.append(value)
+            return lookup[value]
+
+        segment_count = min(
+            len(conversations), len(audio_file_list), len(segment_audio_intensities)
+        )
+        segment_ids = np.array(
+            [
+                idx if idx is not None and idx < segment_count else -1
+                for idx in (
+                    timeline.segment_index_at_frame(i) for i in frame_numbers
+                )
+            ],
+            dtype=np.int32,
+        )
+
+        background_ids = np.zeros(frame_count, dtype=np.int16)
+        layout_ids = np.zeros(frame_count, dtype=np.int16)
+        speaker_ids = np.full(frame_count, -1, dtype=np.int16)
+        intensities = np.zeros(frame_count, dtype=np.float64)
+        expression_ids = np.full((frame_count, char_count), -1, dtype=np.int16)
+        mouth_states = np.full((frame_count, char_count), -1, dtype=np.int8)
+
+        background_lookup = {"default": 0}
+        resolved_expressions: Dict[Tuple[str, str], Optional[str]] = {}
+
+        # セグメント単位で表示内容を決定し、該当フレームへまとめて書き込む
+        for segment_idx in [-1] + list(range(segment_count)):
+            frames = np.flatnonzero(segment_ids == segment_idx)
+            if frames.size == 0:
+                continue
+
+            if segment_idx < 0:
+                speaking_char, layout = None, list(DEFAULT_LAYOUT)
+            else:
+                conv = conversations[segment_idx]
+                speaking_char, layout = self.frame_info_builder.get_segment_layout(
+                    conv
+                )
+
+                background_name = conv.get("background", "default")
+                if background_name in backgrounds:
+                    background_ids[frames] = intern(
+                        background_names, background_lookup, background_name
+                    )
+
+                if speaking_char is not None:
+                    segment = segment_audio_intensities[segment_idx]
+                    intensities[frames] = self._interpolate_intensities(
+                        segment, frame_times[frames] - segment.start_time
+                    )
+
+            layout_cols = []
+            for char_name, expression in layout:
+                col = char_cols[char_name]
+                layout_cols.append(col)
+
+                # 表情のフォールバックはコンパイル時に一度だけ解決する
+                if char_name in character_images:
+                    key = (char_name, expression)
+                    if key not in resolved_expressions:
+                        resolved = self.video_processor.resolve_expression(
+                            character_images[char_name], char_name, expression
+                        )
+                        resolved_expressions[key] = resolved
+                        if resolved != expression:
+                            warnings.append(
+                                f"Expression '{expression}' for {char_name} resolved to '{resolved}'"
+                            )
+                    expression = resolved_expressions[key] or expression
+
+                expression_ids[frames, col] = intern(
+                    expression_names, expression_lookup, expression
+                )
+                if char_name == speaking_char:
+                    speaker_ids[frames] = col
+
+            layout_ids[frames] = intern(layouts, layout_lookup, tuple(layout_cols))
+
+        blink = self._compile_blink(frame_times, blink_timings, character_names)
+
+        # 口の状態（コンポジタと同じ判定で事前計算）
+        for col, char_name in enumerate(character_names):
+            visible = np.flatnonzero(expression_ids[:, col] >= 0)
+            for row in visible.tolist():
+                intensity = intensities[row] if speaker_ids[row] == col else 0
+                _, mouth_state = self.video_processor._select_mouth_key(
+                    char_name, intensity, bool(blink[row, col])
+                )
+                mouth_states[row, col] = MOUTH_STATES.index(mouth_state)
+
+        subtitle_ids = np.array(
+            [
+                -1 if idx is None else idx
+                for idx in (
+                    timeline.subtitle_index_at_frame(i) for i in frame_numbers
+                )
+            ],
+            dtype=np.int32,
+        )
+
+        item_names: List[str] = []
+        item_lookup: Dict[str, int] = {}
+        item_ids = np.array(
+            [
+                -1 if item is None else intern(item_names, item_lookup, item)
+                for item in self.plan_item_states(
+                    timeline, total_frames, conversations, start_frame
+                )
+            ],
+            dtype=np.int16,
+        )
+
+        return RenderPlan(
+            fps=self.fps,
+            total_frames=total_frames,
+            character_names=character_names,
+            expression_names=expression_names,
+            background_names=background_names,
+            item_names=item_names,
+            layouts=layouts,
+            segment_ids=segment_ids,
+            background_ids=background_ids,
+            layout_ids=layout_ids,
+            speaker_ids=speaker_ids,
+            intensities=intensities,
+            expression_ids=expression_ids,
+            mouth_states=mouth_states,
+            blink=blink,
+            subtitle_ids=subtitle_ids,
+            item_ids=item_ids,
+            warnings=warnings,
+            start_frame=start_frame,
+        )
+
+    @staticmethod
+    def _interpolate_intensities(
+        segment: AudioSegmentInfo, local_times: np.ndarray
+    ) -> np.ndarray:
+        """セグメント内の時刻に対応する音声強度を線形補間で求める"""
+        if not segment.intensities or segment.duration <= 0:
+            return np.zeros(len(local_times), dtype=np.float64)
+
+        values = np.asarray(segment.intensities, dtype=np.float64)
+        last = len(values) - 1
+
+        # FrameInfoBuilder.get_frame_info と同じ式で計算する
+        exact_frame_index = local_times / segment.duration * last
+        lower_idx = np.maximum(0, exact_frame_index.astype(np.int64))
+        upper_idx = np.minimum(lower_idx + 1, last)
+        factor = exact_frame_index - lower_idx
+
+        interpolated = values[lower_idx] * (1 - factor) + values[upper_idx] * factor
+        return np.where(lower_idx == upper_idx, values[lower_idx], interpolated)
+
+    @staticmethod
+    def _compile_blink(
+        frame_times: np.ndarray, blink_timings: List, character_names: List[str]
+    ) -> np.ndarray:
+        """フレーム × キャラクターの瞬きフラグを作成"""
+        blink = np.zeros((len(frame_times), len(character_names)), dtype=bool)
+        for timing in blink_timings or []:
+            # start <= t <= end のフレーム範囲
+            lo = np.searchsorted(frame_times, timing["start"], side="left")
+            hi = np.searchsorted(frame_times, timing["end"], side="right")
+            if lo >= hi:
+                continue
+
+            target = timing.get("character")
+            for col, name in enumerate(character_names):
+                if target is None or target == name:
+                    blink[lo:hi, col] = True
+        return blink
+
+    def plan_item_states(
+        self,
+        timeline: TimelineIndex,
+        total_frames: int,
+        conversations: List[Dict],
+        start_frame: int = 0,
+    ) -> List[Optional[str]]:
+        """フレームごとの表示アイテムIDを事前に決定する
+
+        セクションの切り替わりに応じたアイテムの表示/クリアは前フレームの
+        状態に依存するため、描画前にタイムライン全体を一度だけ走査して
+        決定しておく（フレーム範囲ごとの並列描画でも結果が変わらない）。
+        start_frame 以降のフレームの分だけを返す（状態は先頭から追跡する）。
+        """
+        item_states: List[Optional[str]] = []
+
+        # 現在表示中のアイテムを追跡
+        current_item = None
+        current_section_key = None
+
+        for frame_idx in range(total_frames):
+            segment_idx = timeline.segment_index_at_frame(frame_idx)
+            if segment_idx is not None and segment_idx < len(conversations):
+                # 現在のセグメントが属するセクションを判定
+                new_section_key = timeline.section_key_for_segment(segment_idx)
+
+                # セクションが変わった場合
+                if new_section_key != current_section_key:
+                    current_time = frame_idx / self.fps
+                    # 作り直さない区間（start_frame より前）のログは出さない
+                    in_plan = frame_idx >= start_frame
+                    # アイテム表示が許可されていないセクションに入った場合はクリア
+                    if new_section_key not in ITEM_ALLOWED_SECTIONS:
+                        if current_item is not None:
+                            if in_plan:
+                                logger.info(
+                                    f"Item cleared: section changed to '{new_section_key}' at time={current_time:.3f}s"
+                                )
+                            current_item = None
+                    elif in_plan:
+                        logger.info(
+                            f"Entered item-allowed section '{new_section_key}' at time={current_time:.3f}s"
+                        )
+                    current_section_key = new_section_key
+
+            item_states.append(current_item)
+
+        return item_states[start_frame:]
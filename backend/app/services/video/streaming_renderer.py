@@ -0,0 +1,318 @@
+"""音声合成と並行した先頭からの動画描画
+
+合成・解析が済んだ行が先頭から連続して揃うたびに、その行の終わりまでの
+フレームを描画し、映像のみの ffmpeg パイプエンコーダへ書き足していく。
+全行の合成が終わったら残りのフレームを描画してエンコーダを閉じ、
+呼び出し側で音声を多重化する（combine_video_with_audio）。
+
+フレームの描画内容は先頭からの音声長の累積で決まるため、先頭の行が揃えば
+後続の行を待たずに描画できる。瞬きは行ごとに決まる乱数で生成する
+（ResourceManager.generate_segment_blink_timings）ため、動画全体の長さも
+事前には必要ない。
+
+最後にジョブ全体の解析結果と描画済みの行を照合し、一致しない場合は
+描画済みの映像を破棄する（呼び出し側で通常の描画にフォールバックする）。
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.models.video_models import AudioSegmentInfo, SubtitleData
+from .video_encoder import create_ffmpeg_encoder
+
+logger = logging.getLogger(__name__)
+
+
+def frames_before(end_time: float, fps: int) -> int:
+    """end_time より前に始まるフレームの数（frame / fps < end_time を満たす数）"""
+    frame_count = max(0, math.ceil(end_time * fps))
+    # 浮動小数点の丸めで境界のフレームがずれないよう、描画時と同じ式で確認する
+    while frame_count > 0 and (frame_count - 1) / fps >= end_time:
+        frame_count -= 1
+    while frame_count / fps < end_time:
+        frame_count += 1
+    return frame_count
+
+
+class StreamingFrameRenderer:
+    """解析済みの先頭の行から映像のみの動画を描画するスレッド"""
+
+    def __init__(
+        self,
+        frame_generator,
+        resource_manager,
+        audio_combiner,
+        subtitle_generator,
+        video_path: str,
+        resolution: Tuple[int, int],
+        conversations: List[Dict],
+        load_resources: Callable[[], Tuple[Optional[Dict], Optional[Dict], Dict]],
+        enable_subtitles: bool = True,
+        conversation_mode: str = "duo",
+        sections: Optional[List] = None,
+    ):
+        self.frame_generator = frame_generator
+        self.resource_manager = resource_manager
+        self.audio_combiner = audio_combiner
+        self.subtitle_generator = subtitle_generator
+        self.fps = frame_generator.fps
+        self.video_path = video_path
+        self.resolution = resolution
+        self.conversations = conversations
+        self.load_resources = load_resources
+        self.enable_subtitles = enable_subtitles
+        self.conversation_mode = conversation_mode
+        self.sections = sections
+
+        self._cond = threading.Condition()
+        # 解析済みの行: 行番号 → (音声パス, 強度列, 音声長)
+        self._analyzed: Dict[int, Tuple[str, List[float], float]] = {}
+        self._contiguous = 0
+        self._stopping = False
+        self._failed = False
+        self._thread: Optional[threading.Thread] = None
+        self._encoder = None
+        self._resources: Optional[Tuple[Dict, Dict, Dict]] = None
+
+        # 描画済みの行とフレーム（照合用に行の解析結果・字幕も保持する）
+        self._paths: List[str] = []
+        self._segments: List[AudioSegmentInfo] = []
+        self._subtitles: List[SubtitleData] = []
+        self._frames = 0
+        self._chunks = 0
+
+        self._started_at: Optional[float] = None
+        self._first_frame_at: Optional[float] = None
+        self._render_seconds = 0.0
+
+    def start(self) -> "StreamingFrameRenderer":
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="streaming-render", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def on_analyzed(
+        self, index: int, audio_path: str, intensities: List[float], duration: float
+    ) -> None:
+        """1行分の解析結果を受け取る（StreamingAudioAnalyzer の解析スレッドから呼ばれる）"""
+        with self._cond:
+            self._analyzed[index] = (audio_path, intensities, duration)
+            advanced = False
+            while self._contiguous in self._analyzed:
+                self._contiguous += 1
+                advanced = True
+            if advanced:
+                self._cond.notify()
+
+    def finish(
+        self, frame_kwargs: Dict, progress_callback=None
+    ) -> Optional[str]:
+        """残りのフレームを描画して映像のみの動画を書き出す
+
+        Args:
+            frame_kwargs: ジョブ全体のフレーム生成引数（VideoGenerator._prepare_render_job）
+
+        Returns:
+            映像のみの動画のパス。何も描画していない・描画済みの行がジョブ全体の
+            解析結果と一致しない・描画に失敗した場合は None（出力は削除する）
+        """
+        self._stop()
+        if self._failed or self._frames == 0:
+            self.abort()
+            return None
+        if not self._matches(frame_kwargs):
+            logger.warning(
+                "Streamed frames do not match the final timeline, rendering again"
+            )
+            self.abort()
+            return None
+
+        total_frames = frame_kwargs["total_frames"]
+        logger.info(
+            f"Streamed {self._frames}/{total_frames} frames during synthesis, "
+            f"rendering the remaining frames"
+        )
+        try:
+            started = time.perf_counter()
+            self._write(frame_kwargs, total_frames, progress_callback)
+            self._render_seconds += time.perf_counter() - started
+        except Exception as e:
+            logger.error(f"Streaming render failed: {e}")
+            self.abort()
+            return None
+
+        encoder, self._encoder = self._encoder, None
+        if not encoder.close():
+            encoder.abort()
+            return None
+        return self.video_path
+
+    def abort(self) -> None:
+        """描画を止め、書きかけの動画を削除する"""
+        self._stop()
+        encoder, self._encoder = self._encoder, None
+        if encoder is not None:
+            encoder.abort()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lines": len(self._paths),
+            "frames": self._frames,
+            "chunks": self._chunks,
+            "first_frame_seconds": round(self._first_frame_at - self._started_at, 3)
+            if self._first_frame_at is not None
+            else None,
+            "render_seconds": round(self._render_seconds, 3),
+        }
+
+    def _stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            character_images, backgrounds, item_images = self.load_resources()
+            if not self.resource_manager.validate_resources(
+                character_images, backgrounds
+            ):
+                return
+            self._resources = (character_images, backgrounds, item_images)
+
+            # 最後の行は動画全体の長さ（末尾の端数のフレームを含めるか）が決まってから
+            # finish() で描画する
+            streamable = len(self.conversations) - 1
+            while True:
+                with self._cond:
+                    while not self._stopping and (
+                        min(self._contiguous, streamable) <= len(self._paths)
+                    ):
+                        self._cond.wait()
+                    if self._stopping:
+                        return
+                    ready = min(self._contiguous, streamable)
+                    lines = [self._analyzed[i] for i in range(ready)]
+                self._render_prefix(lines)
+        except Exception as e:
+            logger.warning(f"Streaming render stopped: {e}")
+            self._failed = True
+
+    def _render_prefix(self, lines: List[Tuple[str, List[float], float]]) -> None:
+        """先頭から len(lines) 行の終わりまでのフレームを描画する"""
+        started = time.perf_counter()
+        _, backgrounds, _ = self._resources
+        paths = [path for path, _, _ in lines]
+        segments = self.audio_combiner.analyze_audio_segments(
+            paths, {path: (intensities, duration) for path, intensities, duration in lines}
+        )
+        subtitles = self.subtitle_generator.generate_subtitles(
+            self.conversations[: len(lines)],
+            paths,
+            backgrounds,
+            self.enable_subtitles,
+            {path: duration for path, _, duration in lines},
+        )
+        if len(segments) != len(lines):
+            # 解析できなかった行があると行とセグメントの対応がずれる
+            raise ValueError("a line in the streamed prefix has no audio segment")
+
+        last = segments[-1]
+        end_frame = frames_before(last.start_time + last.duration, self.fps)
+        frame_kwargs = self._frame_kwargs(end_frame, paths, segments, subtitles)
+        if end_frame > self._frames:
+            if self._encoder is None:
+                encoder = create_ffmpeg_encoder(
+                    self.video_path, self.fps, self.resolution
+                )
+                if not encoder.open():
+                    raise RuntimeError("failed to open the streaming video encoder")
+                self._encoder = encoder
+            self._write(frame_kwargs, end_frame)
+            self._chunks += 1
+            if self._first_frame_at is None:
+                self._first_frame_at = time.perf_counter()
+
+        self._paths = paths
+        self._segments = segments
+        self._subtitles = subtitles
+        self._render_seconds += time.perf_counter() - started
+
+    def _frame_kwargs(
+        self,
+        total_frames: int,
+        paths: List[str],
+        segments: List[AudioSegmentInfo],
+        subtitles: List[SubtitleData],
+    ) -> Dict:
+        character_images, backgrounds, item_images = self._resources
+        return dict(
+            total_frames=total_frames,
+            conversations=self.conversations,
+            audio_file_list=paths,
+            segment_audio_intensities=segments,
+            backgrounds=backgrounds,
+            character_images=character_images,
+            blink_timings=self.resource_manager.generate_segment_blink_timings(
+                segments
+            ),
+            subtitle_lines=subtitles,
+            conversation_mode=self.conversation_mode,
+            item_images=item_images,
+            sections=self.sections,
+        )
+
+    def _write(
+        self, frame_kwargs: Dict, end_frame: int, progress_callback=None
+    ) -> None:
+        """描画済みのフレームから end_frame までを描画してエンコーダへ書き足す"""
+        plan = self.frame_generator.compile_plan(
+            **frame_kwargs, start_frame=self._frames
+        )
+        self.frame_generator.write_frames(
+            self._encoder,
+            plan,
+            (self._frames, end_frame),
+            frame_kwargs["backgrounds"],
+            frame_kwargs["character_images"],
+            frame_kwargs["blink_timings"],
+            frame_kwargs["subtitle_lines"],
+            frame_kwargs["conversation_mode"],
+            frame_kwargs["item_images"],
+            progress_callback,
+        )
+        self._frames = end_frame
+
+    def matches_settings(
+        self, enable_subtitles: bool, conversation_mode: str, sections: Optional[List]
+    ) -> bool:
+        """描画に使った設定が動画生成時の設定と同じか"""
+        return (
+            enable_subtitles == self.enable_subtitles
+            and conversation_mode == self.conversation_mode
+            and sections == self.sections
+        )
+
+    def _matches(self, frame_kwargs: Dict) -> bool:
+        """描画済みの行がジョブ全体の音声・字幕・素材と一致するか
+
+        瞬きは行ごとの乱数で生成するため、行の開始時刻と長さが一致すれば一致する。
+        """
+        lines = len(self._paths)
+        character_images, backgrounds, _ = self._resources
+        return (
+            self._frames <= frame_kwargs["total_frames"]
+            and frame_kwargs["audio_file_list"][:lines] == self._paths
+            and frame_kwargs["segment_audio_intensities"][:lines] == self._segments
+            and frame_kwargs["subtitle_lines"][: len(self._subtitles)]
+            == self._subtitles
+            and frame_kwargs["backgrounds"] is backgrounds
+            and frame_kwargs["character_images"] is character_images
+        )
@@ -0,0 +1,137 @@
+"""タイムライン索引ユーティリティ
+
+セグメント・字幕・セクションの時間範囲をジョブごとに一度だけ索引化し、
+フレーム単位の検索を O(1)、任意時刻の検索を O(log n) で行う。
+"""
+
+import bisect
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+from app.models.video_models import AudioSegmentInfo, SubtitleData
+
+logger = logging.getLogger(__name__)
+
+
+class TimelineIndex:
+    """フレーム → セグメント / セクション / 字幕 の索引
+
+    セグメントと字幕はどちらも音声長の累積で開始時刻が決まるため、
+    開始・終了時刻はそれぞれ単調非減少になる。この性質を利用して、
+    従来の線形走査（最初に一致した要素を採用）と同じ結果を二分探索で求める。
+
+    - セグメント: start <= t < end（半開区間）
+    - 字幕: start <= t <= end（閉区間）
+    """
+
+    def __init__(
+        self,
+        segments: List[AudioSegmentInfo],
+        subtitles: Optional[List[SubtitleData]] = None,
+        sections: Optional[List] = None,
+        fps: int = 10,
+        total_frames: int = 0,
+    ):
+        self.fps = fps
+        self.total_frames = total_frames
+
+        self._segment_starts = [segment.start_time for segment in segments]
+        self._segment_ends = [
+            segment.start_time + segment.duration for segment in segments
+        ]
+
+        subtitles = subtitles or []
+        self._subtitle_starts = [subtitle.start_time for subtitle in subtitles]
+        self._subtitle_ends = [subtitle.end_time for subtitle in subtitles]
+
+        self._segment_section_keys = self._build_section_keys(
+            sections, len(segments)
+        )
+
+        # フレームごとの検索結果を事前計算（-1 は該当なし）
+        frame_times = np.arange(total_frames, dtype=np.float64) / fps
+        self._frame_segments = self._lookup(
+            frame_times, self._segment_starts, self._segment_ends, "right"
+        )
+        self._frame_subtitles = self._lookup(
+            frame_times, self._subtitle_starts, self._subtitle_ends, "left"
+        )
+
+    @staticmethod
+    def _build_section_keys(sections: Optional[List], segment_count: int) -> List:
+        """セグメントインデックス → セクションキーの対応表を作成"""
+        section_keys = [None] * segment_count
+        if not sections:
+            return section_keys
+
+        segment_index = 0
+        for section in sections:
+            section_key = getattr(section, "section_key", None)
+            segment_end = segment_index + len(section.segments)
+            for i in range(segment_index, min(segment_end, segment_count)):
+                section_keys[i] = section_key
+            segment_index = segment_end
+
+        return section_keys
+
+    @staticmethod
+    def _lookup(
+        times: np.ndarray, starts: List[float], ends: List[float], end_side: str
+    ) -> np.ndarray:
+        """各時刻を含む最初の区間のインデックスを求める
+
+        end_side="right" で終端を含まない区間、"left" で終端を含む区間として扱う。
+        """
+        if not starts:
+            return np.full(len(times), -1, dtype=np.int32)
+
+        starts_arr = np.asarray(starts, dtype=np.float64)
+        ends_arr = np.asarray(ends, dtype=np.float64)
+
+        # start <= t を満たす最後の区間
+        last_started = np.searchsorted(starts_arr, times, side="right") - 1
+        # 終端条件を満たす最初の区間
+        first_open = np.searchsorted(ends_arr, times, side=end_side)
+
+        result = np.where(first_open <= last_started, first_open, -1)
+        return result.astype(np.int32)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segment_starts)
+
+    def segment_index_at_frame(self, frame_idx: int) -> Optional[int]:
+        """フレーム番号に対応するセグメントインデックスを取得"""
+        if not 0 <= frame_idx < self.total_frames:
+            return self.segment_index_at(frame_idx / self.fps)
+        index = int(self._frame_segments[frame_idx])
+        return index if index >= 0 else None
+
+    def subtitle_index_at_frame(self, frame_idx: int) -> Optional[int]:
+        """フレーム番号に対応する字幕インデックスを取得"""
+        if not 0 <= frame_idx < self.total_frames:
+            return self.subtitle_index_at(frame_idx / self.fps)
+        index = int(self._frame_subtitles[frame_idx])
+        return index if index >= 0 else None
+
+    def segment_index_at(self, current_time: float) -> Optional[int]:
+        """任意時刻に対応するセグメントインデックスを取得"""
+        last_started = bisect.bisect_right(self._segment_starts, current_time) - 1
+        first_open = bisect.bisect_right(self._segment_ends, current_time)
+        return first_open if first_open <= last_started else None
+
+    def subtitle_index_at(self, current_time: float) -> Optional[int]:
+        """任意時刻に対応する字幕インデックスを取得"""
+        last_started = bisect.bisect_right(self._subtitle_starts, current_time) - 1
+        first_open = bisect.bisect_left(self._subtitle_ends, current_time)
+        return first_open if first_open <= last_started else None
+
+    def section_key_for_segment(self, segment_index: Optional[int]):
+        """セグメントが属するセクションキーを取得"""
+        if segment_index is None or not 0 <= segment_index < len(
+            self._segment_section_keys
+        ):
+            return None
+        return self._segment_section_keys[segment_index]
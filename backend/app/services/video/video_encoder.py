@@ -0,0 +1,248 @@
+"""動画エンコーダ
+
+FrameGenerator から受け取ったフレームを書き出すバックエンド。
+
+- FFmpegPipeEncoder: 生BGRフレームをパイプでffmpegへ送り、音声の多重化と
+  faststart MP4 の書き出しを一度のエンコードで行う
+- OpenCVVideoEncoder: 従来の cv2.VideoWriter による一時ファイル書き出し
+  （ffmpegが使えない場合のフォールバック）
+
+いずれも repeat_last() で直前のフレームを1フレーム分延長できる。
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import RENDER_CONFIG, EncoderProfile
+
+logger = logging.getLogger(__name__)
+
+
+class OpenCVVideoEncoder:
+    """cv2.VideoWriter による mp4v 一時ファイルエンコーダ"""
+
+    def __init__(self, output_path: str, fps: int, resolution: Tuple[int, int]):
+        self.output_path = output_path
+        self.fps = fps
+        self.resolution = resolution
+        self._writer = None
+        self._last_frame = None
+
+    def open(self) -> bool:
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        self._writer = cv2.VideoWriter(
+            self.output_path, fourcc, self.fps, self.resolution
+        )
+        if not self._writer.isOpened():
+            logger.error("Failed to open video writer")
+            self._writer = None
+            return False
+        return True
+
+    def write(self, frame: np.ndarray) -> None:
+        self._writer.write(frame)
+        self._last_frame = frame
+
+    def repeat_last(self) -> None:
+        self._writer.write(self._last_frame)
+
+    def close(self) -> bool:
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        return True
+
+    def abort(self) -> None:
+        self.close()
+
+
+class FFmpegPipeEncoder:
+    """生フレームをffmpegの標準入力へ流し込むエンコーダ
+
+    audio_path を指定すると同じffmpeg呼び出しの中で音声も多重化し、
+    最終的な MP4 を直接書き出す。
+
+    vfr=True の場合は直前と完全に同じフレームをエンコード前に破棄し、
+    入力（fps 刻み）のタイムスタンプのまま可変フレームレートで書き出す。
+    fps は最大フレームレートとして扱われる。
+    """
+
+    # 完全一致のフレームのみ破棄する（8x8ブロックの差分がすべて0）
+    VFR_FILTER = "mpdecimate=hi=0:lo=0:frac=0"
+
+    def __init__(
+        self,
+        output_path: str,
+        fps: int,
+        resolution: Tuple[int, int],
+        audio_path: Optional[str] = None,
+        profile: Optional[EncoderProfile] = None,
+        vfr: bool = False,
+    ):
+        self.output_path = output_path
+        self.fps = fps
+        self.resolution = resolution
+        self.audio_path = audio_path
+        self.profile = profile or RENDER_CONFIG.get_encoder_profile()
+        self.vfr = vfr
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr = None
+        self._last_frame = None
+
+    @staticmethod
+    def is_available() -> bool:
+        """ffmpegが利用可能か"""
+        return shutil.which("ffmpeg") is not None
+
+    def build_command(self) -> List[str]:
+        """ffmpegコマンドを組み立てる"""
+        width, height = self.resolution
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error", "-nostats",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", str(self.fps),
+            "-i", "pipe:0",
+        ]
+        if self.audio_path:
+            cmd += ["-i", self.audio_path]
+
+        if self.vfr:
+            cmd += ["-vf", self.VFR_FILTER, "-fps_mode", "vfr"]
+
+        cmd += [
+            "-c:v", "libx264",
+            "-preset", self.profile.preset,
+            "-crf", str(self.profile.crf),
+            "-pix_fmt", "yuv420p",
+        ]
+        if self.audio_path:
+            cmd += ["-c:a", "aac"]
+            # VFRでは末尾の重複フレームも破棄され映像が短くなるため、
+            # 音声を切り詰めない（最後のフレームが音声終了まで表示される）
+            if not self.vfr:
+                cmd += ["-shortest"]
+
+        cmd += ["-movflags", "+faststart", self.output_path]
+        return cmd
+
+    def open(self) -> bool:
+        if not self.is_available():
+            logger.error("ffmpeg not found")
+            return False
+
+        # stderrはパイプだと詰まる可能性があるため一時ファイルへ退避
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                self.build_command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=self._stderr,
+            )
+        except OSError as e:
+            logger.error(f"Failed to start ffmpeg: {e}")
+            self._close_stderr()
+            return False
+
+        logger.info(
+            f"ffmpeg pipe encoder started: preset={self.profile.preset}, "
+            f"crf={self.profile.crf}, audio={'yes' if self.audio_path else 'no'}, "
+            f"vfr={'yes' if self.vfr else 'no'}"
+        )
+        return True
+
+    def write(self, frame: np.ndarray) -> None:
+        self._last_frame = np.ascontiguousarray(frame)
+        try:
+            self._process.stdin.write(self._last_frame.data)
+        except (BrokenPipeError, ValueError) as e:
+            raise RuntimeError(
+                f"ffmpeg pipe closed unexpectedly: {e} {self._read_stderr()}"
+            ) from e
+
+    def repeat_last(self) -> None:
+        self.write(self._last_frame)
+
+    def close(self, timeout: int = 300) -> bool:
+        """入力を閉じてffmpegの終了を待つ"""
+        if self._process is None:
+            return False
+
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+        try:
+            returncode = self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+            logger.error("ffmpeg encoding timed out")
+            returncode = -1
+
+        self._process = None
+        if returncode != 0:
+            logger.error(f"ffmpeg failed: {self._read_stderr()}")
+            self._close_stderr()
+            return False
+
+        self._close_stderr()
+        return True
+
+    def abort(self) -> None:
+        """エンコードを中断し、書きかけの出力を削除する"""
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+        self._close_stderr()
+
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def _read_stderr(self) -> str:
+        if self._stderr is None:
+            return ""
+        try:
+            self._stderr.seek(0)
+            return self._stderr.read().decode("utf-8", errors="replace")[-2000:]
+        except (OSError, ValueError):
+            return ""
+
+    def _close_stderr(self) -> None:
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+
+
+def create_ffmpeg_encoder(
+    output_path: str,
+    fps: int,
+    resolution: Tuple[int, int],
+    audio_path: Optional[str] = None,
+    profile: Optional[EncoderProfile] = None,
+) -> FFmpegPipeEncoder:
+    """設定されたフレームレートモードでffmpegパイプエンコーダを作成"""
+    return FFmpegPipeEncoder(
+        output_path,
+        fps,
+        resolution,
+        audio_path=audio_path,
+        profile=profile,
+        vfr=RENDER_CONFIG.frame_rate_mode == "vfr",
+    )
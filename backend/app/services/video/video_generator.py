@@ -1,27 +1,50 @@
 import os
+import hashlib
+import json
 import logging
 import gc
-from typing import List, Dict, Optional
-from app.config.app import Paths
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from app.config.app import Paths, RENDER_CONFIG, WORKSPACE_CONFIG
+from app.core.asset_generators.tts_cache import get_tts_cache
 from app.core.processors.audio_processor import AudioProcessor
 from app.core.processors.video_processor import VideoProcessor
 from app.services.resource_manager import ResourceManager
 from app.services.audio_combiner import AudioCombiner
+from app.services.audio_segment_store import AudioSegmentStore
+from app.services.streaming_analyzer import StreamingAudioAnalyzer
 from app.services.subtitle_generator import SubtitleGenerator
 from app.services.video.frame_generator import FrameGenerator
 from app.services.bgm_mixer import BGMMixer
+from app.services.video.parallel_renderer import ParallelFrameRenderer
+from app.services.video.render_plan import RenderPlan
+from app.services.video.streaming_renderer import StreamingFrameRenderer
+from app.services.video.video_encoder import (
+    FFmpegPipeEncoder,
+    create_ffmpeg_encoder,
+)
 from app.services.video.video_generator_utils import (
     combine_video_with_audio,
     calculate_section_durations,
+    get_temp_audio_path,
+    write_audio_track,
 )
 from app.models.scripts.common import VideoSection
 from app.utils.files import FileManager
+from app.utils.progress_reporter import ProgressReporter
 
 logger = logging.getLogger(__name__)
 
 
 class VideoGenerator:
-    def __init__(self):
+    def __init__(self, render_context=None):
+        """
+        Args:
+            render_context: ワーカープロセスで共有する RenderContext。使用中でなければ
+                その VideoProcessor とデコード済み素材を使う（None の場合は毎回読み込む）
+        """
+        started = time.perf_counter()
         # 口パクデバッグ用: ログレベルを一時的にINFOに設定
         for logger_name in [
             "app.services.audio_combiner",
@@ -33,116 +56,247 @@ class VideoGenerator:
         ]:
             logging.getLogger(logger_name).setLevel(logging.INFO)
 
-        self.audio_processor = AudioProcessor()
-        self.video_processor = VideoProcessor()
+        # セリフ音声は1回だけデコードし、解析・結合・タイミング検証で共有する
+        self.audio_store = AudioSegmentStore(
+            max_bytes=WORKSPACE_CONFIG.audio_store_max_mb * 1024 * 1024
+        )
+        self.audio_processor = AudioProcessor(
+            tts_cache=get_tts_cache(), audio_store=self.audio_store
+        )
+        self._render_context = (
+            render_context
+            if render_context is not None and render_context.checkout()
+            else None
+        )
+        if self._render_context is not None:
+            self.video_processor = self._render_context.video_processor
+        else:
+            self.video_processor = VideoProcessor()
         self.fps = self.video_processor.fps
 
         # 各処理クラスの初期化
-        self.resource_manager = ResourceManager(self.video_processor)
-        self.audio_combiner = AudioCombiner(self.audio_processor, self.fps)
+        self.resource_manager = ResourceManager(
+            self.video_processor, render_context=self._render_context
+        )
+        self.audio_combiner = AudioCombiner(
+            self.audio_processor, self.fps, audio_store=self.audio_store
+        )
         self.subtitle_generator = SubtitleGenerator()
         self.frame_generator = FrameGenerator(self.video_processor, self.fps)
         self.bgm_mixer = BGMMixer()
 
+        # 直近の動画生成の描画統計（タスク結果に含める）
+        self.render_stats: Dict = {}
+
+        # 音声合成と並行して行う準備処理（start_streaming で開始）
+        self._resource_future: Optional[Future] = None
+        # start_streaming に渡された theme / script_data / conversations の内容のキー
+        self._streaming_key: Optional[str] = None
+        self._audio_analyzer: Optional[StreamingAudioAnalyzer] = None
+        self._stream_renderer: Optional[StreamingFrameRenderer] = None
+        # 並行処理の待ち時間など（タスク結果に含める）
+        self.pipeline_stats: Dict = {
+            "startup_seconds": round(time.perf_counter() - started, 3),
+            "warm_render_context": self._render_context is not None,
+        }
+
+    def start_streaming(
+        self,
+        theme: Optional[str] = None,
+        script_data: Optional[Dict] = None,
+        work_dir: Optional[str] = None,
+        conversations: Optional[List[Dict]] = None,
+        enable_subtitles: bool = True,
+        conversation_mode: str = "duo",
+        sections: Optional[List[VideoSection]] = None,
+    ) -> None:
+        """音声合成と並行して素材の読み込みと口パク解析を始める
+
+        合成済みの音声は on_voice_ready() で渡す。結果は同じ内容の theme /
+        script_data / conversations で呼び出した generate_conversation_video() が
+        使用する。conversations を指定すると参照される背景だけを読み込む。
+        work_dir を指定するとメモリに収まらないデコード済み音声をそこへ退避する。
+
+        VIDEO_STREAM_RENDER が有効で work_dir と conversations を指定した場合は、
+        解析が済んだ先頭の行から映像の描画も始める（字幕・会話モード・セクションは
+        generate_conversation_video() と同じ値を渡す）。
+        """
+        self.stop_streaming()
+        if work_dir:
+            self.audio_store.spill_dir = os.path.join(work_dir, "pcm")
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="resource-prefetch"
+        )
+        self._resource_future = executor.submit(
+            self._load_resources, theme, script_data, conversations
+        )
+        self._streaming_key = self._content_key(theme, script_data, conversations)
+        executor.shutdown(wait=False)
+
+        if work_dir and conversations and self._stream_render_enabled():
+            self._stream_renderer = StreamingFrameRenderer(
+                self.frame_generator,
+                self.resource_manager,
+                self.audio_combiner,
+                self.subtitle_generator,
+                os.path.join(work_dir, "streamed_temp.mp4"),
+                self.video_processor.resolution,
+                conversations,
+                self._resource_future.result,
+                enable_subtitles=enable_subtitles,
+                conversation_mode=conversation_mode,
+                sections=sections,
+            ).start()
+        self._audio_analyzer = StreamingAudioAnalyzer(
+            self.audio_processor,
+            on_result=self._stream_renderer.on_analyzed
+            if self._stream_renderer is not None
+            else None,
+        ).start()
+
+    def on_voice_ready(self, index: int, audio_path: str) -> None:
+        """合成が終わった音声を解析キューに追加する（合成スレッドから呼ばれる）"""
+        analyzer = self._audio_analyzer
+        if analyzer is not None:
+            analyzer.submit(index, audio_path)
+
+    def stop_streaming(self) -> None:
+        """並行処理の結果を破棄する（音声合成に失敗した場合など）"""
+        if self._audio_analyzer is not None:
+            self._audio_analyzer.close()
+            self._audio_analyzer = None
+        if self._stream_renderer is not None:
+            self._stream_renderer.abort()
+            self._stream_renderer = None
+        self._resource_future = None
+        self._streaming_key = None
+
+    @staticmethod
+    def _content_key(
+        theme: Optional[str],
+        script_data: Optional[Dict],
+        conversations: Optional[List[Dict]],
+    ) -> str:
+        """先読みした結果を使ってよいかを判定するための入力の内容のキー
+
+        オブジェクトの id() は解放後に再利用されるため、内容から求める。
+        """
+        content = json.dumps(
+            [theme, script_data, conversations],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _stream_render_enabled() -> bool:
+        """音声合成と並行した描画を行うか
+
+        フレーム範囲を分割する並列描画（VIDEO_RENDER_WORKERS が2以上）とは併用しない。
+        """
+        return (
+            RENDER_CONFIG.stream_render
+            and RENDER_CONFIG.encoder_backend == "ffmpeg_pipe"
+            and RENDER_CONFIG.get_render_workers() <= 1
+            and FFmpegPipeEncoder.is_available()
+        )
+
     def generate_conversation_video(
         self,
         conversations: List[Dict],
         audio_file_list: List[str],
         output_path: str = None,
-        progress_callback=None,
+        progress_reporter: Optional[ProgressReporter] = None,
         enable_subtitles: bool = True,
         conversation_mode: str = "duo",
         sections: Optional[List[VideoSection]] = None,
         theme: Optional[str] = None,
         script_data: Optional[Dict] = None,
+        work_dir: Optional[str] = None,
     ) -> Optional[str]:
-        """会話動画生成（メイン機能）"""
+        """会話動画生成（メイン機能）
+
+        progress_reporter を渡すと bgm / analysis / frames / mux の各ステージの
+        進捗を通知する。work_dir を指定すると一時ファイルをそのディレクトリに
+        書き出す（未指定の場合は出力ファイルと同じディレクトリ）。
+        """
+        reporter = progress_reporter or ProgressReporter()
         if not output_path:
             output_path = os.path.join(
-                Paths.get_outputs_dir(), "conversation_video.mp4"
+                Paths.get_outputs_dir(),
+                FileManager.generate_unique_filename("conversation_video", "mp4"),
             )
 
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        work_dir = work_dir or os.path.dirname(output_path)
+        os.makedirs(work_dir, exist_ok=True)
+        if self.audio_store.spill_dir is None:
+            self.audio_store.spill_dir = os.path.join(work_dir, "pcm")
 
         try:
-            character_images = self.resource_manager.load_character_images()
-            backgrounds = self.resource_manager.load_backgrounds(
-                theme=theme, script_data=script_data
-            )
-            item_images = self.resource_manager.load_item_images()
-
-            if not self.resource_manager.validate_resources(
-                character_images, backgrounds
-            ):
-                return None
-
-            combined_audio, audio_clips, audio_durations = (
-                self.audio_combiner.combine_audio_files(audio_file_list)
-            )
-            if combined_audio is None:
-                return None
-
-            if sections:
-                section_durations = calculate_section_durations(
-                    sections, audio_durations, audio_file_list
-                )
-                combined_audio = self.bgm_mixer.mix_bgm_with_voiceover(
-                    combined_audio, sections, section_durations
-                )
-
-            actual_total_duration = combined_audio.duration
-            total_frames = int(actual_total_duration * self.fps)
-
-            subtitle_lines = self.subtitle_generator.generate_subtitles(
+            job = self._prepare_render_job(
                 conversations,
                 audio_file_list,
-                backgrounds,
                 enable_subtitles,
-                audio_durations,
+                conversation_mode,
+                sections,
+                theme,
+                script_data,
+                reporter,
             )
+            if job is None:
+                return None
+            frame_kwargs, combined_audio, audio_clips = job
 
-            segment_audio_intensities = self.audio_combiner.analyze_audio_segments(
-                audio_file_list
-            )
+            reporter.start_stage("frames")
+            progress_callback = reporter.update if reporter.enabled else None
 
-            blink_timings = self.resource_manager.generate_blink_timings(
-                actual_total_duration
+            # 音声合成と並行して描画した映像があれば、残りを描画して音声を多重化する
+            final_output_path = self._finish_streamed_render(
+                frame_kwargs,
+                combined_audio,
+                output_path,
+                self._content_key(theme, script_data, conversations),
+                enable_subtitles,
+                conversation_mode,
+                sections,
+                progress_callback,
+                reporter,
             )
 
-            temp_video_path = output_path.replace(".mp4", "_temp.mp4")
-
-            success = self.frame_generator.generate_video_frames(
-                total_frames=total_frames,
-                conversations=conversations,
-                audio_file_list=audio_file_list,
-                segment_audio_intensities=segment_audio_intensities,
-                backgrounds=backgrounds,
-                character_images=character_images,
-                blink_timings=blink_timings,
-                subtitle_lines=subtitle_lines,
-                conversation_mode=conversation_mode,
-                temp_video_path=temp_video_path,
-                item_images=item_images,
-                sections=sections,
-                progress_callback=progress_callback,
-            )
+            if not final_output_path:
+                # フレームごとの描画内容を事前にコンパイル
+                plan = self.frame_generator.compile_plan(**frame_kwargs)
+                frame_kwargs["plan"] = plan
+                logger.info(f"Render plan: {plan.summary()}")
+                frame_kwargs["progress_callback"] = progress_callback
 
-            if not success:
-                return None
+                temp_video_path = os.path.join(
+                    work_dir,
+                    os.path.basename(output_path).replace(".mp4", "_temp.mp4"),
+                )
 
-            final_output_path = combine_video_with_audio(
-                temp_video_path, combined_audio, output_path
-            )
+                final_output_path = self._render_and_encode(
+                    frame_kwargs,
+                    combined_audio,
+                    temp_video_path,
+                    output_path,
+                    theme=theme,
+                    script_data=script_data,
+                    progress_reporter=reporter,
+                )
+            if not final_output_path:
+                return None
 
             self.audio_combiner.cleanup_audio_clips(combined_audio, audio_clips)
+            logger.info(f"Audio segment store: {self.audio_store.stats()}")
+            self.audio_store.clear()
 
             # BGMキャッシュのクリア
             if sections:
                 self.bgm_mixer.clear_cache()
 
-            if os.path.exists(temp_video_path):
-                os.remove(temp_video_path)
-
             # 音声ファイルのクリーンアップ
             FileManager.cleanup_audio_files(audio_file_list)
 
@@ -151,6 +305,8 @@ class VideoGenerator:
 
         except Exception as e:
             logger.error(f"Video generation failed: {e}")
+            self.stop_streaming()
+            self.audio_store.clear()
             # エラー時もBGMキャッシュをクリア
             if sections:
                 try:
@@ -164,17 +320,336 @@ class VideoGenerator:
                 logger.warning(f"Failed to cleanup audio files on error: {cleanup_error}")
             return None
 
+    def plan_conversation_video(
+        self,
+        conversations: List[Dict],
+        audio_file_list: List[str],
+        enable_subtitles: bool = True,
+        conversation_mode: str = "duo",
+        sections: Optional[List[VideoSection]] = None,
+        theme: Optional[str] = None,
+        script_data: Optional[Dict] = None,
+    ) -> Optional[RenderPlan]:
+        """描画せずにレンダープランだけを作成する（ドライラン）
+
+        音声の結合・解析までは本番と同じ処理を行うため、summary() で
+        フレーム数や見た目の種類数などを描画前に確認できる。
+        音声ファイルは削除しない。
+        """
+        job = self._prepare_render_job(
+            conversations,
+            audio_file_list,
+            enable_subtitles,
+            conversation_mode,
+            sections,
+            theme,
+            script_data,
+        )
+        if job is None:
+            return None
+        frame_kwargs, combined_audio, audio_clips = job
+
+        try:
+            return self.frame_generator.compile_plan(**frame_kwargs)
+        finally:
+            self.audio_combiner.cleanup_audio_clips(combined_audio, audio_clips)
+            self.audio_store.clear()
+            if sections:
+                self.bgm_mixer.clear_cache()
+
+    def _prepare_render_job(
+        self,
+        conversations: List[Dict],
+        audio_file_list: List[str],
+        enable_subtitles: bool,
+        conversation_mode: str,
+        sections: Optional[List[VideoSection]],
+        theme: Optional[str],
+        script_data: Optional[Dict],
+        progress_reporter: Optional[ProgressReporter] = None,
+    ) -> Optional[Tuple[Dict, object, List]]:
+        """リソース読込・音声結合・解析を行い、フレーム生成引数を組み立てる
+
+        Returns:
+            (フレーム生成引数, 結合済み音声, 音声クリップ一覧)。失敗時は None
+        """
+        character_images, backgrounds, item_images = self._take_resources(
+            theme, script_data, conversations
+        )
+
+        if not self.resource_manager.validate_resources(
+            character_images, backgrounds
+        ):
+            return None
+
+        reporter = progress_reporter or ProgressReporter()
+        reporter.start_stage("bgm")
+        combined_audio, audio_clips, audio_durations = (
+            self.audio_combiner.combine_audio_files(audio_file_list)
+        )
+        if combined_audio is None:
+            return None
+
+        if sections:
+            section_durations = calculate_section_durations(
+                sections, audio_durations, audio_file_list
+            )
+            combined_audio = self.bgm_mixer.mix_bgm_with_voiceover(
+                combined_audio, sections, section_durations
+            )
+
+        reporter.start_stage("analysis")
+        actual_total_duration = combined_audio.duration
+        total_frames = int(actual_total_duration * self.fps)
+
+        subtitle_lines = self.subtitle_generator.generate_subtitles(
+            conversations,
+            audio_file_list,
+            backgrounds,
+            enable_subtitles,
+            audio_durations,
+        )
+
+        segment_audio_intensities = self.audio_combiner.analyze_audio_segments(
+            audio_file_list, self._take_streamed_analysis()
+        )
+
+        # 行ごとに決まる瞬き（音声合成と並行して描画した区間と一致させる）
+        blink_timings = self.resource_manager.generate_segment_blink_timings(
+            segment_audio_intensities
+        )
+
+        frame_kwargs = dict(
+            total_frames=total_frames,
+            conversations=conversations,
+            audio_file_list=audio_file_list,
+            segment_audio_intensities=segment_audio_intensities,
+            backgrounds=backgrounds,
+            character_images=character_images,
+            blink_timings=blink_timings,
+            subtitle_lines=subtitle_lines,
+            conversation_mode=conversation_mode,
+            item_images=item_images,
+            sections=sections,
+            progress_callback=None,
+            audio_durations=audio_durations,
+        )
+        return frame_kwargs, combined_audio, audio_clips
+
+    def _load_resources(
+        self,
+        theme: Optional[str],
+        script_data: Optional[Dict],
+        conversations: Optional[List[Dict]] = None,
+    ) -> Tuple[Optional[Dict], Optional[Dict], Dict]:
+        """キャラクター・背景・アイテム画像を読み込む"""
+        started = time.perf_counter()
+        character_images = self.resource_manager.load_character_images()
+        backgrounds = self.resource_manager.load_backgrounds(
+            theme=theme, script_data=script_data, conversations=conversations
+        )
+        item_images = self.resource_manager.load_item_images()
+        self.pipeline_stats["resource_load_seconds"] = round(
+            time.perf_counter() - started, 3
+        )
+        if self._render_context is not None:
+            self.pipeline_stats["render_context"] = self._render_context.stats()
+        return character_images, backgrounds, item_images
+
+    def _take_resources(
+        self,
+        theme: Optional[str],
+        script_data: Optional[Dict],
+        conversations: Optional[List[Dict]] = None,
+    ) -> Tuple[Optional[Dict], Optional[Dict], Dict]:
+        """先読みした素材があれば使い、なければここで読み込む"""
+        future = self._resource_future
+        self._resource_future = None
+        if future is not None and self._streaming_key == self._content_key(
+            theme, script_data, conversations
+        ):
+            started = time.perf_counter()
+            try:
+                resources = future.result()
+                self.pipeline_stats["resource_wait_seconds"] = round(
+                    time.perf_counter() - started, 3
+                )
+                return resources
+            except Exception as e:
+                logger.warning(f"Resource prefetch failed, loading again: {e}")
+        return self._load_resources(theme, script_data, conversations)
+
+    def _take_streamed_analysis(self) -> Dict[str, Tuple[List[float], float]]:
+        """音声合成と並行して解析した結果を取得（残りの解析を待つ）"""
+        analyzer = self._audio_analyzer
+        self._audio_analyzer = None
+        if analyzer is None:
+            return {}
+        started = time.perf_counter()
+        analyzed = analyzer.finish()
+        self.pipeline_stats["analysis_wait_seconds"] = round(
+            time.perf_counter() - started, 3
+        )
+        self.pipeline_stats["streamed_analysis"] = analyzer.stats()
+        logger.info(f"Streaming analysis: {self.pipeline_stats}")
+        return analyzed
+
+    def _finish_streamed_render(
+        self,
+        frame_kwargs: Dict,
+        combined_audio,
+        output_path: str,
+        content_key: str,
+        enable_subtitles: bool,
+        conversation_mode: str,
+        sections: Optional[List[VideoSection]],
+        progress_callback=None,
+        progress_reporter: Optional[ProgressReporter] = None,
+    ) -> Optional[str]:
+        """音声合成と並行して描画した映像の残りを描画し、音声を多重化する
+
+        並行描画をしていない・入力や設定が start_streaming() と異なる・
+        描画済みの区間が最終的なタイムラインと一致しない場合は None
+        （呼び出し側で最初から描画する）。
+        """
+        renderer = self._stream_renderer
+        self._stream_renderer = None
+        if renderer is None:
+            return None
+        if content_key != self._streaming_key or not renderer.matches_settings(
+            enable_subtitles, conversation_mode, sections
+        ):
+            logger.warning("Streaming render inputs changed, rendering again")
+            renderer.abort()
+            return None
+
+        video_path = renderer.finish(frame_kwargs, progress_callback)
+        self.pipeline_stats["streamed_render"] = renderer.stats()
+        logger.info(f"Streaming render: {self.pipeline_stats['streamed_render']}")
+        if video_path is None:
+            return None
+        self.render_stats = self.frame_generator.last_render_stats
+
+        reporter = progress_reporter or ProgressReporter()
+        reporter.start_stage("mux")
+        try:
+            return combine_video_with_audio(
+                video_path, combined_audio, output_path, copy_video=True
+            )
+        except Exception as e:
+            logger.warning(f"Muxing the streamed video failed, rendering again: {e}")
+            return None
+        finally:
+            if os.path.exists(video_path):
+                os.remove(video_path)
+
+    def _render_and_encode(
+        self,
+        frame_kwargs: Dict,
+        combined_audio,
+        temp_video_path: str,
+        output_path: str,
+        theme: Optional[str] = None,
+        script_data: Optional[Dict] = None,
+        progress_reporter: Optional[ProgressReporter] = None,
+    ) -> Optional[str]:
+        """フレームを描画してエンコードする
+
+        ffmpegパイプが使える場合は生フレームと音声を一度のエンコードで
+        最終MP4へ書き出す。VIDEO_RENDER_WORKERS が2以上ならフレーム範囲を
+        分割して並列に描画する。失敗した場合は従来の VideoWriter +
+        再エンコードの経路にフォールバックする。
+        """
+        reporter = progress_reporter or ProgressReporter()
+        if (
+            RENDER_CONFIG.encoder_backend == "ffmpeg_pipe"
+            and FFmpegPipeEncoder.is_available()
+        ):
+            temp_audio_path = get_temp_audio_path(temp_video_path)
+            try:
+                write_audio_track(combined_audio, temp_audio_path)
+
+                render_workers = RENDER_CONFIG.get_render_workers()
+                if render_workers > 1:
+                    renderer = ParallelFrameRenderer(self.fps, render_workers)
+                    if renderer.render(
+                        self.frame_generator,
+                        frame_kwargs,
+                        output_path,
+                        temp_audio_path,
+                        theme=theme,
+                        script_data=script_data,
+                        progress_reporter=reporter,
+                        work_dir=os.path.dirname(temp_video_path),
+                    ):
+                        self.render_stats = renderer.render_stats
+                        return output_path
+                    logger.warning(
+                        "Parallel rendering unavailable, falling back to serial rendering"
+                    )
+
+                encoder = create_ffmpeg_encoder(
+                    output_path,
+                    self.fps,
+                    self.video_processor.resolution,
+                    audio_path=temp_audio_path,
+                )
+                if self.frame_generator.generate_video_frames(
+                    temp_video_path=temp_video_path, encoder=encoder, **frame_kwargs
+                ):
+                    self.render_stats = self.frame_generator.last_render_stats
+                    return output_path
+                logger.warning(
+                    "ffmpeg pipe encoding failed, falling back to VideoWriter"
+                )
+            finally:
+                if os.path.exists(temp_audio_path):
+                    os.remove(temp_audio_path)
+
+        if not self.frame_generator.generate_video_frames(
+            temp_video_path=temp_video_path, **frame_kwargs
+        ):
+            return None
+        self.render_stats = self.frame_generator.last_render_stats
+
+        reporter.start_stage("mux")
+        try:
+            return combine_video_with_audio(
+                temp_video_path, combined_audio, output_path
+            )
+        finally:
+            if os.path.exists(temp_video_path):
+                os.remove(temp_video_path)
+
     def cleanup(self):
-        """メモリリソースのクリーンアップ"""
+        """メモリリソースのクリーンアップ
+
+        共有の RenderContext を使っている場合、フォント・スプライト・背景は
+        次のタスクのために残し、使用中の状態だけを解除する。
+        """
         try:
+            self.stop_streaming()
+            self.audio_store.clear()
+
             # BGMキャッシュのクリア
             if hasattr(self, "bgm_mixer") and self.bgm_mixer:
                 self.bgm_mixer.clear_cache()
 
+            if self._render_context is not None:
+                self.video_processor.clear_layer_cache()
+                self.video_processor.clear_subtitle_panel_cache()
+                self._render_context.release()
+                self._render_context = None
+                gc.collect()
+                return
+
             if hasattr(self.video_processor, "_resize_cache"):
                 cache_size = len(self.video_processor._resize_cache)
                 self.video_processor._resize_cache.clear()
 
+            if hasattr(self.video_processor, "_layer_cache"):
+                self.video_processor.clear_layer_cache()
+
             try:
                 from app.core.processors.video_processor.video_processor_image_loader import (
                     _load_character_images_cached,
@@ -185,6 +660,9 @@ class VideoGenerator:
             except Exception as e:
                 logger.warning(f"Failed to clear LRU cache: {e}")
 
+            if hasattr(self.video_processor, "_subtitle_panel_cache"):
+                self.video_processor.clear_subtitle_panel_cache()
+
             if hasattr(self.video_processor, "_cached_font"):
                 self.video_processor._cached_font = None
 
@@ -4,29 +4,49 @@ import os
 import subprocess
 import logging
 from typing import List, Dict
+from app.config import RENDER_CONFIG
 from app.models.scripts.common import VideoSection
 
 logger = logging.getLogger(__name__)
 
 
+def get_temp_audio_path(temp_video_path: str) -> str:
+    """一時動画パスに対応する一時音声パスを取得する"""
+    return temp_video_path.replace("_temp.mp4", "_temp_audio.wav")
+
+
+def write_audio_track(combined_audio, audio_path: str) -> str:
+    """合成済み音声をWAVとして書き出す"""
+    combined_audio.write_audiofile(
+        audio_path, fps=RENDER_CONFIG.audio_sample_rate, logger=None
+    )
+    return audio_path
+
+
 def combine_video_with_audio(
-    temp_video_path: str, combined_audio, output_path: str
+    temp_video_path: str, combined_audio, output_path: str, copy_video: bool = False
 ) -> str:
-    """動画と音声を結合する（ffmpegで映像ストリームコピー）"""
-    temp_audio_path = temp_video_path.replace("_temp.mp4", "_temp_audio.wav")
-    combined_audio.write_audiofile(temp_audio_path, fps=44100, logger=None)
+    """動画と音声を結合する（cv2.VideoWriterの一時動画をlibx264で再エンコード）
+
+    copy_video=True の場合は映像を再エンコードせずに多重化する（ffmpegパイプで
+    書き出した映像のみの一時動画用）。
+    """
+    temp_audio_path = write_audio_track(
+        combined_audio, get_temp_audio_path(temp_video_path)
+    )
+    profile = RENDER_CONFIG.get_encoder_profile()
 
     try:
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", temp_video_path,
-            "-i", temp_audio_path,
-            "-c:v", "libx264", "-preset", "ultrafast", "-crf", "23",
-            "-c:a", "aac",
-            "-movflags", "+faststart",
-            "-shortest",
-            output_path,
-        ]
+        cmd = ["ffmpeg", "-y", "-i", temp_video_path, "-i", temp_audio_path]
+        if copy_video:
+            cmd += ["-c:v", "copy"]
+        else:
+            cmd += ["-c:v", "libx264", "-preset", profile.preset, "-crf", str(profile.crf)]
+        cmd += ["-c:a", "aac", "-movflags", "+faststart"]
+        # VFRの映像は末尾の重複フレームも破棄され短くなるため、音声を切り詰めない
+        if not (copy_video and RENDER_CONFIG.frame_rate_mode == "vfr"):
+            cmd += ["-shortest"]
+        cmd += [output_path]
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
         if result.returncode != 0:
             logger.error(f"ffmpeg failed: {result.stderr}")
@@ -1,5 +1,6 @@
 """Video generation Celery tasks"""
 from celery import Task
+from celery.signals import worker_init, worker_process_init
 from typing import Dict, Any, List, Optional
 import logging
 import os
@@ -7,15 +8,56 @@ import json
 from threading import Thread
 from pathlib import Path
 
+from app.config import BGM_CACHE_CONFIG, RENDER_CONFIG
 from app.tasks.celery_app import celery_app
+from app.services.bgm_cache import preload_bgm_cache
+from app.services.video.render_context import get_render_context, warm_render_context
 from app.services.video.video_generator import VideoGenerator
 from app.core.asset_generators.voice_generator import VoiceGenerator
 from app.models.scripts.common import VideoSection
 from app.utils.files import FileManager
+from app.utils.progress_reporter import ProgressReporter
+from app.utils.workspace import JobWorkspace
 
 logger = logging.getLogger(__name__)
 
 
+@worker_init.connect
+def _build_shared_assets(**kwargs) -> None:
+    """ワーカーの親プロセスでスプライトアトラスを作成しておく
+
+    子プロセスは作成済みのアトラスを mmap するだけになる。
+    """
+    if not RENDER_CONFIG.sprite_atlas:
+        return
+    try:
+        from app.core.processors.video_processor import VideoProcessor
+        from app.core.processors.video_processor.sprite_atlas import build_sprite_atlas
+
+        build_sprite_atlas(VideoProcessor())
+    except Exception as e:
+        logger.warning(f"Sprite atlas build failed: {e}")
+
+
+def _warm_worker_resources() -> None:
+    if BGM_CACHE_CONFIG.preload:
+        preload_bgm_cache(RENDER_CONFIG.audio_sample_rate)
+    if RENDER_CONFIG.context_preload:
+        warm_render_context()
+
+
+@worker_process_init.connect
+def _preload_worker_resources(**kwargs) -> None:
+    """ワーカープロセスの起動時にBGMのPCMと描画素材を読み込んでおく
+
+    worker_process_init には完了までのタイムアウトがあるため、読み込みは
+    スレッドで行う（ジョブが先に同じ素材を要求した場合はその読み込みを待つ）。
+    """
+    Thread(
+        target=_warm_worker_resources, name="worker-preload", daemon=True
+    ).start()
+
+
 def _analyze_script_optimizations(script_data: Dict[str, Any], result_holder: Dict[str, Any]) -> None:
     """台本を分析してAI最適化ポイントを生成する（別スレッドで実行）"""
     try:
@@ -125,6 +167,19 @@ def generate_video_task(
     Returns:
         生成結果
     """
+    # 進捗は間引いてバックグラウンドスレッドから送信する。
+    # self.request はスレッドローカルのため task_id を明示する
+    task_id = self.request.id
+    progress_reporter = ProgressReporter(
+        lambda meta: self.update_state(task_id=task_id, state='PROGRESS', meta=meta)
+    )
+
+    # 一時ファイルはタスク専用の作業ディレクトリに書き出し、終了時にまとめて削除する
+    # （同じワーカーで並行実行される他のジョブのファイルには触れない）
+    JobWorkspace.cleanup_stale()
+    workspace = JobWorkspace(task_id or "local").create()
+    video_generator = None
+
     try:
         logger.info(f"動画生成タスク開始 (task_id={self.request.id})")
         logger.info(f"会話数={len(conversations)}")
@@ -141,12 +196,31 @@ def generate_video_task(
             analysis_thread.start()
             logger.info("台本分析スレッド開始（動画生成と並列実行）")
 
-        # 進捗更新: 音声生成開始
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 0.1, 'message': '音声を生成中...'}
+        # セクション情報の変換
+        video_sections = None
+        if sections:
+            from app.models.scripts.common import VideoSection
+            video_sections = [VideoSection(**section) for section in sections]
+            total_segments = sum(len(section.segments) for section in video_sections)
+            logger.info(
+                f"セクション情報変換完了: "
+                f"セクション数={len(video_sections)}, "
+                f"総セグメント数={total_segments}"
+            )
+
+        # 素材の読み込みと口パク解析、先頭の行からの映像の描画は音声合成と並行して進める
+        # フォント・スプライトはワーカープロセス内でタスク間で共有し、背景は台本が参照するものだけを読み込む
+        video_generator = VideoGenerator(render_context=get_render_context())
+        video_generator.start_streaming(
+            theme=theme,
+            script_data=script_data,
+            work_dir=workspace.path,
+            conversations=conversations,
+            enable_subtitles=enable_subtitles,
+            conversation_mode=conversation_mode,
+            sections=video_sections,
         )
-        
+
         # 音声生成
         voice_generator = VoiceGenerator()
         audio_file_list = None
@@ -155,11 +229,15 @@ def generate_video_task(
                 conversations=conversations,
                 speed=speed,
                 pitch=pitch,
-                intonation=intonation
+                intonation=intonation,
+                output_dir=workspace.audio_dir,
+                progress_callback=progress_reporter.stage_callback("voice"),
+                on_voice_ready=video_generator.on_voice_ready,
             )
 
             if not audio_file_list:
                 raise ValueError("音声生成に失敗しました")
+            workspace.check_quota("voice")
 
             logger.info(
                 f"音声生成完了: "
@@ -167,6 +245,7 @@ def generate_video_task(
                 f"音声ファイル数={len(audio_file_list)}"
             )
         except Exception as e:
+            video_generator.stop_streaming()
             # 音声生成失敗時は既に生成されたファイルがあれば削除
             if audio_file_list:
                 try:
@@ -175,64 +254,30 @@ def generate_video_task(
                     pass
             raise
         
-        # 進捗更新: 動画生成開始
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 0.4, 'message': '動画を生成中...'}
-        )
-        
-        # セクション情報の変換
-        video_sections = None
-        if sections:
-            from app.models.scripts.common import VideoSection
-            video_sections = [VideoSection(**section) for section in sections]
-            total_segments = sum(len(section.segments) for section in video_sections)
-            logger.info(
-                f"セクション情報変換完了: "
-                f"セクション数={len(video_sections)}, "
-                f"総セグメント数={total_segments}, "
-                f"音声ファイル数={len(audio_file_list)}"
-            )
-        
         # 動画生成
-        video_generator = VideoGenerator()
-        
-        def progress_callback(progress: float):
-            """進捗コールバック"""
-            self.update_state(
-                state='PROGRESS',
-                meta={
-                    'progress': 0.4 + (progress * 0.5),  # 40%から90%まで
-                    'message': f'動画を生成中... ({int(progress * 100)}%)'
-                }
-            )
-        
         output_path = video_generator.generate_conversation_video(
             conversations=conversations,
             audio_file_list=audio_file_list,
+            output_path=workspace.output_path(),
             enable_subtitles=enable_subtitles,
             conversation_mode=conversation_mode,
             sections=video_sections,
-            progress_callback=progress_callback,
+            progress_reporter=progress_reporter,
             theme=theme,
-            script_data=script_data
+            script_data=script_data,
+            work_dir=workspace.path,
         )
         
         if not output_path or not os.path.exists(output_path):
             raise ValueError("動画生成に失敗しました")
+        workspace.check_quota("video")
         
         # 進捗更新: 完了
-        self.update_state(
-            state='PROGRESS',
-            meta={'progress': 1.0, 'message': '動画生成完了！'}
-        )
+        progress_reporter.complete('動画生成完了！')
+        progress_reporter.close()
         
-        video_generator.cleanup()
-        
-        try:
-            FileManager.cleanup_temp_files()
-        except Exception as cleanup_error:
-            logger.warning(f"Failed to cleanup temp files: {cleanup_error}")
+        render_stats = video_generator.render_stats
+        pipeline_stats = video_generator.pipeline_stats
         
         # 台本分析スレッドの完了を待機
         if analysis_thread is not None:
@@ -250,9 +295,15 @@ def generate_video_task(
             'video_path': api_video_path,
             'message': '動画生成が完了しました',
             'ai_optimizations': optimization_result.get('points', []),
+            'render_stats': render_stats,
+            'voice_stats': voice_generator.synthesis_stats,
+            'pipeline_stats': pipeline_stats,
+            'workspace': workspace.stats(),
         }
         
     except Exception as e:
+        # FAILURE の後に PROGRESS で上書きされないよう先に通知スレッドを止める
+        progress_reporter.close()
         logger.error(f"動画生成タスクエラー (task_id={self.request.id}): {str(e)}", exc_info=True)
         # エラー時も音声ファイルをクリーンアップ
         if 'audio_file_list' in locals() and audio_file_list:
@@ -272,6 +323,12 @@ def generate_video_task(
         # 元の例外をそのまま再発生させる
         raise
 
+    finally:
+        # 失敗時も共有の描画コンテキストを次のタスクのために解放する
+        if video_generator is not None:
+            video_generator.cleanup()
+        workspace.cleanup()
+
 
 @celery_app.task(bind=True, name='app.tasks.generate_voice')
 def generate_voice_task(
@@ -0,0 +1,217 @@
+"""進捗通知ユーティリティ
+
+動画生成の各ステージの進捗を受け取り、一定間隔・一定の変化量ごとにまとめて
+通知先（Celery の update_state など）へ送る。update() は最新値を保持するだけで、
+実際の送信はバックグラウンドスレッドで行うため、描画ループから毎フレーム
+呼び出しても Redis への書き込みは数百ミリ秒に1回程度に抑えられる。
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 通知の最小間隔（秒）
+DEFAULT_MIN_INTERVAL = 0.5
+# 通知する全体進捗の最小変化量
+DEFAULT_MIN_DELTA = 0.01
+# ETAを算出し始めるステージ内進捗（序盤の推定値は振れが大きいため）
+MIN_FRACTION_FOR_ETA = 0.02
+
+
+@dataclass(frozen=True)
+class ProgressStage:
+    """進捗ステージ（全体進捗のうち start〜end の区間を占める）"""
+
+    name: str
+    start: float
+    end: float
+    message: str
+
+
+# 動画生成タスクのステージ
+VIDEO_PIPELINE_STAGES = (
+    ProgressStage("voice", 0.1, 0.4, "音声を生成中..."),
+    ProgressStage("bgm", 0.4, 0.45, "音声を結合中..."),
+    ProgressStage("analysis", 0.45, 0.5, "音声を解析中..."),
+    ProgressStage("frames", 0.5, 0.9, "動画を生成中..."),
+    ProgressStage("mux", 0.9, 1.0, "動画を書き出し中..."),
+)
+
+
+class ProgressReporter:
+    """間引き・集約つきの進捗通知
+
+    publish が None の場合は何もしない（通知先のない呼び出し元向け）。
+    close() で残りの進捗を送信してスレッドを終了する。
+    """
+
+    def __init__(
+        self,
+        publish: Optional[Callable[[Dict[str, Any]], None]] = None,
+        stages: Iterable[ProgressStage] = VIDEO_PIPELINE_STAGES,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        min_delta: float = DEFAULT_MIN_DELTA,
+    ):
+        self.publish = publish
+        self.stages = {stage.name: stage for stage in stages}
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._started_at = time.monotonic()
+
+        self._stage: Optional[ProgressStage] = None
+        self._stage_started_at = self._started_at
+        self._fraction = 0.0
+        self._message: Optional[str] = None
+        self._progress = 0.0
+        # 次回の送信で間引きせずに送る（ステージ切り替え・完了時）
+        self._force = False
+        self._dirty = False
+
+        self._last_published: Optional[Dict[str, Any]] = None
+        self._last_published_at = 0.0
+        self.published_count = 0
+
+        self._thread: Optional[threading.Thread] = None
+        if publish is not None:
+            self._thread = threading.Thread(
+                target=self._run, name="progress-reporter", daemon=True
+            )
+            self._thread.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.publish is not None
+
+    def start_stage(self, name: str, message: Optional[str] = None) -> None:
+        """ステージを開始する（即座に通知される）"""
+        stage = self.stages[name]
+        with self._lock:
+            self._stage = stage
+            self._stage_started_at = time.monotonic()
+            self._fraction = 0.0
+            self._message = message
+            self._progress = max(self._progress, stage.start)
+            self._force = True
+            self._dirty = True
+        self._wake.set()
+
+    def update(self, fraction: float, message: Optional[str] = None) -> None:
+        """現在のステージの進捗（0.0〜1.0）を更新する
+
+        最新値を記録するだけなので描画ループ内から呼び出してよい。
+        """
+        if self.publish is None or self._stage is None:
+            return
+        fraction = min(max(fraction, 0.0), 1.0)
+        with self._lock:
+            stage = self._stage
+            self._fraction = fraction
+            if message is not None:
+                self._message = message
+            # 全体進捗は後退させない
+            self._progress = max(
+                self._progress, stage.start + (stage.end - stage.start) * fraction
+            )
+            self._dirty = True
+
+    def stage_callback(self, name: str) -> Callable[[float], None]:
+        """ステージを開始し、その進捗を受け取るコールバックを返す"""
+        self.start_stage(name)
+        return self.update
+
+    def complete(self, message: str) -> None:
+        """全体を完了として通知する"""
+        with self._lock:
+            self._progress = 1.0
+            self._fraction = 1.0
+            self._message = message
+            self._force = True
+            self._dirty = True
+        self._wake.set()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """未送信の進捗を送信してスレッドを停止する"""
+        if self._thread is None:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """現在の進捗を通知用の辞書として取得"""
+        with self._lock:
+            return self._build_meta(time.monotonic())
+
+    def _build_meta(self, now: float) -> Dict[str, Any]:
+        stage = self._stage
+        message = self._message
+        if message is None and stage is not None:
+            message = stage.message
+            if 0.0 < self._fraction < 1.0:
+                message = f"{message} ({int(self._fraction * 100)}%)"
+
+        eta_seconds = None
+        if stage is not None and MIN_FRACTION_FOR_ETA <= self._fraction < 1.0:
+            stage_elapsed = now - self._stage_started_at
+            eta_seconds = round(
+                stage_elapsed * (1.0 - self._fraction) / self._fraction, 1
+            )
+
+        return {
+            "progress": round(self._progress, 4),
+            "message": message or "処理中...",
+            "stage": stage.name if stage is not None else None,
+            "stage_progress": round(self._fraction, 4),
+            "eta_seconds": eta_seconds,
+            "elapsed_seconds": round(now - self._started_at, 1),
+        }
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.min_interval)
+            self._wake.clear()
+            closed = self._closed
+            self._flush(force=closed)
+            if closed:
+                return
+
+    def _flush(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty:
+                return
+            force = force or self._force
+            last = self._last_published
+            if not force and last is not None:
+                if now - self._last_published_at < self.min_interval:
+                    return
+                if (
+                    self._progress - last["progress"] < self.min_delta
+                    and self._message == last.get("_message")
+                ):
+                    return
+            meta = self._build_meta(now)
+            raw_message = self._message
+            self._force = False
+            self._dirty = False
+
+        try:
+            self.publish(meta)
+        except Exception as e:
+            # 進捗通知の失敗で動画生成は止めない
+            logger.warning(f"Progress publish failed: {e}")
+            return
+
+        self._last_published = dict(meta, _message=raw_message)
+        self._last_published_at = now
+        self.published_count += 1
@@ -0,0 +1,150 @@
+"""ジョブごとの作業ディレクトリ
+
+Celery ワーカーが複数のジョブを同時に処理しても一時ファイルが衝突しないよう、
+タスクIDごとに専用の作業ディレクトリを用意する。ジョブ終了時はその
+ディレクトリだけを削除し、共有の temp ディレクトリには触れない。
+"""
+
+import os
+import shutil
+import time
+from typing import Optional
+
+from app.config.app import Paths, WORKSPACE_CONFIG
+from app.utils.files import FileManager
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WorkspaceQuotaExceededError(RuntimeError):
+    """作業ディレクトリの使用量が上限を超えた"""
+
+
+class JobWorkspace:
+    """タスクIDをキーにした作業ディレクトリ
+
+    with 文で使用すると終了時に作業ディレクトリごと削除する。
+    出力動画は共有の outputs ディレクトリに一意な名前で書き出す。
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        backing: Optional[str] = None,
+        quota_mb: Optional[int] = None,
+    ):
+        self.job_id = job_id
+        self.quota_bytes = (
+            WORKSPACE_CONFIG.quota_mb if quota_mb is None else quota_mb
+        ) * 1024 * 1024
+        self.root = self._resolve_root(backing or WORKSPACE_CONFIG.backing)
+        self.path = os.path.join(self.root, job_id)
+        self.peak_bytes = 0
+
+    def _resolve_root(self, backing: str) -> str:
+        """作業ディレクトリの親ディレクトリを決定する"""
+        if backing == "tmpfs":
+            tmpfs_root = WORKSPACE_CONFIG.tmpfs_root
+            try:
+                os.makedirs(tmpfs_root, exist_ok=True)
+                free_bytes = shutil.disk_usage(tmpfs_root).free
+                if free_bytes >= self.quota_bytes:
+                    return tmpfs_root
+                logger.warning(
+                    f"tmpfs has only {free_bytes / (1024 * 1024):.0f}MB free, "
+                    "falling back to disk workspace"
+                )
+            except OSError as e:
+                logger.warning(f"tmpfs workspace unavailable ({e}), using disk")
+        return Paths.get_jobs_dir()
+
+    @property
+    def audio_dir(self) -> str:
+        """音声ファイルの書き出し先"""
+        return os.path.join(self.path, "audio")
+
+    def create(self) -> "JobWorkspace":
+        os.makedirs(self.audio_dir, exist_ok=True)
+        logger.info(f"Job workspace created: {self.path}")
+        return self
+
+    def output_path(self, prefix: str = "conversation_video") -> str:
+        """共有の出力ディレクトリ内に一意な出力ファイルパスを作成"""
+        outputs_dir = Paths.get_outputs_dir()
+        os.makedirs(outputs_dir, exist_ok=True)
+        return os.path.join(
+            outputs_dir, FileManager.generate_unique_filename(prefix, "mp4")
+        )
+
+    def usage_bytes(self) -> int:
+        """作業ディレクトリの現在の使用量を取得"""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    # 集計中に削除された一時ファイル
+                    pass
+        return total
+
+    def check_quota(self, stage: str = "") -> int:
+        """使用量を記録し、上限を超えていれば例外を送出する
+
+        Returns:
+            現在の使用量（バイト）
+        """
+        usage = self.usage_bytes()
+        self.peak_bytes = max(self.peak_bytes, usage)
+        if self.quota_bytes > 0 and usage > self.quota_bytes:
+            raise WorkspaceQuotaExceededError(
+                f"Job workspace quota exceeded after {stage or 'unknown stage'}: "
+                f"{usage / (1024 * 1024):.0f}MB > "
+                f"{self.quota_bytes / (1024 * 1024):.0f}MB"
+            )
+        return usage
+
+    def stats(self) -> dict:
+        """使用量の統計（タスク結果に含める）"""
+        return {
+            "path": self.path,
+            "peak_mb": round(self.peak_bytes / (1024 * 1024), 1),
+            "quota_mb": self.quota_bytes // (1024 * 1024),
+        }
+
+    def cleanup(self) -> None:
+        """作業ディレクトリを削除する"""
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+            logger.info(f"Job workspace removed: {self.path}")
+
+    def __enter__(self) -> "JobWorkspace":
+        return self.create()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup()
+
+    @staticmethod
+    def cleanup_stale(max_age_seconds: Optional[int] = None) -> int:
+        """異常終了したジョブの古い作業ディレクトリを削除する"""
+        if max_age_seconds is None:
+            max_age_seconds = WORKSPACE_CONFIG.stale_seconds
+        deadline = time.time() - max_age_seconds
+
+        removed = 0
+        for root in (Paths.get_jobs_dir(), WORKSPACE_CONFIG.tmpfs_root):
+            if not os.path.isdir(root):
+                continue
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                try:
+                    if os.path.isdir(path) and os.path.getmtime(path) < deadline:
+                        shutil.rmtree(path, ignore_errors=True)
+                        removed += 1
+                except OSError:
+                    continue
+
+        if removed:
+            logger.info(f"Removed {removed} stale job workspace(s)")
+        return removed
@@ -0,0 +1,118 @@
+"""口パク解析（AudioProcessor）のベンチマーク
+
+合成した 24kHz のセリフ音声（既定 100 行）を、従来の解析
+（AudioFileClip で音声長を取得し librosa.load で 22.05kHz にリサンプリング、
+librosa.feature.rms）と、現在の解析（soundfile で1回だけデコードし、従来と同じ
+フレーム分割で frame_rms を計算）の1行ずつ・analyze_audio_batch で比較する。
+強度列は全行で従来とフレーム数が一致し、差が TOLERANCE 以内であることを確認する。
+
+実行方法（backend ディレクトリで、ffmpeg が PATH にあること）:
+    python benchmarks/bench_lipsync_analysis.py --lines 100
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import librosa
+import numpy as np
+import soundfile
+from moviepy import AudioFileClip
+from scipy import signal
+
+from app.core.processors.audio_processor import AudioProcessor
+
+SAMPLE_RATE = 24000
+FPS = 30
+# 従来の強度列との差の許容値（tests/test_audio_processor.py と同じ）
+TOLERANCE = 1e-5
+
+
+def write_lines(directory: str, line_count: int, seed: int = 0):
+    """音節ごとに振幅が変わるノイズで、VOICEVOX と同じ 24kHz モノラルの WAV を作る"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(line_count):
+        frames = int(rng.uniform(1.5, 6.0) * SAMPLE_RATE)
+        syllables = np.repeat(rng.uniform(0, 1, frames // 2400 + 1), 2400)[:frames]
+        y = (rng.standard_normal(frames) * 0.2 * syllables).astype(np.float32)
+        path = os.path.join(directory, f"line_{i:04d}.wav")
+        soundfile.write(path, y, SAMPLE_RATE, subtype="PCM_16")
+        paths.append(path)
+    return paths
+
+
+def legacy_analyze(audio_path: str, fps: int):
+    """user-022 以前の AudioProcessor._analyze_audio（ストアなしの経路）"""
+    audio_clip = AudioFileClip(audio_path)
+    actual_duration = audio_clip.duration
+    audio_clip.close()
+    y, sr = librosa.load(audio_path)
+    target_frames = max(1, int(actual_duration * fps))
+    hop_length = max(1, int(sr * actual_duration / target_frames))
+    frame_length = min(hop_length * 2, len(y))
+    rms = librosa.feature.rms(y=y, hop_length=hop_length, frame_length=frame_length)[0]
+    if len(rms) != target_frames:
+        rms = signal.resample(rms, target_frames)
+    rms_max = np.max(rms)
+    rms = rms / rms_max if rms_max > 0 else np.zeros_like(rms)
+    return rms.tolist(), actual_duration
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100)
+    args = parser.parse_args()
+
+    processor = AudioProcessor(fps=FPS)
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_lines(directory, args.lines)
+        # ファイルをページキャッシュに載せ、librosa の初回読み込みのコストを除く
+        legacy_analyze(paths[0], FPS)
+
+        legacy, legacy_seconds = timed(lambda: [legacy_analyze(p, FPS) for p in paths])
+        sequential, sequential_seconds = timed(
+            lambda: [processor._analyze_audio(p) for p in paths]
+        )
+        batched, batched_seconds = timed(lambda: processor.analyze_audio_batch(paths))
+
+    assert all(batched[p] == result for p, result in zip(paths, sequential)), (
+        "analyze_audio_batch の結果が1行ずつの解析と一致しません"
+    )
+    assert all(len(new[0]) == len(old[0]) for new, old in zip(sequential, legacy)), (
+        "強度列のフレーム数が従来の解析と一致しません"
+    )
+    diffs = np.concatenate(
+        [
+            np.abs(np.asarray(new[0]) - np.asarray(old[0]))
+            for new, old in zip(sequential, legacy)
+        ]
+    )
+    assert diffs.max() <= TOLERANCE, f"従来の解析との差 {diffs.max()} が許容値を超えています"
+
+    print(f"lines={args.lines} fps={FPS} sample_rate={SAMPLE_RATE}")
+    print(f"{'path':>22} {'seconds':>8} {'lines/s':>8}")
+    for label, seconds in (
+        ("legacy", legacy_seconds),
+        ("current, sequential", sequential_seconds),
+        ("current, batched", batched_seconds),
+    ):
+        print(f"{label:>22} {seconds:>8.2f} {args.lines / seconds:>8.1f}")
+    print(
+        f"vs legacy: same frame count for all lines, "
+        f"max |diff| {diffs.max():.2e} (tolerance {TOLERANCE:.0e})"
+    )
+
+
+if __name__ == "__main__":
+    main()
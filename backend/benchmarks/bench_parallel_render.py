@@ -0,0 +1,125 @@
+"""並列フレーム描画（ParallelFrameRenderer）のワーカー数ごとの速度のベンチマーク
+
+合成したタイムラインを、直列のパイプ描画と ParallelFrameRenderer
+（ワーカー数 2, 4, ... CPUコア数）で描画・エンコードし、
+所要時間と直列に対する速度比を表示する。
+
+フレームキャッシュが効くと描画自体がほとんど省略されるため、
+既定では VIDEO_FRAME_CACHE_MB=0 で描画コストを測る。
+
+本番と同じ条件にするため、既定では Celery の prefork ワーカーと同じ
+billiard のデーモンプロセスの中で計測する（--no-worker で直接実行）。
+
+実行方法（backend ディレクトリで、ffmpeg が PATH にあること）:
+    python benchmarks/bench_parallel_render.py --lines 60
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("VIDEO_FRAME_CACHE_MB", "0")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from billiard import Process
+
+from synthetic import synthetic_assets, synthetic_timeline
+
+from app.core.processors.video_processor import VideoProcessor
+from app.services.audio_mixer import MixedAudio
+from app.services.resource_manager import ResourceManager
+from app.services.video.frame_generator import FrameGenerator
+from app.services.video.parallel_renderer import ParallelFrameRenderer
+from app.services.video.video_encoder import create_ffmpeg_encoder
+
+
+def worker_counts(max_workers: int):
+    counts, workers = [], 2
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    if max_workers >= 2:
+        counts.append(max_workers)
+    return counts
+
+
+def run(args):
+    with synthetic_assets(), tempfile.TemporaryDirectory() as work_dir:
+        video_processor = VideoProcessor()
+        fps = video_processor.fps
+        resource_manager = ResourceManager(video_processor)
+        frame_generator = FrameGenerator(video_processor, fps)
+
+        frame_kwargs = synthetic_timeline(args.lines, fps)
+        frame_kwargs.update(
+            backgrounds=resource_manager.load_backgrounds(),
+            character_images=resource_manager.load_character_images(),
+        )
+        total_frames = frame_kwargs["total_frames"]
+        duration = total_frames / fps
+
+        audio_path = os.path.join(work_dir, "audio.wav")
+        MixedAudio(
+            np.zeros((int(duration * 44100), 2), dtype=np.float32), 44100
+        ).write_audiofile(audio_path)
+
+        print(
+            f"lines={args.lines} frames={total_frames} ({duration:.0f}s @ {fps}fps), "
+            f"cpus={os.cpu_count()}, "
+            f"daemon process={multiprocessing.current_process().daemon}"
+        )
+        print(f"{'workers':>8} {'seconds':>9} {'frames/s':>9} {'speedup':>8}")
+
+        output_path = os.path.join(work_dir, "serial.mp4")
+        started = time.perf_counter()
+        encoder = create_ffmpeg_encoder(
+            output_path, fps, video_processor.resolution, audio_path=audio_path
+        )
+        assert frame_generator.generate_video_frames(
+            temp_video_path=output_path, encoder=encoder, **frame_kwargs
+        ), "serial rendering failed"
+        serial = time.perf_counter() - started
+        print(f"{'serial':>8} {serial:>9.2f} {total_frames / serial:>9.1f} {1.0:>7.2f}x")
+
+        for workers in worker_counts(args.max_workers):
+            output_path = os.path.join(work_dir, f"parallel_{workers}.mp4")
+            renderer = ParallelFrameRenderer(fps, workers)
+            started = time.perf_counter()
+            assert renderer.render(
+                frame_generator, frame_kwargs, output_path, audio_path, work_dir=work_dir
+            ), f"parallel rendering failed (workers={workers})"
+            elapsed = time.perf_counter() - started
+            print(
+                f"{workers:>8} {elapsed:>9.2f} {total_frames / elapsed:>9.1f} "
+                f"{serial / elapsed:>7.2f}x"
+            )
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=60)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--no-worker",
+        action="store_true",
+        help="Celery ワーカーと同じデーモンプロセスではなく直接実行する",
+    )
+    args = parser.parse_args()
+
+    if args.no_worker:
+        run(args)
+        return
+    # prefork の子プロセスと同じく、multiprocessing からはデーモンプロセスに見える
+    worker = Process(target=run, args=(args,), daemon=True)
+    worker.start()
+    worker.join()
+    sys.exit(worker.exitcode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""スプライト合成カーネルのスプライトサイズごとのベンチマーク
+
+従来の float64 によるアルファ合成（背景のコピー＋チャンネルごとの演算）と、
+事前乗算アルファを使う blend_sprite（前処理はキャッシュ済み）の
+1回あたりの合成時間と、結果の最大差を表示する。
+
+実行方法（backend ディレクトリで）:
+    python benchmarks/bench_sprite_blend.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from synthetic import make_sprite
+
+from app.core.processors.video_processor.video_processor_blend import (
+    blend_sprite,
+    prepare_sprite,
+)
+
+FRAME_SIZE = (1280, 720)
+
+
+def legacy_composite(background: np.ndarray, character: np.ndarray, x: int, y: int):
+    """user-005 以前の composite_frame と同じ float64 の合成"""
+    result = background.copy()
+    char_rgb = character[:, :, :3]
+    char_alpha = character[:, :, 3] / 255.0
+    char_h, char_w = character.shape[:2]
+    bg_h, bg_w = background.shape[:2]
+    if y < 0:
+        char_rgb, char_alpha, char_h, y = char_rgb[-y:], char_alpha[-y:], char_h + y, 0
+    if x < 0:
+        char_rgb, char_alpha = char_rgb[:, -x:], char_alpha[:, -x:]
+        char_w, x = char_w + x, 0
+    char_h = min(char_h, bg_h - y)
+    char_w = min(char_w, bg_w - x)
+    char_rgb, char_alpha = char_rgb[:char_h, :char_w], char_alpha[:char_h, :char_w]
+    for c in range(3):
+        result[y : y + char_h, x : x + char_w, c] = (
+            char_alpha * char_rgb[:, :, c]
+            + (1 - char_alpha) * background[y : y + char_h, x : x + char_w, c]
+        )
+    return result
+
+
+def time_per_call(func, repeat: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["160x240", "320x480", "480x720", "640x960", "960x1300"],
+        help="スプライトサイズ（幅x高さ）",
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    frame_w, frame_h = FRAME_SIZE
+    background = np.random.default_rng(0).integers(
+        0, 256, (frame_h, frame_w, 3), dtype=np.uint8
+    )
+
+    print(f"frame={frame_w}x{frame_h}")
+    print(f"{'sprite':>10} {'legacy ms':>10} {'prepare ms':>11} {'blend ms':>9} {'speedup':>8} {'max diff':>9}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        sprite = make_sprite(width, height)
+        # 画面下端に揃えて配置（大きいスプライトは下側がはみ出す）
+        x, y = (frame_w - width) // 2, frame_h - height * 3 // 4
+
+        legacy_ms = time_per_call(
+            lambda: legacy_composite(background, sprite, x, y), args.repeat
+        )
+        prepare_ms = time_per_call(lambda: prepare_sprite(sprite), max(1, args.repeat // 10))
+        prepared = prepare_sprite(sprite)
+
+        def blend():
+            frame = background.copy()
+            blend_sprite(frame, prepared, x, y)
+            return frame
+
+        blend_ms = time_per_call(blend, args.repeat)
+        diff = np.abs(
+            blend().astype(np.int16) - legacy_composite(background, sprite, x, y)
+        ).max()
+        print(
+            f"{size:>10} {legacy_ms:>10.2f} {prepare_ms:>11.2f} {blend_ms:>9.2f} "
+            f"{legacy_ms / blend_ms:>7.1f}x {diff:>9d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
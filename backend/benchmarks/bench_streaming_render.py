@@ -0,0 +1,145 @@
+"""音声合成と並行した描画（VIDEO_STREAM_RENDER）のベンチマーク
+
+合成した 24kHz のセリフ音声を --line-ms ごとに1行ずつ on_voice_ready() へ渡して
+VOICEVOX の合成を模擬し、全行が揃った後に generate_conversation_video() で
+動画を生成する。合成後に描画する従来の経路と、解析が済んだ先頭の行から
+並行して描画する経路で、合成開始から動画完成までの時間と、合成完了後に
+かかった時間を比較する。
+
+2つの経路の出力は映像のフレームが一致すること（デコードした画素の差が 0）、
+フレーム数が一致することを確認する。
+
+実行方法（backend ディレクトリで、ffmpeg が PATH にあること）:
+    python benchmarks/bench_streaming_render.py --lines 40
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 口パク解析のキャッシュが効くと2回目の経路だけ速くなるため無効にする
+os.environ["TTS_CACHE_BACKEND"] = "none"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2
+import numpy as np
+import soundfile
+
+from synthetic import synthetic_assets
+
+from app.config import RENDER_CONFIG
+from app.services.video.video_generator import VideoGenerator
+
+SAMPLE_RATE = 24000
+
+
+def write_lines(directory: str, line_count: int, seed: int = 0):
+    """音節ごとに振幅が変わるノイズで、VOICEVOX と同じ 24kHz モノラルの WAV を作る"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for i in range(line_count):
+        frames = int(rng.uniform(1.5, 4.0) * SAMPLE_RATE)
+        syllables = np.repeat(rng.uniform(0, 1, frames // 2400 + 1), 2400)[:frames]
+        y = (rng.standard_normal(frames) * 0.2 * syllables).astype(np.float32)
+        path = os.path.join(directory, f"line_{i:04d}.wav")
+        soundfile.write(path, y, SAMPLE_RATE, subtype="PCM_16")
+        paths.append(path)
+    return paths
+
+
+def run(conversations, work_dir: str, line_seconds: float, stream: bool):
+    """合成を模擬しながら動画を生成し、(出力パス, 合計秒, 合成後の秒, 統計) を返す"""
+    RENDER_CONFIG.stream_render = stream
+    audio_dir = os.path.join(work_dir, "audio")
+    os.makedirs(audio_dir)
+    paths = write_lines(audio_dir, len(conversations))
+
+    generator = VideoGenerator()
+    started = time.perf_counter()
+    generator.start_streaming(work_dir=work_dir, conversations=conversations)
+
+    def synthesize():
+        for i, path in enumerate(paths):
+            time.sleep(line_seconds)
+            generator.on_voice_ready(i, path)
+
+    synthesis = threading.Thread(target=synthesize)
+    synthesis.start()
+    synthesis.join()
+    synthesized = time.perf_counter()
+
+    output_path = generator.generate_conversation_video(
+        conversations,
+        paths,
+        output_path=os.path.join(work_dir, "output.mp4"),
+        work_dir=work_dir,
+    )
+    finished = time.perf_counter()
+    assert output_path, "動画の生成に失敗しました"
+    stats = dict(generator.pipeline_stats)
+    generator.cleanup()
+    return output_path, finished - started, finished - synthesized, stats
+
+
+def compare_videos(path_a: str, path_b: str):
+    """2つの動画をデコードし、(フレーム数A, フレーム数B, 画素の差の最大値) を返す"""
+    captures = [cv2.VideoCapture(path_a), cv2.VideoCapture(path_b)]
+    counts, max_diff = [0, 0], 0
+    while True:
+        reads = [capture.read() for capture in captures]
+        for k, (ok, _) in enumerate(reads):
+            counts[k] += ok
+        if not all(ok for ok, _ in reads):
+            break
+        diff = cv2.absdiff(reads[0][1], reads[1][1])
+        max_diff = max(max_diff, int(diff.max()))
+    for capture in captures:
+        capture.release()
+    return counts[0], counts[1], max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--line-ms", type=float, default=500.0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    speakers = ["zundamon", "metan"]
+    conversations = [
+        {"speaker": speakers[i % 2], "text": f"ベンチマーク用のセリフ{i}です"}
+        for i in range(args.lines)
+    ]
+
+    with synthetic_assets(), tempfile.TemporaryDirectory() as directory:
+        results = {}
+        for label, stream in (("after synthesis", False), ("streaming", True)):
+            work_dir = os.path.join(directory, label.replace(" ", "_"))
+            os.makedirs(work_dir)
+            results[label] = run(conversations, work_dir, args.line_ms / 1000, stream)
+
+        baseline_frames, streamed_frames, max_diff = compare_videos(
+            results["after synthesis"][0], results["streaming"][0]
+        )
+        assert baseline_frames == streamed_frames, (
+            f"フレーム数が一致しません: {baseline_frames} != {streamed_frames}"
+        )
+        assert max_diff == 0, f"映像が一致しません（画素の差 {max_diff}）"
+
+    print(
+        f"lines={args.lines} synthesis={args.line_ms:.0f}ms/line "
+        f"frames={baseline_frames} cpus={os.cpu_count()}"
+    )
+    print(f"{'mode':>16} {'total s':>8} {'after synthesis s':>18}")
+    for label, (_, total, after, _) in results.items():
+        print(f"{label:>16} {total:>8.2f} {after:>18.2f}")
+    print(f"streamed render: {results['streaming'][3].get('streamed_render')}")
+    print("outputs: same frame count, identical decoded frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""TimelineIndex のフレームごとの検索コストのベンチマーク
+
+セグメント数を変えながら、従来の線形走査と TimelineIndex による
+フレーム → セグメント / 字幕の検索時間（1フレームあたり）を比較する。
+
+実行方法（backend ディレクトリで）:
+    python benchmarks/bench_timeline_index.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.models.video_models import AudioSegmentInfo, SubtitleData
+from app.services.video.timeline_index import TimelineIndex
+
+FPS = 30
+
+
+def build_timeline(segment_count: int, seed: int = 0):
+    """ランダムな長さのセリフを並べたタイムラインを作る"""
+    rng = np.random.default_rng(seed)
+    durations = rng.uniform(1.0, 6.0, segment_count)
+    segments, subtitles = [], []
+    current = 0.0
+    for duration in durations:
+        segments.append(AudioSegmentInfo(current, [], float(duration), 0))
+        subtitles.append(
+            SubtitleData("", current, current + duration, duration, "zundamon", "default")
+        )
+        current += duration
+    return segments, subtitles, int(current * FPS)
+
+
+def linear_segment(segments, t):
+    """従来の線形走査（最初に一致したセグメント）"""
+    for i, segment in enumerate(segments):
+        if segment.start_time <= t < segment.start_time + segment.duration:
+            return i
+    return None
+
+
+def linear_subtitle(subtitles, t):
+    for i, subtitle in enumerate(subtitles):
+        if subtitle.start_time <= t <= subtitle.end_time:
+            return i
+    return None
+
+
+def bench(segment_count: int, sample_frames: int):
+    segments, subtitles, total_frames = build_timeline(segment_count)
+    frames = np.linspace(0, total_frames - 1, min(sample_frames, total_frames)).astype(int)
+
+    started = time.perf_counter()
+    expected = [
+        (linear_segment(segments, f / FPS), linear_subtitle(subtitles, f / FPS))
+        for f in frames
+    ]
+    linear_us = (time.perf_counter() - started) / len(frames) * 1e6
+
+    started = time.perf_counter()
+    index = TimelineIndex(segments, subtitles, fps=FPS, total_frames=total_frames)
+    build_ms = (time.perf_counter() - started) * 1e3
+
+    started = time.perf_counter()
+    actual = [
+        (index.segment_index_at_frame(int(f)), index.subtitle_index_at_frame(int(f)))
+        for f in frames
+    ]
+    indexed_us = (time.perf_counter() - started) / len(frames) * 1e6
+
+    assert actual == expected, "TimelineIndex の結果が線形走査と一致しません"
+    return total_frames, linear_us, build_ms, indexed_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--segments", type=int, nargs="+", default=[10, 100, 500, 1000, 5000]
+    )
+    parser.add_argument("--sample-frames", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'segments':>9} {'frames':>8} {'linear us/frame':>16} {'index build ms':>15} {'index us/frame':>15} {'speedup':>8}")
+    for segment_count in args.segments:
+        total_frames, linear_us, build_ms, indexed_us = bench(
+            segment_count, args.sample_frames
+        )
+        print(
+            f"{segment_count:>9} {total_frames:>8} {linear_us:>16.2f} "
+            f"{build_ms:>15.2f} {indexed_us:>15.2f} {linear_us / indexed_us:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
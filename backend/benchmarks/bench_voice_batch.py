@@ -0,0 +1,142 @@
+"""1行ずつの合成と /multi_synthesis によるまとめ合成のスループットのベンチマーク
+
+ローカルに VOICEVOX の代替サーバーを立て、VoiceGenerator で同じ会話を
+1行ずつ（VOICEVOX_BATCH_SIZE=0）・まとめて（--batch-size）・まとめ合成が
+失敗する場合（1行ずつにフォールバック）の3通りで合成し、行/秒を表示する。
+
+代替サーバーは実際のエンジンと同様に合成を直列に処理し、1リクエストあたり
+--request-ms、1行あたり --line-ms の時間がかかる。
+
+実行方法（backend ディレクトリで）:
+    python benchmarks/bench_voice_batch.py --lines 100
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 合成済み音声のキャッシュが効くと合成が省略されるため無効にする
+os.environ["TTS_CACHE_BACKEND"] = "none"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import VOICEVOX_CONFIG
+from app.core.asset_generators.voice_generator import VoiceGenerator
+
+
+def silent_wav(frames: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(24000)
+        wav.writeframes(b"\0\0" * frames)
+    return buffer.getvalue()
+
+
+def start_stub_engine(request_seconds: float, line_seconds: float):
+    """直列に処理する VOICEVOX の代替サーバーを起動する"""
+    engine = threading.Lock()
+    state = {"multi_synthesis_broken": False}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body: bytes, status: int = 200):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._send(b'"0.0.0-bench"')
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            path = self.path.split("?", 1)[0]
+            with engine:
+                time.sleep(request_seconds)
+            if path == "/audio_query":
+                return self._send(b'{"accent_phrases": [], "speedScale": 1.0}')
+            if path == "/multi_synthesis":
+                if state["multi_synthesis_broken"]:
+                    return self._send(b"not supported", 400)
+                queries = json.loads(body)
+                with engine:
+                    time.sleep(line_seconds * len(queries))
+                archive_buffer = io.BytesIO()
+                with zipfile.ZipFile(archive_buffer, "w") as archive:
+                    for i in range(len(queries)):
+                        archive.writestr(f"{i + 1:03d}.wav", silent_wav(2400 + i))
+                return self._send(archive_buffer.getvalue())
+            with engine:
+                time.sleep(line_seconds)
+            self._send(silent_wav(2400))
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def run(generator: VoiceGenerator, conversations, batch_size: int):
+    VOICEVOX_CONFIG.batch_size = batch_size
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        paths = generator.generate_conversation_voices(
+            conversations, output_dir=output_dir
+        )
+        elapsed = time.perf_counter() - started
+    assert len(paths) == len(conversations), "合成に失敗した行があります"
+    # 出力は会話の順序どおりに並ぶ
+    assert paths == sorted(paths), "出力の順序が会話の順序と一致しません"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--request-ms", type=float, default=10.0)
+    parser.add_argument("--line-ms", type=float, default=8.0)
+    args = parser.parse_args()
+    # フォールバック時の警告がセリフごとに出るため抑制する
+    logging.disable(logging.WARNING)
+
+    speakers = ["zundamon", "metan"]
+    conversations = [
+        {"speaker": speakers[i % 2], "text": f"ベンチマーク用のセリフ{i}です"}
+        for i in range(args.lines)
+    ]
+
+    print(
+        f"lines={args.lines} speakers=2 request={args.request_ms}ms line={args.line_ms}ms"
+    )
+    print(f"{'mode':>28} {'seconds':>8} {'lines/s':>8}")
+    for label, batch_size, broken in (
+        ("per-line", 0, False),
+        (f"batched ({args.batch_size})", args.batch_size, False),
+        ("batched, endpoint broken", args.batch_size, True),
+    ):
+        # 同時合成数（AIMD）の状態を持ち越さないよう、モードごとに別のエンジンにする
+        server, state = start_stub_engine(args.request_ms / 1000, args.line_ms / 1000)
+        state["multi_synthesis_broken"] = broken
+        try:
+            generator = VoiceGenerator(api_url=f"http://127.0.0.1:{server.server_address[1]}")
+            elapsed = run(generator, conversations, batch_size)
+        finally:
+            server.shutdown()
+        print(f"{label:>28} {elapsed:>8.2f} {args.lines / elapsed:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""ベンチマーク用の合成データ
+
+素材（キャラクター画像・背景）やタイムラインがなくてもベンチマークを
+実行できるように、乱数で作った素材とフレーム生成引数を用意する。
+実際の素材がある場合はそちらを使い、ない素材だけを一時的に作成する。
+"""
+
+import contextlib
+import os
+import shutil
+import sys
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.config import Paths
+from app.models.video_models import AudioSegmentInfo, SubtitleData
+
+SYNTHETIC_CHARACTERS = ("zundamon", "metan", "tsumugi")
+SYNTHETIC_EXPRESSIONS = ("normal", "happy")
+MOUTH_STATES = ("closed", "half", "open", "blink")
+
+
+def make_sprite(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """楕円形の不透明部分とアンチエイリアスの縁を持つ RGBA スプライト"""
+    rng = np.random.default_rng(seed)
+    sprite = np.zeros((height, width, 4), dtype=np.uint8)
+    sprite[..., :3] = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    alpha = np.zeros((height, width), dtype=np.uint8)
+    cv2.ellipse(
+        alpha,
+        (width // 2, height // 2),
+        (width * 2 // 5, height * 9 // 20),
+        0, 0, 360, 255, -1, cv2.LINE_AA,
+    )
+    sprite[..., 3] = cv2.GaussianBlur(alpha, (0, 0), 3)
+    return sprite
+
+
+@contextlib.contextmanager
+def synthetic_assets(sprite_size: Tuple[int, int] = (800, 1100)):
+    """足りない素材ディレクトリを合成画像で作成し、終了時に削除する"""
+    created: List[str] = []
+    width, height = sprite_size
+    try:
+        if not os.path.exists(Paths.get_assets_dir()):
+            created.append(Paths.get_assets_dir())
+        for index, character in enumerate(SYNTHETIC_CHARACTERS):
+            char_dir = Paths.get_character_dir(character)
+            if os.path.exists(char_dir):
+                continue
+            created.append(char_dir)
+            for expression in SYNTHETIC_EXPRESSIONS:
+                expression_dir = os.path.join(char_dir, expression)
+                os.makedirs(expression_dir)
+                for state_index, state in enumerate(MOUTH_STATES):
+                    sprite = make_sprite(width, height, seed=index * 100 + state_index)
+                    cv2.imwrite(
+                        os.path.join(expression_dir, f"{expression}_{state}.png"), sprite
+                    )
+
+        bg_dir = Paths.get_backgrounds_dir()
+        if not os.path.exists(bg_dir):
+            created.append(bg_dir)
+            os.makedirs(bg_dir)
+            rng = np.random.default_rng(1)
+            for name in ("default_bg", "classroom"):
+                image = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+                cv2.imwrite(os.path.join(bg_dir, f"{name}.png"), image)
+        yield
+    finally:
+        for path in reversed(created):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def synthetic_timeline(
+    line_count: int, fps: int, seed: int = 0
+) -> Dict:
+    """セリフ line_count 行分のフレーム生成引数（素材以外）を作る"""
+    rng = np.random.default_rng(seed)
+    speakers = ["zundamon", "metan"]
+    conversations, segments, subtitles, audio_files = [], [], [], []
+    audio_durations: Dict[str, float] = {}
+    current = 0.0
+    for i in range(line_count):
+        speaker = speakers[i % len(speakers)]
+        duration = float(rng.uniform(1.5, 5.0))
+        frame_count = int(duration * fps)
+        text = f"これはベンチマーク用のセリフ {i} です"
+        audio_path = f"synthetic_{i:04d}.wav"
+        conversations.append(
+            {"speaker": speaker, "text": text, "background": "default"}
+        )
+        segments.append(
+            AudioSegmentInfo(
+                current, rng.uniform(0, 1, frame_count).tolist(), duration, frame_count
+            )
+        )
+        subtitles.append(
+            SubtitleData(text, current, current + duration, duration, speaker, "default")
+        )
+        audio_files.append(audio_path)
+        audio_durations[audio_path] = duration
+        current += duration
+
+    return dict(
+        total_frames=int(current * fps),
+        conversations=conversations,
+        audio_file_list=audio_files,
+        segment_audio_intensities=segments,
+        blink_timings=[],
+        subtitle_lines=subtitles,
+        conversation_mode="duo",
+        item_images={},
+        sections=None,
+        progress_callback=None,
+        audio_durations=audio_durations,
+    )
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# backend/ をインポートパスに追加（app パッケージを読み込むため）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voicevox_stub import StubVoicevox  # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    server = StubVoicevox()
+    yield server
+    server.close()
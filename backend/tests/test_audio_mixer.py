@@ -0,0 +1,131 @@
+"""audio_mixer と従来の moviepy クリップグラフの出力をサンプル単位で比較するテスト
+
+短い合成音声を AudioArrayClip にして従来と同じ moviepy の処理
+（concatenate_audioclips・with_volume_scaled・AudioFadeIn/Out・
+CompositeAudioClip）で評価し、NumPy による処理の結果と比較する。
+"""
+
+import numpy as np
+import pytest
+from moviepy.audio.AudioClip import (
+    AudioArrayClip,
+    CompositeAudioClip,
+    concatenate_audioclips,
+)
+from moviepy.audio.fx import AudioFadeIn, AudioFadeOut
+
+from app.services import audio_mixer
+
+SAMPLE_RATE = 8000
+# float32 と float64 の演算順序の違いによる誤差の許容値
+TOLERANCE = 1e-6
+
+
+def tone(frame_count: int, seed: int) -> np.ndarray:
+    """ランダムなステレオ PCM
+
+    テストでは長さを 125 サンプルの倍数（1/64 秒の倍数で2進数で正確に表せる）にする。
+    moviepy は時刻の浮動小数点演算でサンプル位置を決めるため、割り切れない長さでは
+    クリップの境界で1サンプルずれる（従来の出力自体が持っていた誤差）。
+    """
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-0.5, 0.5, (frame_count, 2)).astype(np.float32)
+
+
+def clip(samples: np.ndarray):
+    """PCM を moviepy のクリップにする（AudioFileClip と同じく end を持たせる）"""
+    return AudioArrayClip(samples, SAMPLE_RATE).with_duration(
+        len(samples) / SAMPLE_RATE
+    )
+
+
+def render(moviepy_clip) -> np.ndarray:
+    return moviepy_clip.to_soundarray(fps=SAMPLE_RATE)
+
+
+def assert_same_samples(expected: np.ndarray, actual: np.ndarray) -> None:
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=TOLERANCE)
+
+
+@pytest.mark.parametrize("gain", [1.0, 0.8])
+def test_concatenate_matches_moviepy(gain):
+    parts = [tone(1000, 0), tone(2000, 1), tone(625, 2)]
+
+    expected = render(
+        concatenate_audioclips([clip(part) for part in parts]).with_volume_scaled(gain)
+    )
+    mixed = audio_mixer.concatenate(
+        [(part, SAMPLE_RATE) for part in parts], SAMPLE_RATE, gain
+    )
+
+    assert mixed.sample_rate == SAMPLE_RATE
+    assert mixed.duration == pytest.approx(len(expected) / SAMPLE_RATE)
+    assert_same_samples(expected, mixed.samples)
+
+
+@pytest.mark.parametrize("frame_count", [500, 1000, 3000, 3625])
+def test_loop_to_length_matches_moviepy(frame_count):
+    samples = tone(1000, 3)
+    base = clip(samples)
+    repeats = -(-frame_count // len(samples))
+
+    # 従来の BGMMixer と同じく、ループ分のサブクリップを連結して切り出す
+    looped = concatenate_audioclips(
+        [base.subclipped(0, base.duration) for _ in range(repeats)]
+    )
+    expected = render(looped.subclipped(0, frame_count / SAMPLE_RATE))
+
+    assert_same_samples(expected, audio_mixer.loop_to_length(samples, frame_count))
+
+
+@pytest.mark.parametrize("fade", [0.05, 0.1, 0.3])
+def test_apply_fades_matches_moviepy(fade):
+    samples = tone(4000, 4)
+
+    expected = render(clip(samples).with_effects([AudioFadeIn(fade), AudioFadeOut(fade)]))
+    actual = audio_mixer.apply_fades(samples.copy(), SAMPLE_RATE, fade, fade)
+
+    assert_same_samples(expected, actual)
+
+
+@pytest.mark.parametrize("start_time", [0.0, 0.1, 0.45])
+def test_mix_at_matches_moviepy(start_time):
+    # 0.45 秒開始の場合は元のバッファより後ろまで延長される
+    base = tone(4000, 5)
+    overlay = tone(1000, 6)
+
+    expected = render(
+        CompositeAudioClip([clip(base), clip(overlay).with_start(start_time)])
+    )
+    mixed = audio_mixer.mix_at(
+        audio_mixer.MixedAudio(base.copy(), SAMPLE_RATE), overlay, start_time
+    )
+
+    assert_same_samples(expected, mixed.samples)
+
+
+def test_section_bgm_mix_matches_moviepy():
+    """セリフの連結＋ループ・音量・フェードをかけたBGMの合成（従来の1セクション分）"""
+    voices = [tone(1500, 7), tone(2500, 8)]
+    bgm = tone(875, 9)
+    start_time, duration, volume, fade = 0.1, 0.4, 0.3, 0.05
+    frame_count = int(round(duration * SAMPLE_RATE))
+
+    voice_clip = concatenate_audioclips([clip(v) for v in voices]).with_volume_scaled(0.9)
+    base = clip(bgm)
+    bgm_clip = (
+        concatenate_audioclips([base.subclipped(0, base.duration) for _ in range(4)])
+        .subclipped(0, duration)
+        .with_volume_scaled(volume)
+        .with_effects([AudioFadeIn(fade), AudioFadeOut(fade)])
+        .with_start(start_time)
+    )
+    expected = render(CompositeAudioClip([voice_clip, bgm_clip]))
+
+    mixed = audio_mixer.concatenate([(v, SAMPLE_RATE) for v in voices], SAMPLE_RATE, 0.9)
+    section = audio_mixer.loop_to_length(bgm, frame_count) * np.float32(volume)
+    audio_mixer.apply_fades(section, SAMPLE_RATE, fade, fade)
+    audio_mixer.mix_at(mixed, section, start_time)
+
+    assert_same_samples(expected, mixed.samples)
@@ -0,0 +1,103 @@
+"""口パク解析（AudioProcessor）と従来の解析の結果を比較するテスト
+
+従来の解析は AudioFileClip で音声長を取得し、librosa.load（22.05kHz に
+リサンプリング）と librosa.feature.rms で強度列を求めていた。現在の解析は
+WAV を1回だけデコードして frame_rms で計算するが、フレーム分割
+（フレーム数・窓の間隔）は従来と揃えている。音声長だけは意図的に変えており、
+1/100 秒単位に丸めた値ではなくサンプル数から求めた正確な値を返す。
+"""
+
+import librosa
+import numpy as np
+import pytest
+import soundfile
+from moviepy import AudioFileClip
+from scipy import signal
+
+from app.core.processors.audio_processor import AudioProcessor, frame_rms
+
+FPS = 30
+# 従来の強度列との差の許容値（float32 と float64 の演算順序の違いによる誤差）
+ENVELOPE_TOLERANCE = 1e-5
+# frame_rms と librosa.feature.rms の差の許容値
+RMS_TOLERANCE = 1e-6
+
+
+def legacy_analyze(audio_path: str, fps: int):
+    """user-022 以前の AudioProcessor._analyze_audio（ストアなしの経路）"""
+    audio_clip = AudioFileClip(audio_path)
+    actual_duration = audio_clip.duration
+    audio_clip.close()
+    y, sr = librosa.load(audio_path)
+    target_frames = max(1, int(actual_duration * fps))
+    hop_length = max(1, int(sr * actual_duration / target_frames))
+    frame_length = min(hop_length * 2, len(y))
+    rms = librosa.feature.rms(y=y, hop_length=hop_length, frame_length=frame_length)[0]
+    if len(rms) != target_frames:
+        rms = signal.resample(rms, target_frames)
+    rms_max = np.max(rms)
+    rms = rms / rms_max if rms_max > 0 else np.zeros_like(rms)
+    return rms, actual_duration
+
+
+def speech_like(frame_count: int, sample_rate: int, seed: int) -> np.ndarray:
+    """0.1 秒ごとに振幅が変わるノイズ（音節の強弱の代わり）"""
+    rng = np.random.default_rng(seed)
+    block = sample_rate // 10
+    syllables = np.repeat(rng.uniform(0, 1, frame_count // block + 1), block)
+    return (rng.standard_normal(frame_count) * 0.2 * syllables[:frame_count]).astype(
+        np.float32
+    )
+
+
+@pytest.mark.parametrize(
+    "length, frame_length, hop_length",
+    [
+        (24000, 1600, 800),
+        (24001, 1470, 735),
+        (1000, 1000, 500),
+        (700, 1000, 500),
+        (5, 4, 2),
+    ],
+)
+def test_frame_rms_matches_librosa(length, frame_length, hop_length):
+    y = speech_like(length, 24000, seed=length)
+
+    expected = librosa.feature.rms(
+        y=y, frame_length=frame_length, hop_length=hop_length
+    )[0]
+    actual = frame_rms(y, frame_length, hop_length)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=RMS_TOLERANCE)
+
+
+@pytest.mark.parametrize(
+    "seconds, sample_rate",
+    [
+        # VOICEVOX の出力（24kHz）。4.366 秒は 1/100 秒単位に丸めると 4.37 秒になる
+        (4.3663, 24000),
+        (1.5, 24000),
+        # 4.1 * 30 は浮動小数点で 122.99... になる（従来どおり 122 フレーム）
+        (4.1, 24000),
+        # 従来の 22050 * 4.6 / 138 は 734 に切り捨てられる（4.6 / 138 を先に計算すると 735）
+        (4.5969, 24000),
+        (2.345, 44100),
+        (3.0, 22050),
+    ],
+)
+def test_envelope_matches_legacy(tmp_path, seconds, sample_rate):
+    path = str(tmp_path / "line.wav")
+    frame_count = int(seconds * sample_rate)
+    samples = speech_like(frame_count, sample_rate, seed=1)
+    soundfile.write(path, samples, sample_rate, subtype="PCM_16")
+
+    expected, legacy_duration = legacy_analyze(path, FPS)
+    intensities, duration = AudioProcessor(fps=FPS)._analyze_audio(path)
+
+    # フレーム数は従来と同じ
+    assert len(intensities) == len(expected)
+    np.testing.assert_allclose(intensities, expected, rtol=0, atol=ENVELOPE_TOLERANCE)
+    # 音声長はサンプル数から求める（従来の値は 1/100 秒単位に丸められていた）
+    assert duration == frame_count / sample_rate
+    assert duration == pytest.approx(legacy_duration, abs=0.005)
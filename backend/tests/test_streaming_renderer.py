@@ -0,0 +1,266 @@
+"""音声合成と並行した描画（StreamingFrameRenderer）のテスト
+
+解析結果を順不同に渡して先頭の行から描画した映像と、全行が揃ってから
+FrameGenerator で描画した映像が1フレームずつ一致することを確認する。
+素材は小さな合成画像を一時ディレクトリに作成して使う。
+"""
+
+import hashlib
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from app.config import RENDER_CONFIG, Paths
+from app.core.processors.audio_processor import AudioProcessor
+from app.core.processors.video_processor import VideoProcessor
+from app.models.video_models import AudioSegmentInfo
+from app.services.audio_combiner import AudioCombiner
+from app.services.resource_manager import ResourceManager
+from app.services.subtitle_generator import SubtitleGenerator
+from app.services.video import streaming_renderer
+from app.services.video.frame_generator import FrameGenerator
+from app.services.video.streaming_renderer import StreamingFrameRenderer, frames_before
+
+# 端数のある長さ（行の境界がフレームの途中になる）
+LINE_DURATIONS = [0.73, 1.21, 0.5, 0.98, 0.66, 1.07]
+
+
+class RecordingEncoder:
+    """書き出されたフレームのハッシュを記録するエンコーダ"""
+
+    def __init__(self, *args, **kwargs):
+        self.frames = []
+        self.closed = False
+        self.aborted = False
+
+    def open(self) -> bool:
+        return True
+
+    def write(self, frame: np.ndarray) -> None:
+        self.frames.append(hashlib.sha1(np.ascontiguousarray(frame).data).hexdigest())
+
+    def repeat_last(self) -> None:
+        self.frames.append(self.frames[-1])
+
+    def close(self) -> bool:
+        self.closed = True
+        return True
+
+    def abort(self) -> None:
+        self.aborted = True
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    """2キャラクター × 4つの口の状態のスプライトと背景を一時ディレクトリに作成する"""
+    monkeypatch.setattr(Paths, "get_assets_dir", staticmethod(lambda: str(tmp_path)))
+    monkeypatch.setattr(RENDER_CONFIG, "sprite_atlas", False)
+    monkeypatch.setattr(RENDER_CONFIG, "background_cache", False)
+    rng = np.random.default_rng(0)
+    for character in ("zundamon", "metan"):
+        expression_dir = tmp_path / character / "normal"
+        expression_dir.mkdir(parents=True)
+        for state in ("closed", "half", "open", "blink"):
+            sprite = rng.integers(0, 256, (220, 160, 4), dtype=np.uint8)
+            sprite[..., 3] = 255
+            cv2.imwrite(str(expression_dir / f"normal_{state}.png"), sprite)
+    (tmp_path / "backgrounds").mkdir()
+    cv2.imwrite(
+        str(tmp_path / "backgrounds" / "default_bg.png"),
+        rng.integers(0, 256, (360, 640, 3), dtype=np.uint8),
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def renderer_parts(assets):
+    video_processor = VideoProcessor()
+    fps = video_processor.fps
+    resource_manager = ResourceManager(video_processor)
+    resources = (
+        resource_manager.load_character_images(),
+        resource_manager.load_backgrounds(),
+        {},
+    )
+    return dict(
+        frame_generator=FrameGenerator(video_processor, fps),
+        resource_manager=resource_manager,
+        audio_combiner=AudioCombiner(AudioProcessor(fps=fps), fps),
+        subtitle_generator=SubtitleGenerator(),
+        resolution=video_processor.resolution,
+        resources=resources,
+    )
+
+
+def make_lines(fps: int):
+    rng = np.random.default_rng(1)
+    conversations, analyzed = [], []
+    for i, duration in enumerate(LINE_DURATIONS):
+        speaker = ("zundamon", "metan")[i % 2]
+        conversations.append({"speaker": speaker, "text": f"テスト用のセリフ{i}です"})
+        intensities = rng.uniform(0, 1, int(duration * fps)).tolist()
+        analyzed.append((f"line_{i}.wav", intensities, duration))
+    return conversations, analyzed
+
+
+def full_frame_kwargs(parts, conversations, analyzed):
+    """VideoGenerator._prepare_render_job と同じ手順でジョブ全体のフレーム生成引数を作る"""
+    character_images, backgrounds, item_images = parts["resources"]
+    fps = parts["frame_generator"].fps
+    paths = [path for path, _, _ in analyzed]
+    durations = {path: duration for path, _, duration in analyzed}
+    segments = parts["audio_combiner"].analyze_audio_segments(
+        paths, {path: (intensities, duration) for path, intensities, duration in analyzed}
+    )
+    return dict(
+        total_frames=int(sum(LINE_DURATIONS) * fps),
+        conversations=conversations,
+        audio_file_list=paths,
+        segment_audio_intensities=segments,
+        backgrounds=backgrounds,
+        character_images=character_images,
+        blink_timings=parts["resource_manager"].generate_segment_blink_timings(segments),
+        subtitle_lines=parts["subtitle_generator"].generate_subtitles(
+            conversations, paths, backgrounds, True, durations
+        ),
+        conversation_mode="duo",
+        item_images=item_images,
+        sections=None,
+        progress_callback=None,
+        audio_durations=durations,
+    )
+
+
+def start_renderer(parts, conversations, tmp_path):
+    return StreamingFrameRenderer(
+        parts["frame_generator"],
+        parts["resource_manager"],
+        parts["audio_combiner"],
+        parts["subtitle_generator"],
+        str(tmp_path / "streamed_temp.mp4"),
+        parts["resolution"],
+        conversations,
+        lambda: parts["resources"],
+    ).start()
+
+
+def wait_for_lines(renderer, lines: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while renderer.stats()["lines"] < lines:
+        assert time.monotonic() < deadline, renderer.stats()
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize(
+    "end_time, fps, expected",
+    [(0.0, 10, 0), (0.1, 10, 1), (0.10001, 10, 2), (0.3, 10, 3), (2.0, 30, 60), (0.73, 10, 8)],
+)
+def test_frames_before(end_time, fps, expected):
+    assert frames_before(end_time, fps) == expected
+    assert all(frame / fps < end_time for frame in range(expected))
+
+
+def test_segment_blinks_do_not_depend_on_later_segments(renderer_parts):
+    resource_manager = renderer_parts["resource_manager"]
+    segments, start = [], 0.0
+    for duration in [3.0, 5.5, 2.2, 7.0]:
+        segments.append(AudioSegmentInfo(start, [0.0], duration, 1))
+        start += duration
+
+    full = resource_manager.generate_segment_blink_timings(segments)
+    prefix = resource_manager.generate_segment_blink_timings(segments[:2])
+
+    assert prefix and full[: len(prefix)] == prefix
+    # 瞬きは行の中で終わる（後続の行の描画内容に影響しない）
+    assert all(blink["end"] <= segments[1].start_time + segments[1].duration for blink in prefix)
+
+
+def test_window_plan_matches_full_plan(renderer_parts):
+    frame_generator = renderer_parts["frame_generator"]
+    conversations, analyzed = make_lines(frame_generator.fps)
+    kwargs = full_frame_kwargs(renderer_parts, conversations, analyzed)
+
+    full = frame_generator.compile_plan(**kwargs)
+    window = frame_generator.compile_plan(**kwargs, start_frame=17)
+
+    assert window.frame_count == kwargs["total_frames"] - 17
+    for frame_idx in range(17, kwargs["total_frames"]):
+        assert window.describe_frame(frame_idx) == full.describe_frame(frame_idx)
+        assert window.blink_states(frame_idx) == full.blink_states(frame_idx)
+
+
+def test_streamed_frames_match_serial_render(renderer_parts, tmp_path, monkeypatch):
+    encoders = []
+
+    def create_encoder(*args, **kwargs):
+        encoders.append(RecordingEncoder())
+        return encoders[-1]
+
+    monkeypatch.setattr(streaming_renderer, "create_ffmpeg_encoder", create_encoder)
+    frame_generator = renderer_parts["frame_generator"]
+    conversations, analyzed = make_lines(frame_generator.fps)
+
+    renderer = start_renderer(renderer_parts, conversations, tmp_path)
+    # 合成の完了順（順不同）に解析結果が届く
+    for index in (2, 0, 1, 4, 3, 5):
+        renderer.on_analyzed(index, *analyzed[index])
+    # 最後の行は動画全体の長さが決まってから描画する
+    wait_for_lines(renderer, len(LINE_DURATIONS) - 1)
+    streamed_frames = renderer.stats()["frames"]
+
+    kwargs = full_frame_kwargs(renderer_parts, conversations, analyzed)
+    assert renderer.finish(kwargs) == str(tmp_path / "streamed_temp.mp4")
+
+    expected = RecordingEncoder()
+    assert frame_generator.generate_video_frames(
+        temp_video_path=str(tmp_path / "serial.mp4"),
+        encoder=expected,
+        validate_timing=False,
+        **kwargs,
+    )
+    assert 0 < streamed_frames < kwargs["total_frames"]
+    assert len(encoders) == 1 and encoders[0].closed
+    assert encoders[0].frames == expected.frames
+
+
+def test_mismatched_timeline_discards_streamed_frames(
+    renderer_parts, tmp_path, monkeypatch
+):
+    encoders = []
+
+    def create_encoder(*args, **kwargs):
+        encoders.append(RecordingEncoder())
+        return encoders[-1]
+
+    monkeypatch.setattr(streaming_renderer, "create_ffmpeg_encoder", create_encoder)
+    conversations, analyzed = make_lines(renderer_parts["frame_generator"].fps)
+
+    renderer = start_renderer(renderer_parts, conversations, tmp_path)
+    for index in range(3):
+        renderer.on_analyzed(index, *analyzed[index])
+    wait_for_lines(renderer, 3)
+
+    # 描画後に2行目の音声が差し替わった
+    analyzed[1] = (analyzed[1][0], analyzed[1][1], analyzed[1][2] + 0.2)
+    kwargs = full_frame_kwargs(renderer_parts, conversations, analyzed)
+    kwargs["total_frames"] += 2
+
+    assert renderer.finish(kwargs) is None
+    assert encoders[0].aborted and not encoders[0].closed
+
+
+def test_prefetch_key_follows_content_not_identity():
+    from app.services.video.video_generator import VideoGenerator
+
+    conversations = [{"speaker": "zundamon", "text": "こんにちは"}]
+    script_data = {"title": "テスト", "sections": [{"scene_background": "classroom"}]}
+    key = VideoGenerator._content_key("理科", script_data, conversations)
+
+    # 同じ内容の別オブジェクトは同じキー、内容が変わればキーも変わる
+    assert VideoGenerator._content_key(
+        "理科", dict(script_data), [dict(conversations[0])]
+    ) == key
+    conversations[0]["text"] = "こんばんは"
+    assert VideoGenerator._content_key("理科", script_data, conversations) != key
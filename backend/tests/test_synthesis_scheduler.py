@@ -0,0 +1,174 @@
+"""AdaptiveConcurrencyLimiter（AIMD）と VoiceSynthesisScheduler のテスト"""
+
+import threading
+import time
+
+import pytest
+
+from app.config import VOICEVOX_CONFIG
+from app.core.asset_generators import voicevox_endpoints
+from app.core.asset_generators.synthesis_scheduler import (
+    ERROR_DECREASE_FACTOR,
+    LATENCY_DECREASE_FACTOR,
+    AdaptiveConcurrencyLimiter,
+    VoiceSynthesisScheduler,
+    get_synthesis_limiter,
+)
+from app.core.asset_generators.voicevox_endpoints import (
+    VoicevoxEndpointPool,
+    get_endpoint_pool,
+)
+from voicevox_stub import StubVoicevox
+
+
+def complete(limiter, elapsed, success=True, units=1):
+    assert limiter.try_acquire()
+    limiter.release(elapsed, success, units)
+
+
+def test_limit_increases_additively():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=4, initial_limit=2)
+
+    # 上限 L のとき1回の成功で 1/L 増える
+    complete(limiter, 0.1)
+    assert limiter._limit == pytest.approx(2.5)
+    complete(limiter, 0.1)
+    assert limiter._limit == pytest.approx(2.9)
+    for _ in range(20):
+        complete(limiter, 0.1)
+    assert limiter.limit == 4
+
+
+def test_limit_decreases_when_latency_exceeds_baseline():
+    limiter = AdaptiveConcurrencyLimiter(
+        min_limit=1, max_limit=8, initial_limit=4, latency_tolerance=1.5
+    )
+    complete(limiter, 0.1)
+    limit = limiter._limit
+
+    # 基準値の 1.5 倍以内なら増やす
+    complete(limiter, 0.15)
+    assert limiter._limit > limit
+    limit = limiter._limit
+
+    complete(limiter, 0.5)
+    assert limiter._limit == pytest.approx(limit * LATENCY_DECREASE_FACTOR)
+    # 基準値は遅い観測値に少しだけ追従する
+    assert 0.1 < limiter._baseline < 0.11
+
+
+def test_limit_halves_on_failure_down_to_min():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=8)
+
+    complete(limiter, 0.1, success=False)
+    assert limiter._limit == pytest.approx(8 * ERROR_DECREASE_FACTOR)
+    for _ in range(5):
+        complete(limiter, 0.1, success=False)
+    assert limiter.limit == 1
+    assert limiter.failures == 6
+
+
+def test_latency_is_normalized_by_units():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=2)
+    complete(limiter, 0.1, units=1)
+
+    # 10文字で1秒は1文字あたり 0.1 秒なので遅延とはみなさない
+    complete(limiter, 1.0, units=10)
+    assert limiter._limit > 2
+
+
+def test_try_acquire_respects_limit():
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, initial_limit=2)
+
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+    assert limiter.peak_in_flight == 2
+
+
+@pytest.fixture
+def fixed_concurrency(monkeypatch):
+    """同時実行数を2に固定する（AIMD で増えないようにする）"""
+    monkeypatch.setattr(VOICEVOX_CONFIG, "initial_concurrency", 2)
+    monkeypatch.setattr(VOICEVOX_CONFIG, "max_concurrency", 2)
+
+
+def test_results_follow_job_order(stub, fixed_concurrency):
+    pool = VoicevoxEndpointPool([stub.url], health_check_interval=0)
+    jobs = list(range(8))
+
+    def worker(job, client):
+        # 後のジョブほど早く終わる
+        time.sleep(0.01 * (len(jobs) - job))
+        return job, client.audio_query(f"セリフ{job}", 1)
+
+    progress = []
+    results = VoiceSynthesisScheduler(pool).run(
+        jobs, worker, progress_callback=progress.append
+    )
+
+    assert [job for job, _ in results] == jobs
+    assert all(response == {"path": "/audio_query"} for _, response in results)
+    assert stub.count("/audio_query") == len(jobs)
+    assert progress == list(range(1, len(jobs) + 1))
+    assert pool.primary.limiter.peak_in_flight == 2
+
+
+def test_failed_job_is_retried_on_another_endpoint(stub, fixed_concurrency):
+    other = StubVoicevox()
+    try:
+        pool = VoicevoxEndpointPool([stub.url, other.url], health_check_interval=0)
+        # stub のエンジンは合成に失敗する（4xx は再試行されずに例外になる）
+        stub.responses["/synthesis"] = [422] * 10
+
+        def worker(job, client):
+            return client.synthesis({"job": job}, 1)
+
+        results = VoiceSynthesisScheduler(pool).run(list(range(4)), worker)
+
+        assert results == [b'{"path": "/synthesis"}'] * 4
+        assert other.count("/synthesis") == 4
+        first = pool.endpoints[0].limiter
+        assert first.failures == stub.count("/synthesis")
+    finally:
+        other.close()
+
+
+def test_limit_is_shared_across_jobs(stub, fixed_concurrency, monkeypatch):
+    monkeypatch.setattr(voicevox_endpoints, "_pools", {})
+    assert get_synthesis_limiter(stub.url) is get_synthesis_limiter(stub.url + "/")
+
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def worker(job, client):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            time.sleep(0.02)
+            return client.audio_query(f"セリフ{job}", 1)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    # 同じワーカープロセスで並行して動く2つのジョブ
+    results = {}
+
+    def run_job(name):
+        scheduler = VoiceSynthesisScheduler(get_endpoint_pool([stub.url]))
+        results[name] = scheduler.run(list(range(6)), worker)
+
+    threads = [threading.Thread(target=run_job, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    get_endpoint_pool([stub.url]).stop()
+    assert all(len(results[name]) == 6 and all(results[name]) for name in "ab")
+    # ジョブごとではなくエンジンごとの上限（2）を超えて同時に合成しない
+    assert state["peak"] == 2
+    assert stub.count("/audio_query") == 12
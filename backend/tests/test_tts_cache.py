@@ -0,0 +1,61 @@
+"""DiskCacheBackend の合計サイズの集計と削除のテスト"""
+
+import os
+
+from app.core.asset_generators import tts_cache
+from app.core.asset_generators.tts_cache import DiskCacheBackend
+
+
+def entry_names(directory):
+    return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+
+
+def test_overwrite_is_not_double_counted(tmp_path):
+    backend = DiskCacheBackend(str(tmp_path), max_bytes=1000)
+
+    for _ in range(5):
+        backend.put("voice:a", b"x" * 400)
+    backend.put("voice:b", b"x" * 300)
+    backend.put("voice:a", b"x" * 200)
+
+    assert backend._bytes == 500
+    assert entry_names(tmp_path) == ["voice_a", "voice_b"]
+
+
+def test_writes_from_other_processes_are_rescanned(tmp_path):
+    # 同じディレクトリを共有する2つのプロセス
+    first = DiskCacheBackend(str(tmp_path), max_bytes=1000)
+    second = DiskCacheBackend(str(tmp_path), max_bytes=1000)
+
+    first.put("voice:a", b"x" * 400)
+    second.put("voice:b", b"x" * 400)
+    second.put("voice:c", b"x" * 150)
+    first.put("voice:d", b"x" * 100)
+    for mtime, name in enumerate(["voice_a", "voice_b", "voice_c", "voice_d"]):
+        os.utime(tmp_path / name, (mtime, mtime))
+
+    # first の集計には second の書き込みが含まれないため、まだ削除しない
+    assert first._bytes == 500
+    assert len(entry_names(tmp_path)) == 4
+
+    # 数え直しの間隔を過ぎると実際の合計（上限超え）で古いものから削除する
+    first._scanned_at -= tts_cache.DISK_RESCAN_SECONDS
+    first.put("voice:e", b"x" * 10)
+
+    assert entry_names(tmp_path) == ["voice_b", "voice_c", "voice_d", "voice_e"]
+    assert first._bytes == 660
+
+
+def test_limit_crossing_rescans_before_evicting(tmp_path):
+    first = DiskCacheBackend(str(tmp_path), max_bytes=1000)
+    second = DiskCacheBackend(str(tmp_path), max_bytes=1000)
+
+    first.put("voice:a", b"x" * 600)
+    second.put("voice:b", b"x" * 300)
+    # 他プロセスが削除した分は first の集計から減らない
+    os.remove(tmp_path / "voice_a")
+    first.put("voice:c", b"x" * 500)
+
+    # 集計上は上限を超えるが、数え直すと 800 バイトのため何も削除しない
+    assert entry_names(tmp_path) == ["voice_b", "voice_c"]
+    assert first._bytes == 800
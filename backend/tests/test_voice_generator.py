@@ -0,0 +1,75 @@
+"""VoiceGenerator の合成済み音声キャッシュのテスト（ローカルの代替サーバーを使用）"""
+
+import pytest
+
+from app.core.asset_generators import voice_generator
+from app.core.asset_generators.tts_cache import DiskCacheBackend, TTSCache
+from app.core.asset_generators.voicevox_endpoints import VoicevoxEndpointPool
+from voicevox_stub import StubVoicevox, unused_port
+
+
+@pytest.fixture
+def second_stub():
+    server = StubVoicevox()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def make_generator(tmp_path, monkeypatch):
+    pools = []
+
+    def make(urls):
+        pool = VoicevoxEndpointPool(urls, health_check_interval=0)
+        pools.append(pool)
+        cache = TTSCache(DiskCacheBackend(str(tmp_path / "cache"), 1024 * 1024))
+        monkeypatch.setattr(voice_generator, "get_endpoint_pool", lambda urls: pool)
+        monkeypatch.setattr(voice_generator, "get_tts_cache", lambda: cache)
+        return voice_generator.VoiceGenerator()
+
+    yield make
+    for pool in pools:
+        pool.stop()
+
+
+def generate(generator, tmp_path):
+    return generator.generate_voice(
+        "こんにちは", 1.0, 0.0, 1.0, output_path=str(tmp_path / "voice.wav")
+    )
+
+
+def voice_key(generator, engine_version):
+    return generator.tts_cache.voice_key(
+        generator.speakers["zundamon"], "こんにちは", 1.0, 0.0, 1.0, engine_version
+    )
+
+
+def test_cache_works_while_primary_is_down(stub, make_generator, tmp_path):
+    stub.bodies["/version"] = b'"0.14.0"'
+    generator = make_generator([f"http://127.0.0.1:{unused_port()}", stub.url])
+    # 停止中の先頭のエンジンは振り分けから外れている
+    generator.endpoint_pool.primary.healthy = False
+
+    assert generate(generator, tmp_path)
+    assert generate(generator, tmp_path)
+
+    assert stub.count("/synthesis") == 1
+    assert generator.tts_cache.get_voice(voice_key(generator, "0.14.0")) is not None
+
+
+def test_voice_is_keyed_by_synthesizing_engine(stub, second_stub, make_generator, tmp_path):
+    stub.bodies["/version"] = b'"0.14.0"'
+    second_stub.bodies["/version"] = b'"0.15.0"'
+    generator = make_generator([stub.url, second_stub.url])
+    generator.endpoint_pool.primary.healthy = False
+
+    assert generate(generator, tmp_path)
+
+    assert stub.count("/synthesis") == 0
+    assert generator.tts_cache.get_voice(voice_key(generator, "0.15.0")) is not None
+    assert generator.tts_cache.get_voice(voice_key(generator, "0.14.0")) is None
+
+    # バージョンが一致しないため、どのエンジンが合成するか決まる前には引かない
+    assert generator.endpoint_pool.engine_version() is None
+    assert generate(generator, tmp_path)
+    assert second_stub.count("/synthesis") == 2
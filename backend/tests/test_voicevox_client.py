@@ -0,0 +1,100 @@
+"""VoicevoxClient の再試行・接続プールのテスト（ローカルの代替サーバーを使用）"""
+
+import pytest
+
+from app.config import VOICEVOX_CONFIG
+from app.core.asset_generators import voicevox_client
+from app.core.asset_generators.voicevox_client import (
+    VoicevoxClient,
+    VoicevoxError,
+    get_voicevox_client,
+)
+from voicevox_stub import unused_port
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """バックオフの待ち時間を記録する（実際には待たない）"""
+    recorded = []
+    monkeypatch.setattr(voicevox_client.time, "sleep", recorded.append)
+    monkeypatch.setattr(VOICEVOX_CONFIG, "backoff_base", 0.5)
+    monkeypatch.setattr(VOICEVOX_CONFIG, "backoff_max", 1.5)
+    return recorded
+
+
+def test_503_is_retried_with_backoff(stub, sleeps):
+    stub.responses["/audio_query"] = [503, 503]
+    client = VoicevoxClient(stub.url, max_retries=3)
+
+    assert client.audio_query("こんにちは", 1) == {"path": "/audio_query"}
+    assert stub.count("/audio_query") == 3
+    # 2回の再試行の前にそれぞれ待つ（上限は base * 2^(attempt-1)、backoff_max まで）
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5
+    assert 0 <= sleeps[1] <= 1.0
+    stats = client.stats()["/audio_query"]
+    assert stats["failures"] == 2
+    assert stats["retries"] == 2
+
+
+def test_503_exhausts_retries(stub, sleeps):
+    stub.responses["/synthesis"] = [503] * 10
+    client = VoicevoxClient(stub.url, max_retries=2)
+
+    with pytest.raises(VoicevoxError, match="after 3 attempts"):
+        client.synthesis({}, 1)
+    assert stub.count("/synthesis") == 3
+    assert len(sleeps) == 2
+    assert all(0 <= seconds <= 1.5 for seconds in sleeps)
+
+
+def test_connection_error_is_retried(sleeps):
+    client = VoicevoxClient(f"http://127.0.0.1:{unused_port()}", max_retries=2)
+
+    with pytest.raises(VoicevoxError, match="ConnectionError"):
+        client.audio_query("こんにちは", 1)
+    assert len(sleeps) == 2
+    stats = client.stats()["/audio_query"]
+    assert stats["calls"] == 3
+    assert stats["failures"] == 3
+
+
+def test_4xx_is_not_retried(stub, sleeps):
+    stub.responses["/audio_query"] = [422, 200]
+    client = VoicevoxClient(stub.url, max_retries=3)
+
+    with pytest.raises(VoicevoxError, match="HTTP 422"):
+        client.audio_query("こんにちは", 1)
+    assert stub.count("/audio_query") == 1
+    assert sleeps == []
+
+
+def test_pooled_session_is_reused(stub, monkeypatch):
+    monkeypatch.setattr(voicevox_client, "_clients", {})
+    client = get_voicevox_client(stub.url)
+    assert get_voicevox_client(stub.url + "/") is client
+
+    for i in range(5):
+        client.audio_query(f"セリフ{i}", 1)
+        client.synthesis({}, 1)
+
+    # 逐次のリクエストは同じ keep-alive 接続（同じ送信元ポート）で送られる
+    ports = {port for _, port in stub.requests}
+    assert len(stub.requests) == 10
+    assert len(ports) == 1
+
+
+def test_engine_version_failure_is_remembered(stub, sleeps):
+    stub.responses["/version"] = [404, 404]
+    client = VoicevoxClient(stub.url)
+
+    assert client.engine_version() is None
+    assert client.engine_version() is None
+    assert stub.count("/version") == 1
+
+    # 再問い合わせの間隔を過ぎたら取得し直す
+    client._engine_version_failed_at -= voicevox_client.ENGINE_VERSION_RETRY_SECONDS
+    assert client.engine_version() is None
+    assert stub.count("/version") == 2
+    assert client.engine_version() is None
+    assert stub.count("/version") == 2
@@ -0,0 +1,126 @@
+"""VoicevoxEndpointPool の除外・復帰と実行枠の待機のテスト"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.config import VOICEVOX_CONFIG
+from app.core.asset_generators.voicevox_endpoints import VoicevoxEndpointPool
+from voicevox_stub import StubVoicevox
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    # 実行枠を1つにして待機を起こしやすくする
+    monkeypatch.setattr(VOICEVOX_CONFIG, "initial_concurrency", 1)
+    pools = []
+
+    def make(urls, health_check_interval=0):
+        pool = VoicevoxEndpointPool(
+            urls, health_check_interval=health_check_interval, eject_after_failures=2
+        )
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.stop()
+
+
+def fail_twice(pool):
+    for _ in range(2):
+        endpoint = asyncio.run(pool.acquire())
+        pool.release(endpoint, 0.1, success=False)
+    return endpoint
+
+
+def test_single_endpoint_is_readmitted_on_success(stub, make_pool):
+    pool = make_pool([stub.url])
+
+    endpoint = fail_twice(pool)
+    assert not endpoint.healthy
+    assert endpoint.ejections == 1
+
+    # 全エンドポイントが外れていても振り分け、成功したら復帰させる
+    assert asyncio.run(pool.acquire()) is endpoint
+    pool.release(endpoint, 0.1, success=True)
+    assert endpoint.healthy
+    assert endpoint.consecutive_failures == 0
+
+
+def test_health_loop_readmits_single_endpoint(stub, make_pool):
+    pool = make_pool([stub.url], health_check_interval=0.05)
+
+    endpoint = fail_twice(pool)
+    assert not endpoint.healthy
+
+    deadline = time.monotonic() + 5
+    while not endpoint.healthy and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert endpoint.healthy
+    assert stub.count("/speakers") >= 1
+
+
+def test_ejected_endpoint_is_avoided(stub, make_pool):
+    other = StubVoicevox()
+    try:
+        pool = make_pool([stub.url, other.url])
+        first, second = pool.endpoints
+        for _ in range(2):
+            assert first.limiter.try_acquire()
+            pool.release(first, 0.1, success=False)
+
+        assert not first.healthy
+        assert pool.pick() is second
+        assert asyncio.run(pool.acquire()) is second
+    finally:
+        other.close()
+
+
+def test_waiter_cancelled_after_grant_returns_slot(stub, make_pool):
+    pool = make_pool([stub.url])
+    endpoint = pool.primary
+
+    async def scenario():
+        held = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert len(pool._waiters) == 1
+
+        pool.release(held)
+        # _grant が実行されて結果が設定された後、待機側が再開する前にキャンセル
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert endpoint.outstanding == 0
+        assert await asyncio.wait_for(pool.acquire(), 1) is endpoint
+        pool.release(endpoint)
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_before_grant_returns_slot(stub, make_pool):
+    pool = make_pool([stub.url])
+    endpoint = pool.primary
+
+    async def scenario():
+        held = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+
+        # 割り当て（_grant の予約）直後、_grant が実行される前にキャンセル
+        pool.release(held)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+        assert endpoint.outstanding == 0
+        assert not pool._waiters
+        assert await asyncio.wait_for(pool.acquire(), 1) is endpoint
+        pool.release(endpoint)
+
+    asyncio.run(scenario())
@@ -0,0 +1,63 @@
+"""テスト用の VOICEVOX の代替サーバー"""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubVoicevox:
+    """パスごとに返すステータスを順に指定できる VOICEVOX の代替サーバー
+
+    成功時は bodies に指定した内容（なければ {"path": パス} の JSON）を返す。
+    """
+
+    def __init__(self):
+        self.responses = {}
+        self.bodies = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                path = self.path.split("?", 1)[0]
+                stub.requests.append((path, self.client_address[1]))
+                queue = stub.responses.get(path, [])
+                status = queue.pop(0) if queue else 200
+                if status == 200:
+                    body = stub.bodies.get(path) or json.dumps({"path": path}).encode()
+                else:
+                    body = b"error"
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def count(self, path):
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]